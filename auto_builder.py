@@ -1,20 +1,60 @@
 # Standard library imports
 import os
 import sys
+import importlib
 import json
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 import asyncio
+import contextlib
 from pathlib import Path
+import sqlite3
 import subprocess
+import time
+from dataclasses import dataclass, field
 
-# Third-party imports
-from openai import AsyncOpenAI
-from decorators import cache_result, retry_on_failure
+from decorators import cache_result, timed
 from logger import setup_logger
+from metrics import metrics
 from dspy_analyzer import DSPyAnalyzer
 from ollama_service import OllamaService
-from constants import BuildStepType
+from readme_preprocessor import ReadmePreprocessor, merge_analyses
+from manifest_analyzer import ManifestAnalyzer
+from constants import LLMBackendPolicy
 from exceptions import BuildError
+from build_graph import BuildStep, plan_build_steps
+from process_runner import ProcessResult, ProcessRunner
+from build_store import BuildRecord, BuildResultStore, StepRecord
+from venv_pool import Venv, VenvPool
+
+@dataclass
+class BackendStats:
+    """Latency and outcome figures for one LLM backend"""
+    name: str
+    calls: int = 0
+    wins: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    cancelled: int = 0
+    latency: float = 0.0
+
+    def summary(self, analyses: int) -> str:
+        completed = self.calls - self.cancelled
+        avg_latency = self.latency / completed if completed else 0.0
+        win_rate = 100 * self.wins / analyses if analyses else 0.0
+        return (
+            f"{self.name}: {self.calls} calls, {self.wins} wins ({win_rate:.0f}%), "
+            f"{self.failures} failed, {self.timeouts} timed out, {self.cancelled} cancelled, "
+            f"avg {avg_latency:.2f}s"
+        )
+
+@dataclass
+class BuildRun:
+    """State shared by the commands of one build"""
+    repo_path: Path
+    deadline: float
+    log_dir: Optional[Path] = None
+    venv: Optional[Venv] = None
+    results: List[ProcessResult] = field(default_factory=list)
 
 class AutoBuilder:
     """Handles the automated building of repositories based on analysis."""
@@ -22,18 +62,137 @@ class AutoBuilder:
     def __init__(self, config):
         self.config = config
         self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
-        self.dspy_analyzer = DSPyAnalyzer(config)
-        self.ollama_service = OllamaService(config)
-        self.openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        # Backends are created on first use, so runs that stop at the manifest
+        # fast path or at the first backend never load the others
+        self._dspy_analyzer: Optional[DSPyAnalyzer] = None
+        self._ollama_service: Optional[OllamaService] = None
+        self._openai_client = None
+        self.backends = [
+            ("dspy", self._get_dspy_analysis, config.DSPY_TIMEOUT),
+            ("ollama", self._get_ollama_analysis, config.OLLAMA_TIMEOUT),
+            ("openai", self._get_openai_analysis, config.OPENAI_TIMEOUT),
+        ]
+        self.backend_stats = {name: BackendStats(name) for name, _, _ in self.backends}
+        self.analyses = 0
+        self.readme_preprocessor = ReadmePreprocessor(config)
+        self.readme_tokens = 0
+        self.prompt_tokens = 0
+        self.manifest_analyzer = ManifestAnalyzer(config)
+        self.process_runner = ProcessRunner(config)
+        self.build_store = BuildResultStore(config) if config.BUILD_CACHE_ENABLED else None
+        self.venv_pool = VenvPool(config) if config.VENV_POOL_ENABLED else None
+        self.repositories = 0
+        self.fast_path_hits = 0
+        self.fast_path_time = 0.0
+        self.llm_analyses = 0
+        self.llm_time = 0.0
 
-    @cache_result(Path("cache/analysis"))
-    @retry_on_failure()
-    async def analyze_build_steps(self, readme_content: str) -> Optional[Dict]:
+    async def aclose(self):
+        """Release the connection pools and worker threads held by the LLM backends"""
+        if self._dspy_analyzer:
+            self._dspy_analyzer.close()
+        if self.venv_pool:
+            await self.venv_pool.close()
+        if self._ollama_service:
+            await self._ollama_service.aclose()
+        if self._openai_client:
+            await self._openai_client.close()
+
+    def _get_ollama_service(self) -> OllamaService:
+        """Return the Ollama client, creating it on first use"""
+        if self._ollama_service is None:
+            self._ollama_service = OllamaService(self.config)
+        return self._ollama_service
+
+    async def _get_openai_client(self):
+        """Return the OpenAI client, importing the SDK off the event loop on first use"""
+        if self._openai_client is None:
+            openai = await asyncio.to_thread(importlib.import_module, "openai")
+            if self._openai_client is None:
+                self._openai_client = openai.AsyncOpenAI(api_key=self.config.OPENAI_API_KEY)
+        return self._openai_client
+
+    def analysis_summary(self) -> List[str]:
+        """README reduction and per-backend figures for the analyses run so far"""
+        reduction = 100 * (1 - self.prompt_tokens / self.readme_tokens) if self.readme_tokens else 0.0
+        hit_rate = 100 * self.fast_path_hits / self.repositories if self.repositories else 0.0
+        fast_path = (
+            f"Manifest fast path: {self.fast_path_hits}/{self.repositories} repositories ({hit_rate:.0f}%) "
+            f"in {self.fast_path_time:.3f}s"
+        )
+        if self.llm_analyses:
+            avg_llm = self.llm_time / self.llm_analyses
+            saved = self.fast_path_hits * avg_llm - self.fast_path_time
+            fast_path += f", ~{saved:.1f}s saved at {avg_llm:.2f}s per LLM analysis"
+        return [
+            fast_path,
+            f"README preprocessing: ~{self.readme_tokens} tokens reduced to ~{self.prompt_tokens} ({reduction:.0f}% less)",
+            *(stats.summary(self.analyses) for stats in self.backend_stats.values()),
+        ]
+
+    @timed("analysis")
+    async def analyze_repository(self, repo_path: Path, readme_content: Optional[str],
+                                 repo_name: Optional[str] = None) -> Optional[Dict]:
+        """
+        Derive build instructions for a downloaded repository.
+
+        Standard build manifests in the repository root are checked first. When
+        they identify the build with at least MANIFEST_CONFIDENCE_THRESHOLD
+        confidence no LLM is involved; otherwise the README goes through
+        analyze_build_steps.
+
+        Args:
+            repo_path: Path to the downloaded repository
+            readme_content: Content of the README file, if any
+            repo_name: Repository name, used in log messages
+
+        Returns:
+            Optional[Dict]: Analysis results or None if analysis fails
+
+        Raises:
+            BuildError: If analysis fails critically
+        """
+        self.repositories += 1
+        label = repo_name or str(repo_path)
+        if self.config.MANIFEST_ANALYSIS_ENABLED:
+            start = time.perf_counter()
+            analysis = await asyncio.to_thread(self.manifest_analyzer.analyze, repo_path)
+            self.fast_path_time += time.perf_counter() - start
+            if analysis and analysis.confidence >= self.config.MANIFEST_CONFIDENCE_THRESHOLD:
+                self.fast_path_hits += 1
+                self.logger.info(
+                    "%s: build derived from %s manifests (confidence %.2f), skipping LLM analysis",
+                    label, ", ".join(analysis.ecosystems), analysis.confidence,
+                )
+                return analysis.instructions()
+            if analysis:
+                self.logger.info(
+                    "%s: %s manifests found but confidence %.2f is below the threshold, using LLM analysis",
+                    label, ", ".join(analysis.ecosystems), analysis.confidence,
+                )
+        if not readme_content:
+            return None
+
+        start = time.perf_counter()
+        result = await self.analyze_build_steps(readme_content, repo_name)
+        self.llm_analyses += 1
+        self.llm_time += time.perf_counter() - start
+        return result
+
+    async def analyze_build_steps(self, readme_content: str, repo_name: Optional[str] = None) -> Optional[Dict]:
         """
         Analyze README content using DSPy, Ollama, and OpenAI.
+
+        The README is first reduced to its build-relevant sections and split
+        into chunks that fit README_TOKEN_BUDGET; the chunk results are merged.
+        LLM_BACKEND_POLICY decides how the backends are combined: one after the
+        other, hedged (the next backend starts once LLM_HEDGE_DELAY passes
+        without an answer) or raced. The first valid result wins and any
+        backend still running is cancelled.
         
         Args:
             readme_content: Content of the README file
+            repo_name: Repository the README belongs to, used in log messages
             
         Returns:
             Optional[Dict]: Analysis results or None if analysis fails
@@ -42,23 +201,102 @@ class AutoBuilder:
             BuildError: If analysis fails critically
         """
         try:
-            dspy_analysis = await self.dspy_analyzer.analyze_readme(readme_content)
-            
-            if dspy_analysis:
-                return dspy_analysis
-                
-            self.logger.warning("DSPy analysis failed, trying Ollama")
-            ollama_analysis = await self._get_ollama_analysis(readme_content)
-            if ollama_analysis:
-                return ollama_analysis
-                
-            self.logger.warning("Ollama analysis failed, falling back to OpenAI")
-            return await self._get_openai_analysis(readme_content)
-                
+            prepared = self.readme_preprocessor.process(readme_content)
+            self.readme_tokens += prepared.original_tokens
+            self.prompt_tokens += prepared.kept_tokens
+            self.logger.info("%s: %s", repo_name or 'README', prepared.summary())
+            result = await self._analyze_chunks(prepared.chunks)
+            if result is None:
+                self.logger.warning("All analysis backends failed")
+            return result
         except Exception as e:
-            self.logger.error(f"Error analyzing build steps: {e}")
+            self.logger.error("Error analyzing build steps: %s", e)
             raise BuildError(f"Build analysis failed: {str(e)}")
 
+    @cache_result(Path("cache/analysis"))
+    async def _analyze_chunks(self, chunks: List[str]) -> Optional[Dict]:
+        """Analyze each README chunk with the configured backend policy and merge the results"""
+        policy = LLMBackendPolicy(self.config.LLM_BACKEND_POLICY)
+        if policy is LLMBackendPolicy.SEQUENTIAL:
+            hedge_delay = None
+        elif policy is LLMBackendPolicy.HEDGED:
+            hedge_delay = self.config.LLM_HEDGE_DELAY
+        else:
+            hedge_delay = 0
+        if len(chunks) == 1:
+            return await self._run_backends(chunks[0], hedge_delay)
+        results = await asyncio.gather(*(self._run_backends(chunk, hedge_delay) for chunk in chunks))
+        return merge_analyses(results)
+
+    async def _run_backends(self, readme_content: str, hedge_delay: Optional[float]) -> Optional[Dict]:
+        """
+        Start the backends in order and return the first valid result.
+
+        The next backend is started as soon as every running one has failed, or
+        when hedge_delay seconds pass without an answer. None waits for each
+        backend to finish before trying the next, 0 starts them all at once.
+        """
+        self.analyses += 1
+        remaining = list(self.backends)
+        pending = set()
+        try:
+            while remaining or pending:
+                if remaining:
+                    name, func, timeout = remaining.pop(0)
+                    pending.add(asyncio.create_task(self._call_backend(name, func, timeout, readme_content)))
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=hedge_delay if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    name, result = task.result()
+                    if result:
+                        self.backend_stats[name].wins += 1
+                        return result
+                if not done and hedge_delay:
+                    self.logger.info("No analysis after %ss, starting %s alongside", hedge_delay, remaining[0][0])
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _call_backend(self, name: str, func, timeout: float, readme_content: str):
+        """Run one backend under its timeout and record its latency"""
+        stats = self.backend_stats[name]
+        stats.calls += 1
+        start = time.perf_counter()
+        result = None
+        outcome = "failure"
+        try:
+            result = await asyncio.wait_for(func(readme_content), timeout)
+            if result:
+                outcome = "success"
+            else:
+                stats.failures += 1
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            stats.timeouts += 1
+            self.logger.warning("%s analysis timed out after %ss", name, timeout)
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            metrics.observe("llm_backend", time.perf_counter() - start, backend=name, outcome="cancelled")
+            raise
+        except Exception as e:
+            stats.failures += 1
+            self.logger.error("%s analysis failed: %s", name, e)
+        elapsed = time.perf_counter() - start
+        stats.latency += elapsed
+        metrics.observe("llm_backend", elapsed, outcome != "success", backend=name, outcome=outcome)
+        return name, result
+
+    async def _get_dspy_analysis(self, readme_content: str) -> Optional[Dict]:
+        """Get analysis from DSPy"""
+        if self._dspy_analyzer is None:
+            self._dspy_analyzer = DSPyAnalyzer(self.config)
+        return await self._dspy_analyzer.analyze_readme(readme_content)
+
     async def _get_ollama_analysis(self, readme_content: str) -> Optional[Dict]:
         """Get analysis from Ollama"""
         try:
@@ -66,12 +304,13 @@ class AutoBuilder:
                 "Analyze this README and extract build instructions as JSON with keys: "
                 "dependencies (list of strings), setup_steps (list of {command, description}), "
                 "build_steps (list of {command, description}), test_steps (list of {command, description}). "
+                "Steps that do not need the previous step may add an id and depends_on (list of step ids). "
                 f"README content: {readme_content}"
             )
-            response = await self.ollama_service.generate(prompt, model=self.config.OLLAMA_MODEL)
+            response = await self._get_ollama_service().generate(prompt, model=self.config.OLLAMA_MODEL, format="json")
             return json.loads(response)
         except Exception as e:
-            self.logger.error(f"Ollama analysis failed: {e}")
+            self.logger.error("Ollama analysis failed: %s", e)
             return None
 
     async def _get_openai_analysis(self, readme_content: str) -> Optional[Dict]:
@@ -81,9 +320,11 @@ class AutoBuilder:
                 "Analyze this README and extract build instructions as JSON with keys: "
                 "dependencies (list of strings), setup_steps (list of {command, description}), "
                 "build_steps (list of {command, description}), test_steps (list of {command, description}). "
+                "Steps that do not need the previous step may add an id and depends_on (list of step ids). "
                 f"README content: {readme_content}"
             )
-            response = await self.openai_client.chat.completions.create(
+            client = await self._get_openai_client()
+            response = await client.chat.completions.create(
                 model=self.config.MODEL_NAME,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1,
@@ -92,16 +333,38 @@ class AutoBuilder:
             content = response.choices[0].message.content
             return json.loads(content)
         except Exception as e:
-            self.logger.error(f"OpenAI analysis failed: {e}")
+            self.logger.error("OpenAI analysis failed: %s", e)
             return None
 
-    async def execute_build_steps(self, repo_path: Path, build_instructions: Dict) -> bool:
+    def last_build_status(self, full_name: str) -> Optional[BuildRecord]:
+        """Most recent recorded build of a repository, or None if it was never built"""
+        if self.build_store is None:
+            return None
+        return self.build_store.last_status(full_name)
+
+    @timed("build")
+    async def execute_build_steps(self, repo_path: Path, build_instructions: Dict, full_name: Optional[str] = None,
+                                  commit_sha: Optional[str] = None, force: bool = False) -> bool:
         """
         Execute build steps asynchronously.
+
+        Dependencies are installed with a single pip invocation. The steps are
+        then run as a dependency graph (see plan_build_steps) with up to
+        BUILD_MAX_PARALLEL steps at once. With BUILD_FAIL_FAST the first
+        failure cancels every running step; otherwise independent steps keep
+        going and all failures are reported at the end. Each command is limited
+        to BUILD_STEP_TIMEOUT seconds and the whole build to BUILD_TOTAL_TIMEOUT.
+
+        When the repository name and commit are given, the outcome is recorded
+        in the build result store, and a commit that already built successfully
+        with the same instructions is not built again unless forced.
         
         Args:
             repo_path: Path to repository
             build_instructions: Dictionary containing build instructions
+            full_name: Repository "owner/repo" name
+            commit_sha: Commit the working tree was downloaded at
+            force: Build even if a successful build is recorded
             
         Returns:
             bool: True if build succeeds, False otherwise
@@ -109,68 +372,173 @@ class AutoBuilder:
         Raises:
             BuildError: If build fails critically
         """
+        key = None
+        if self.build_store and full_name and commit_sha:
+            key = (full_name, commit_sha, BuildResultStore.instructions_hash(build_instructions))
+            previous = await asyncio.to_thread(self.build_store.get, *key)
+            if previous and previous.success and not force:
+                metrics.increment("build_cache_hits")
+                self.logger.info("Skipping build, already built: %s", previous.summary())
+                return True
+
+        started = time.perf_counter()
+        log_dir = self.config.BUILD_LOG_DIRECTORY / repo_path.name if self.config.BUILD_LOG_DIRECTORY else None
+        environment = self.venv_pool.checkout() if self.venv_pool else contextlib.nullcontext()
         try:
-            self.logger.info("Installing dependencies...")
-            if not await self._install_dependencies(build_instructions.get('dependencies', [])):
-                return False
+            async with environment as venv:
+                run = BuildRun(repo_path, time.monotonic() + self.config.BUILD_TOTAL_TIMEOUT, log_dir, venv)
+                self.logger.info("Installing dependencies...")
+                if not await self._install_dependencies(build_instructions.get('dependencies', []), run):
+                    failures = {"dependencies": "dependency installation failed"}
+                else:
+                    steps = plan_build_steps(build_instructions)
+                    failures = await self._run_step_graph(steps, run)
+                    for step_id, error in failures.items():
+                        self.logger.error("Step %s failed: %s", step_id, error)
+        except BuildError:
+            raise
+        except Exception as e:
+            self.logger.error("Error executing build steps: %s", e)
+            raise BuildError(f"Build execution failed: {str(e)}")
 
-            steps = [
-                (BuildStepType.SETUP, build_instructions.get('setup_steps', [])),
-                (BuildStepType.BUILD, build_instructions.get('build_steps', [])),
-                (BuildStepType.TEST, build_instructions.get('test_steps', []))
-            ]
+        if key:
+            await asyncio.to_thread(self._record_build, key, time.perf_counter() - started, run.results, failures)
+        return not failures
 
-            for step_type, step_list in steps:
-                self.logger.info(f"\nExecuting {step_type.value} steps...")
-                if not await self._execute_steps(repo_path, step_list):
-                    return False
+    def _record_build(self, key: Tuple[str, str, str], duration: float, results: List[ProcessResult],
+                      failures: Dict[str, str]) -> None:
+        failed = [result for result in results if not result.ok]
+        tail_from = failed[0] if failed else (results[-1] if results else None)
+        build = BuildRecord(
+            *key,
+            success=not failures,
+            duration=duration,
+            steps=[
+                StepRecord(result.name, result.returncode, result.duration, result.peak_rss, result.timed_out)
+                for result in results
+            ],
+            output_tail=tail_from.tail_text() if tail_from else "",
+            error="\n".join(f"{step_id}: {error}" for step_id, error in failures.items()),
+        )
+        try:
+            self.build_store.record(build)
+        except sqlite3.Error as e:
+            self.logger.warning("Could not record build result: %s", e)
 
-            return True
-        except Exception as e:
-            self.logger.error(f"Error executing build steps: {e}")
-            raise BuildError(f"Build execution failed: {str(e)}")
+    async def _run_command(self, command: Union[str, List[str]], name: str, run: BuildRun,
+                           cwd: Optional[Path] = None) -> Optional[ProcessResult]:
+        """Run one build command under the remaining time budget, or return None if none is left"""
+        timeout = min(self.config.BUILD_STEP_TIMEOUT, run.deadline - time.monotonic())
+        if timeout <= 0:
+            return None
+        result = await self.process_runner.run(
+            command,
+            name=name,
+            cwd=cwd,
+            timeout=timeout,
+            log_path=run.log_dir / f"{name}.log" if run.log_dir else None,
+            env=run.venv.environ() if run.venv else None,
+        )
+        self.logger.info(result.summary())
+        run.results.append(result)
+        return result
 
-    async def _install_dependencies(self, dependencies: List[str]) -> bool:
-        """Install dependencies asynchronously"""
+    async def _install_dependencies(self, dependencies: List[str], run: BuildRun) -> bool:
+        """
+        Install all dependencies together so they are resolved in one go.
+
+        Inside a pooled virtualenv the install goes through the shared
+        wheelhouse and only falls back to the package index for missing wheels.
+        """
+        if isinstance(dependencies, str):
+            dependencies = [dependencies]
+        dependencies = [dep.strip() for dep in dependencies if dep and dep.strip()]
+        if not dependencies:
+            return True
         try:
-            for dep in dependencies:
-                cmd = f"pip install {dep}"
-                process = await asyncio.create_subprocess_shell(
-                    cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                stdout, stderr = await process.communicate()
-                
-                if process.returncode != 0:
-                    self.logger.error(f"Failed to install {dep}: {stderr.decode()}")
-                    return False
-                    
+            async with timed("dependency_install"):
+                if run.venv:
+                    offline, fetch, install = self.venv_pool.install_commands(run.venv, dependencies)
+                    result = await self._run_command(offline, "dependencies", run)
+                    if result and not result.ok and not result.timed_out:
+                        self.logger.info("Some wheels are not in the wheelhouse yet, fetching them")
+                        result = await self._run_command(fetch, "wheelhouse", run)
+                        if result and result.ok:
+                            result = await self._run_command(install, "dependencies", run)
+                else:
+                    result = await self._run_command(
+                        [sys.executable, "-m", "pip", "install", *dependencies], "dependencies", run
+                    )
+            if result is None:
+                self.logger.error("No time left to install dependencies within BUILD_TOTAL_TIMEOUT")
+                return False
+            if not result.ok:
+                self.logger.error("Failed to install %s:\n%s", ', '.join(dependencies), result.tail_text())
+                return False
+
             return True
         except Exception as e:
-            self.logger.error(f"Error installing dependencies: {e}")
+            self.logger.error("Error installing dependencies: %s", e)
             return False
 
-    async def _execute_steps(self, repo_path: Path, steps: List[Dict]) -> bool:
-        """Execute a set of build steps"""
-        for step in steps:
-            self.logger.info(f"\nExecuting: {step['description']}")
-            try:
-                process = await asyncio.create_subprocess_shell(
-                    step['command'],
-                    cwd=repo_path,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                stdout, stderr = await process.communicate()
-                
-                if process.returncode != 0:
-                    self.logger.error(f"Step failed: {stderr.decode()}")
-                    return False
-                    
-                self.logger.debug(f"Output: {stdout.decode()}")
-            except Exception as e:
-                self.logger.error(f"Error executing step: {e}")
+    async def _run_step_graph(self, steps: List[BuildStep], run: BuildRun) -> Dict[str, str]:
+        """
+        Run steps once their dependencies succeeded, at most BUILD_MAX_PARALLEL at a time.
+
+        Returns:
+            Dict[str, str]: Error message per failed or skipped step id, empty on success
+        """
+        semaphore = asyncio.Semaphore(self.config.BUILD_MAX_PARALLEL)
+        failures: Dict[str, str] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step: BuildStep) -> bool:
+            dependencies_ok = await asyncio.gather(*(tasks[dep] for dep in step.depends_on))
+            if not all(dependencies_ok):
+                failed = [dep for dep, ok in zip(step.depends_on, dependencies_ok) if not ok]
+                failures[step.id] = f"skipped, depends on failed steps {', '.join(failed)}"
+                return False
+            async with semaphore:
+                error = await self._execute_step(step, run)
+            if error:
+                failures[step.id] = error
                 return False
-                
-        return True
\ No newline at end of file
+            return True
+
+        # Steps are in topological order, so every dependency's task exists already
+        for step in steps:
+            tasks[step.id] = asyncio.create_task(run_step(step))
+        try:
+            for finished in asyncio.as_completed(list(tasks.values())):
+                if not await finished and self.config.BUILD_FAIL_FAST:
+                    break
+        finally:
+            pending = [task for task in tasks.values() if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for step_id, task in tasks.items():
+                if task.cancelled() and step_id not in failures:
+                    failures[step_id] = "cancelled after an earlier failure"
+        return failures
+
+    async def _execute_step(self, step: BuildStep, run: BuildRun) -> Optional[str]:
+        """
+        Run a single build step.
+
+        Returns:
+            Optional[str]: None on success, otherwise the reason the step failed
+        """
+        self.logger.info("\nExecuting %s step %s: %s", step.type.value, step.id, step.description or step.command)
+        try:
+            async with timed("build_step", type=step.type.value):
+                result = await self._run_command(step.command, step.id, run, cwd=run.repo_path)
+        except Exception as e:
+            return f"error executing step: {e}"
+        if result is None:
+            return f"not started, BUILD_TOTAL_TIMEOUT of {self.config.BUILD_TOTAL_TIMEOUT}s exceeded"
+        if result.timed_out:
+            return f"timed out after {result.duration:.0f}s:\n{result.tail_text()}"
+        if result.returncode != 0:
+            return f"exit code {result.returncode}:\n{result.tail_text()}"
+        return None
@@ -0,0 +1 @@
+"""Benchmarks run against local stand-ins for GitHub and the LLM backends; see benchmarks/run.py."""
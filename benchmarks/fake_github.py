@@ -0,0 +1,322 @@
+import base64
+import hashlib
+import io
+import json
+import random
+import tarfile
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+from repo_compare import tree_sha
+from benchmarks.server import FakeServer
+
+DEFAULT_BRANCH = "main"
+DIRECTORY_NAMES = ("src", "lib", "core", "utils", "docs", "tests", "api", "models", "web", "tools")
+WORDS = (
+    "build", "install", "the", "project", "requires", "module", "run", "configure", "data",
+    "server", "client", "test", "release", "version", "support", "feature", "option", "file",
+)
+
+def blob_sha(content: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+def synthetic_readme(name: str, paragraphs: int, rng: random.Random) -> str:
+    """A README with build sections buried among badges, prose and a changelog"""
+    def prose() -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(60)) + "."
+
+    parts = [
+        f"# {name}",
+        "[![CI](https://img.shields.io/badge/ci-passing-green.svg)](https://example.com)",
+        prose(),
+        "## Installation",
+        "```bash",
+        f"git clone https://github.com/bench/{name}.git",
+        "pip install -r requirements.txt",
+        "```",
+        "## Building",
+        "```bash",
+        "make build",
+        "make test",
+        "```",
+        "## Usage",
+    ]
+    parts.extend(prose() for _ in range(paragraphs // 2))
+    parts.append("## Changelog")
+    parts.extend(f"- {rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(paragraphs))
+    parts.append("## License\n\nMIT")
+    return "\n\n".join(parts) + "\n"
+
+@dataclass
+class SyntheticRepo:
+    """A repository with generated content, indexed the way the GitHub API exposes it"""
+    full_name: str
+    files: Dict[str, bytes]
+    created_at: str = "2020-01-01T00:00:00Z"
+    executables: Set[str] = field(default_factory=set)
+    blobs: Dict[str, str] = field(default_factory=dict)
+    listings: Dict[str, List[Tuple[str, str]]] = field(default_factory=dict)
+    trees: Dict[str, List[Dict]] = field(default_factory=dict)
+    tree_shas: Dict[str, str] = field(default_factory=dict)
+    commit_sha: str = ""
+    # Tarball served for the repository; generated from files on first use if not given
+    archive: Optional[bytes] = None
+
+    def __post_init__(self):
+        self.blobs = {path: blob_sha(content) for path, content in self.files.items()}
+        self.listings = {"": []}
+        for path in sorted(self.files):
+            parent = ""
+            for name in path.split("/")[:-1]:
+                directory = f"{parent}/{name}" if parent else name
+                if directory not in self.listings:
+                    self.listings[directory] = []
+                    self.listings[parent].append((name, "dir"))
+                parent = directory
+            self.listings[parent].append((path.rsplit("/", 1)[-1], "file"))
+        self._hash_tree("")
+        self.commit_sha = hashlib.sha1(f"{self.full_name} {self.tree_shas['']}".encode()).hexdigest()
+
+    @property
+    def name(self) -> str:
+        return self.full_name.split("/")[1]
+
+    def _hash_tree(self, directory: str) -> str:
+        entries = []
+        git_entries = []
+        for name, kind in self.listings[directory]:
+            path = f"{directory}/{name}" if directory else name
+            if kind == "dir":
+                sha = self._hash_tree(path)
+                entries.append({"path": name, "mode": "040000", "type": "tree", "sha": sha})
+                git_entries.append(("40000", name, sha))
+            else:
+                sha = self.blobs[path]
+                mode = "100755" if path in self.executables else "100644"
+                entries.append({"path": name, "mode": mode, "type": "blob", "sha": sha,
+                                "size": len(self.files[path])})
+                git_entries.append((mode, name, sha))
+        sha = tree_sha(git_entries)
+        self.trees[sha] = entries
+        self.tree_shas[directory] = sha
+        return sha
+
+    def recursive_tree(self, sha: str) -> List[Dict]:
+        """Entries of a tree and all its subtrees with paths relative to it"""
+        result = []
+        for entry in self.trees[sha]:
+            result.append(entry)
+            if entry["type"] == "tree":
+                result.extend(
+                    {**child, "path": f"{entry['path']}/{child['path']}"} for child in self.recursive_tree(entry["sha"])
+                )
+        return result
+
+    def tarball(self) -> bytes:
+        """The repository as a gzipped tarball wrapped in a single top-level directory, like GitHub's"""
+        if self.archive is None:
+            buffer = io.BytesIO()
+            prefix = f"{self.full_name.replace('/', '-')}-{self.commit_sha[:7]}"
+            with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+                for path, content in sorted(self.files.items()):
+                    info = tarfile.TarInfo(f"{prefix}/{path}")
+                    info.size = len(content)
+                    info.mode = 0o755 if path in self.executables else 0o644
+                    archive.addfile(info, io.BytesIO(content))
+            self.archive = buffer.getvalue()
+        return self.archive
+
+def synthetic_repo(full_name: str, files: int, depth: int, file_size: int,
+                   readme_paragraphs: int = 20, seed: int = 0) -> SyntheticRepo:
+    """
+    Generate a repository with a deterministic layout and content.
+
+    Args:
+        full_name: Repository name in "owner/repo" form
+        files: Number of files besides the README
+        depth: Maximum directory nesting
+        file_size: Approximate size of each file in bytes
+        readme_paragraphs: Length of the README's prose and changelog
+        seed: Seed for the layout and content; the same arguments give the same repository
+    """
+    rng = random.Random(f"{full_name}:{seed}")
+    name = full_name.split("/")[1]
+    contents = {"README.md": synthetic_readme(name, readme_paragraphs, rng).encode("utf-8")}
+    for index in range(files):
+        directories = [rng.choice(DIRECTORY_NAMES) for _ in range(rng.randint(0, depth))]
+        path = "/".join(directories + [f"file_{index}.py"])
+        line = f"# {name} {index} " + " ".join(rng.choice(WORDS) for _ in range(8)) + "\n"
+        contents[path] = (line * (file_size // len(line) + 1))[:file_size].encode("utf-8")
+    return SyntheticRepo(full_name, contents)
+
+class FakeGitHub(FakeServer):
+    """
+    Stand-in for the parts of the GitHub REST API and raw host the analyzer uses.
+
+    Serves token validation, repository metadata, READMEs, branches, the
+    contents API, git trees, tarballs, raw files and repository search for a
+    set of synthetic repositories. API responses carry an ETag and honour
+    If-None-Match like GitHub does. With a rate limit, every token may make
+    `rate_limit` API requests per `rate_window` seconds and further requests
+    get GitHub's 403 "rate limit exceeded" response until the window resets.
+    Raw files are served under /raw and are not rate limited.
+    """
+
+    def __init__(self, repos: List[SyntheticRepo], latency: float = 0.0,
+                 rate_limit: int = 0, rate_window: float = 60.0):
+        super().__init__(latency)
+        self.repos = {repo.full_name: repo for repo in repos}
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self._windows: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        self._window_lock = threading.Lock()
+
+    @property
+    def raw_url(self) -> str:
+        return f"{self.base_url}/raw"
+
+    def repo_json(self, repo: SyntheticRepo) -> Dict:
+        owner = repo.full_name.split("/")[0]
+        return {
+            "id": abs(hash(repo.full_name)) % 10 ** 9,
+            "name": repo.name,
+            "full_name": repo.full_name,
+            "owner": {"login": owner, "type": "User"},
+            "private": False,
+            "description": f"Synthetic repository {repo.name}",
+            "default_branch": DEFAULT_BRANCH,
+            "url": f"{self.base_url}/repos/{repo.full_name}",
+            "html_url": f"https://github.com/{repo.full_name}",
+            "created_at": repo.created_at,
+            "pushed_at": repo.created_at,
+            "stargazers_count": 0,
+            "size": sum(len(content) for content in repo.files.values()) // 1024,
+        }
+
+    def handle(self, handler: BaseHTTPRequestHandler, method: str, path: str, query, body: bytes) -> str:
+        if path.startswith("/raw/"):
+            return self._raw(handler, unquote(path[len("/raw/"):]))
+
+        resource = "search" if path.startswith("/search/") else "core"
+        rate_headers, allowed = self._take_quota(handler.headers.get("Authorization", ""), resource)
+        if not allowed:
+            self.send_json(handler, 403, {"message": "API rate limit exceeded"}, rate_headers)
+            return "rate_limited"
+
+        kind, status, data, extra = self._route(path, query)
+        headers = {**rate_headers, **(extra or {})}
+        if kind == "tarball":
+            self.send(handler, 200, data, "application/x-gzip", headers)
+            return kind
+        payload = json.dumps(data).encode("utf-8")
+        etag = f'"{hashlib.sha1(payload).hexdigest()}"'
+        if status == 200 and handler.headers.get("If-None-Match") == etag:
+            self.send(handler, 304, b"", "application/json", {**headers, "ETag": etag})
+            return "not_modified"
+        if status == 200:
+            headers["ETag"] = etag
+        self.send(handler, status, payload, "application/json", headers)
+        return kind
+
+    def _route(self, path: str, query) -> Tuple[str, int, object, Optional[Dict]]:
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts == ["user"]:
+            return "user", 200, {"login": "benchmark", "id": 1, "type": "User"}, None
+        if parts[:2] == ["search", "repositories"]:
+            return "search", 200, self._search(query), None
+        if len(parts) < 3 or parts[0] != "repos":
+            return "not_found", 404, {"message": "Not Found"}, None
+        repo = self.repos.get(f"{parts[1]}/{parts[2]}")
+        if repo is None:
+            return "not_found", 404, {"message": "Not Found"}, None
+        rest = parts[3:]
+        if not rest:
+            return "repository", 200, self.repo_json(repo), None
+        if rest == ["readme"]:
+            return "readme", 200, self._content_json(repo, "README.md", with_content=True), None
+        if rest[0] == "branches" and len(rest) == 2:
+            return "branch", 200, {
+                "name": rest[1],
+                "commit": {"sha": repo.commit_sha, "commit": {"tree": {"sha": repo.tree_shas[""]}}},
+            }, None
+        if rest[0] == "contents":
+            target = "/".join(part for part in rest[1:] if part)
+            if target in repo.listings:
+                listing = [
+                    self._content_json(repo, f"{target}/{name}" if target else name, kind == "dir")
+                    for name, kind in repo.listings[target]
+                ]
+                return "contents", 200, listing, None
+            if target in repo.files:
+                return "contents", 200, self._content_json(repo, target, with_content=True), None
+            return "not_found", 404, {"message": "Not Found"}, None
+        if rest[:2] == ["git", "trees"] and len(rest) == 3:
+            # Like GitHub, a branch name stands for its root tree
+            sha = repo.tree_shas[""] if rest[2] == DEFAULT_BRANCH else rest[2]
+            if sha in repo.trees:
+                recursive = bool(query.get("recursive"))
+                entries = repo.recursive_tree(sha) if recursive else repo.trees[sha]
+                return "tree", 200, {"sha": sha, "tree": entries, "truncated": False}, None
+        if rest[0] == "tarball":
+            return "tarball", 200, repo.tarball(), None
+        return "not_found", 404, {"message": "Not Found"}, None
+
+    def _content_json(self, repo: SyntheticRepo, path: str, is_dir: bool = False,
+                      with_content: bool = False) -> Dict:
+        entry = {
+            "name": path.rsplit("/", 1)[-1],
+            "path": path,
+            "type": "dir" if is_dir else "file",
+            "sha": repo.tree_shas[path] if is_dir else repo.blobs[path],
+            "size": 0 if is_dir else len(repo.files[path]),
+            "url": f"{self.base_url}/repos/{repo.full_name}/contents/{path}",
+            "download_url": None if is_dir else f"{self.raw_url}/{repo.full_name}/{DEFAULT_BRANCH}/{path}",
+        }
+        if with_content:
+            entry["encoding"] = "base64"
+            entry["content"] = base64.b64encode(repo.files[path]).decode("ascii")
+        return entry
+
+    def _search(self, query) -> Dict:
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", ["30"])[0])
+        repos = sorted(self.repos.values(), key=lambda repo: repo.full_name)
+        items = repos[(page - 1) * per_page:page * per_page]
+        return {
+            "total_count": len(repos),
+            "incomplete_results": False,
+            "items": [self.repo_json(repo) for repo in items],
+        }
+
+    def _raw(self, handler: BaseHTTPRequestHandler, path: str) -> str:
+        owner, name, _ref, file_path = (path.split("/", 3) + ["", "", "", ""])[:4]
+        repo = self.repos.get(f"{owner}/{name}")
+        if repo is None or file_path not in repo.files:
+            self.send(handler, 404, b"404: Not Found", "text/plain")
+            return "raw_not_found"
+        self.send(handler, 200, repo.files[file_path], "text/plain; charset=utf-8")
+        return "raw"
+
+    def _take_quota(self, authorization: str, resource: str) -> Tuple[Dict, bool]:
+        """Count a request against its token's window and build the rate limit headers"""
+        now = time.time()
+        limit = self.rate_limit or 5000
+        with self._window_lock:
+            started, used = self._windows.get((authorization, resource), (now, 0))
+            if now - started >= self.rate_window:
+                started, used = now, 0
+            allowed = not self.rate_limit or used < self.rate_limit
+            if allowed:
+                used += 1
+            self._windows[(authorization, resource)] = (started, used)
+        headers = {
+            "X-RateLimit-Limit": limit,
+            "X-RateLimit-Remaining": max(limit - used, 0),
+            "X-RateLimit-Used": used,
+            "X-RateLimit-Reset": int(started + self.rate_window) + 1,
+            "X-RateLimit-Resource": resource,
+        }
+        return headers, allowed
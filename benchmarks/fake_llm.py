@@ -0,0 +1,102 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+from benchmarks.server import FakeServer
+
+# Characters per generated token, matching readme_preprocessor.CHARS_PER_TOKEN
+CHARS_PER_TOKEN = 4
+
+DEFAULT_INSTRUCTIONS = {
+    "dependencies": [],
+    "setup_steps": [{"command": "echo setup", "description": "Prepare the environment"}],
+    "build_steps": [{"command": "echo build", "description": "Build the project"}],
+    "test_steps": [{"command": "echo test", "description": "Run the tests"}],
+}
+
+class FakeLLM(FakeServer):
+    """
+    Stand-in for an Ollama server and an OpenAI-compatible chat completions API.
+
+    Both answer every prompt with the same build instructions. Generation
+    takes `first_token_latency` seconds plus `token_latency` seconds per
+    generated token: Ollama's /api/generate streams the tokens as they are
+    produced, /v1/chat/completions returns them at once when generation is
+    done. With fail_ollama, the Ollama endpoint answers with a server error so
+    analyses fall through to OpenAI.
+    """
+
+    def __init__(self, token_latency: float = 0.005, first_token_latency: float = 0.05,
+                 instructions: Optional[Dict] = None, fail_ollama: bool = False, latency: float = 0.0):
+        super().__init__(latency)
+        self.token_latency = token_latency
+        self.first_token_latency = first_token_latency
+        self.response = json.dumps(instructions or DEFAULT_INSTRUCTIONS)
+        self.fail_ollama = fail_ollama
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @property
+    def ollama_url(self) -> str:
+        return f"{self.base_url}/api"
+
+    @property
+    def openai_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.requests, "prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens}
+
+    def tokens(self) -> List[str]:
+        return [self.response[i:i + CHARS_PER_TOKEN] for i in range(0, len(self.response), CHARS_PER_TOKEN)]
+
+    def handle(self, handler: BaseHTTPRequestHandler, method: str, path: str, query, body: bytes) -> str:
+        request = json.loads(body or b"{}")
+        if method == "POST" and path == "/api/generate":
+            if self.fail_ollama:
+                self.send_json(handler, 500, {"error": "model unavailable"})
+                return "ollama_error"
+            self._count(len(request.get("prompt", "")))
+            self._ollama(handler, request)
+            return "ollama"
+        if method == "POST" and path == "/v1/chat/completions":
+            prompt = "".join(message.get("content", "") for message in request.get("messages", []))
+            self._count(len(prompt))
+            self._openai(handler, request)
+            return "openai"
+        self.send_json(handler, 404, {"error": "not found"})
+        return "not_found"
+
+    def _count(self, prompt_chars: int) -> None:
+        with self._lock:
+            self.prompt_tokens += prompt_chars // CHARS_PER_TOKEN
+            self.completion_tokens += len(self.tokens())
+
+    def _ollama(self, handler: BaseHTTPRequestHandler, request: Dict) -> None:
+        model = request.get("model", "")
+        tokens = self.tokens()
+
+        def chunks():
+            for token in tokens:
+                yield json.dumps({"model": model, "response": token, "done": False}).encode("utf-8") + b"\n"
+            yield json.dumps({"model": model, "response": "", "done": True, "eval_count": len(tokens)}).encode("utf-8") + b"\n"
+
+        time.sleep(self.first_token_latency)
+        self.send_chunks(handler, chunks(), "application/x-ndjson", self.token_latency)
+
+    def _openai(self, handler: BaseHTTPRequestHandler, request: Dict) -> None:
+        tokens = self.tokens()
+        time.sleep(self.first_token_latency + self.token_latency * len(tokens))
+        self.send_json(handler, 200, {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", ""),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.response},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+        })
@@ -0,0 +1,376 @@
+"""
+Benchmarks for CLI startup, repository downloads, README analysis, run_project and scanner runs.
+
+GitHub and the LLM backends are replaced by local fake servers with
+configurable latency, so runs are repeatable and cost nothing. Run from the
+repository root:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --scenario download --files 2000 --download-mode concurrent
+    python -m benchmarks.run --scenario startup --iterations 10
+    python -m benchmarks.run --compare benchmarks/results/<earlier run>.json
+
+Results are written as JSON to benchmarks/results/ unless --output is given.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import yaml
+from benchmarks.fake_github import FakeGitHub, synthetic_repo
+from benchmarks.fake_llm import FakeLLM
+from constants import DEFAULT_GITHUB_MAX_REQUESTS_PER_SECOND, DownloadMode, LLMBackendPolicy
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIRECTORY = REPO_ROOT / "benchmarks" / "results"
+SCENARIOS = ("startup", "download", "analysis", "run_project", "scanner")
+# Entry points whose startup time is tracked, and the time each may take to start
+STARTUP_MODULES = ("main", "scanner_main")
+DEFAULT_STARTUP_TARGET = 1.0
+
+@dataclass
+class ScenarioResult:
+    """Timings of one scenario and the requests it sent to the fake servers"""
+    name: str
+    iterations: List[Dict[str, Any]] = field(default_factory=list)
+    github_requests: Dict[str, int] = field(default_factory=dict)
+    llm_requests: Dict[str, int] = field(default_factory=dict)
+
+    def seconds(self) -> Dict[str, float]:
+        durations = [iteration["seconds"] for iteration in self.iterations if iteration["ok"]]
+        if not durations:
+            return {}
+        return {
+            "min": min(durations),
+            "median": statistics.median(durations),
+            "mean": statistics.fmean(durations),
+            "max": max(durations),
+        }
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "seconds": self.seconds(),
+            "failures": sum(not iteration["ok"] for iteration in self.iterations),
+            "iterations": self.iterations,
+            "github_requests": self.github_requests,
+            "llm_requests": self.llm_requests,
+        }
+
+def import_profile(importtime: str, module: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Read `python -X importtime` output.
+
+    Returns:
+        Tuple[float, Dict[str, float]]: Seconds spent importing module, and the
+        five slowest modules it imports directly with their cumulative seconds
+    """
+    children: List[Tuple[str, float]] = []
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        seconds = int(cumulative) / 1e6
+        # Names are indented by two spaces per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == module:
+            slowest = sorted(children, key=lambda child: child[1], reverse=True)[:5]
+            return seconds, dict(slowest)
+        if depth == 0:
+            children = []
+        elif depth == 1:
+            children.append((name.strip(), seconds))
+    return 0.0, {}
+
+def measure_startup(module: str) -> Dict[str, Any]:
+    """Time importing an entry point in a fresh interpreter, as running it does before any work"""
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    seconds = time.perf_counter() - start
+    import_seconds, slowest = import_profile(process.stderr, module)
+    return {"seconds": seconds, "import_seconds": import_seconds, "slowest_imports": slowest}
+
+def counter_delta(after: Dict[str, int], before: Dict[str, int]) -> Dict[str, int]:
+    return {key: value - before.get(key, 0) for key, value in sorted(after.items()) if value != before.get(key, 0)}
+
+class Benchmark:
+    """
+    Runs scenarios against the fake servers from a scratch working directory.
+
+    The working directory holds the generated config.yaml, downloaded
+    repositories, logs and all caches, so every benchmark run starts cold.
+    Caches persist between the iterations of a run, as they do in a long
+    running process; per-iteration timings show the cold first iteration
+    separately from the warm ones.
+    """
+
+    def __init__(self, args: argparse.Namespace, workdir: Path):
+        self.args = args
+        self.workdir = workdir
+        self.repos = [
+            synthetic_repo(f"bench/repo-{index}", args.files, args.depth, args.file_size,
+                           args.readme_paragraphs, args.seed)
+            for index in range(args.repos)
+        ]
+        self.github = FakeGitHub(self.repos, args.github_latency, args.rate_limit, args.rate_window)
+        self.llm = FakeLLM(args.token_latency, args.first_token_latency, fail_ollama=args.llm_backend == "openai")
+
+    def start(self) -> None:
+        self.github.start()
+        self.llm.start()
+        settings = {
+            "GITHUB_TOKEN": "benchmark-token",
+            "OPENAI_API_KEY": "benchmark-key",
+            "GITHUB_API_URL": self.github.base_url,
+            "GITHUB_RAW_URL": self.github.raw_url,
+            "OLLAMA_BASE_URL": self.llm.ollama_url,
+            "OLLAMA_MODEL": "benchmark",
+            "DOWNLOAD_MODE": self.args.download_mode,
+            "LLM_BACKEND_POLICY": self.args.llm_policy,
+        }
+        # Environment variables take precedence over config.yaml, so real
+        # credentials and endpoints must not leak into the benchmark
+        os.environ.update(settings)
+        os.environ.pop("GITHUB_TOKENS", None)
+        os.environ["OPENAI_BASE_URL"] = self.llm.openai_url
+        config = {
+            **settings,
+            "MODEL_NAME": "benchmark",
+            "BASE_DIRECTORY": "github-repos",
+            "LOG_DIRECTORY": "logs",
+            "SCANNER_SEARCH_LIMIT": len(self.repos),
+            "GITHUB_MAX_REQUESTS_PER_SECOND": self.args.github_rps,
+            "VENV_POOL_ENABLED": self.args.venv_pool,
+            "DSPY_SETTINGS": {"cache_dir": "cache/dspy"},
+        }
+        (self.workdir / "config.yaml").write_text(yaml.safe_dump(config), encoding="utf-8")
+        os.chdir(self.workdir)
+
+    def stop(self) -> None:
+        self.github.stop()
+        self.llm.stop()
+
+    def config(self):
+        from config import Config
+        config = Config.from_yaml(str(self.workdir / "config.yaml"))
+        config.validate()
+        return config
+
+    def repo_url(self, iteration: int) -> str:
+        return f"https://github.com/{self.repos[iteration % len(self.repos)].full_name}"
+
+    async def measure(self, name: str, run: Callable[[int], Awaitable[Optional[Dict]]]) -> ScenarioResult:
+        """Time `run` for every iteration and attribute server requests to the scenario"""
+        result = ScenarioResult(name)
+        github_before, llm_before = self.github.snapshot(), self.llm.snapshot()
+        for iteration in range(self.args.iterations):
+            start = time.perf_counter()
+            record: Dict[str, Any] = {"iteration": iteration}
+            try:
+                record.update(await run(iteration) or {})
+                record["ok"] = True
+            except (Exception, SystemExit) as e:
+                record["ok"] = False
+                record["error"] = f"{type(e).__name__}: {e}"
+            record["seconds"] = time.perf_counter() - start
+            result.iterations.append(record)
+            status = "ok" if record["ok"] else f"failed ({record['error']})"
+            print(f"  {name} #{iteration}: {record['seconds']:.3f}s {status}", flush=True)
+        result.github_requests = counter_delta(self.github.snapshot(), github_before)
+        result.llm_requests = counter_delta(self.llm.snapshot(), llm_before)
+        return result
+
+    async def startup(self) -> ScenarioResult:
+        target = self.args.startup_target
+
+        async def run(iteration: int) -> Dict:
+            entry_points = {module: await asyncio.to_thread(measure_startup, module) for module in STARTUP_MODULES}
+            slow = [
+                f"{module} took {result['seconds']:.3f}s"
+                for module, result in entry_points.items() if result["seconds"] > target
+            ]
+            if slow:
+                raise RuntimeError(f"{', '.join(slow)} to start, the target is {target}s")
+            return {"entry_points": entry_points}
+
+        return await self.measure("startup", run)
+
+    async def download(self) -> ScenarioResult:
+        from github_service import GitHubService
+        service = GitHubService(self.config())
+
+        async def run(iteration: int) -> Dict:
+            repo = self.repos[iteration % len(self.repos)]
+            await service.download_repository_async(self.repo_url(iteration))
+            return {
+                "repository": repo.full_name,
+                "files": len(repo.files),
+                "bytes": sum(len(content) for content in repo.files.values()),
+            }
+
+        try:
+            return await self.measure("download", run)
+        finally:
+            await service.aclose()
+
+    async def analysis(self) -> ScenarioResult:
+        from auto_builder import AutoBuilder
+        builder = AutoBuilder(self.config())
+
+        async def run(iteration: int) -> Dict:
+            analysed = 0
+            for repo in self.repos:
+                # Vary a build command so every iteration misses the analysis cache
+                readme = repo.files["README.md"].decode("utf-8").replace("make build", f"make build RUN={iteration}")
+                if await builder.analyze_build_steps(readme, repo.full_name):
+                    analysed += 1
+            return {"repositories": len(self.repos), "analysed": analysed}
+
+        try:
+            return await self.measure("analysis", run)
+        finally:
+            await builder.aclose()
+
+    async def run_project(self) -> ScenarioResult:
+        import main
+
+        async def run(iteration: int) -> Dict:
+            await main.run_project(self.repo_url(iteration))
+            return {"repository": self.repo_url(iteration)}
+
+        return await self.measure("run_project", run)
+
+    async def scanner(self) -> ScenarioResult:
+        from scanner_service import ScannerService
+
+        async def run(iteration: int) -> Dict:
+            scanner = ScannerService(self.config())
+            stages = await scanner.scan_and_audit("benchmark")
+            return {"stages": {name: stats.processed for name, stats in stages.items()}}
+
+        return await self.measure("scanner", run)
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(previous: Dict, current: Dict) -> List[str]:
+    """Median time of each scenario against an earlier result file"""
+    before = {scenario["name"]: scenario["seconds"].get("median") for scenario in previous["scenarios"]}
+    lines = []
+    for scenario in current["scenarios"]:
+        old, new = before.get(scenario["name"]), scenario["seconds"].get("median")
+        if old is None or new is None:
+            lines.append(f"{scenario['name']}: no comparable result")
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        lines.append(f"{scenario['name']}: median {old:.3f}s -> {new:.3f}s ({change:+.1f}%)")
+    return lines
+
+async def run_benchmarks(args: argparse.Namespace, workdir: Path) -> Dict:
+    benchmark = Benchmark(args, workdir)
+    benchmark.start()
+    try:
+        scenarios = []
+        for name in args.scenario:
+            print(f"Running {name}", flush=True)
+            scenarios.append(await getattr(benchmark, name)())
+    finally:
+        benchmark.stop()
+    return {
+        "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "scenarios": [scenario.to_json() for scenario in scenarios],
+    }
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the analyzer against fake GitHub and LLM servers")
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS),
+                        help="Scenarios to run (default: all)")
+    parser.add_argument("--iterations", type=int, default=3, help="Runs per scenario")
+    parser.add_argument("--repos", type=int, default=4, help="Synthetic repositories to serve")
+    parser.add_argument("--files", type=int, default=200, help="Files per repository")
+    parser.add_argument("--depth", type=int, default=3, help="Maximum directory depth")
+    parser.add_argument("--file-size", type=int, default=2048, help="Bytes per file")
+    parser.add_argument("--readme-paragraphs", type=int, default=20, help="Length of the generated READMEs")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generated repositories")
+    parser.add_argument("--github-latency", type=float, default=0.005, help="Seconds added to every GitHub request")
+    parser.add_argument("--github-rps", type=float, default=DEFAULT_GITHUB_MAX_REQUESTS_PER_SECOND,
+                        help="GITHUB_MAX_REQUESTS_PER_SECOND for the run")
+    parser.add_argument("--rate-limit", type=int, default=0,
+                        help="GitHub API requests per token and window (0 for no limit)")
+    parser.add_argument("--rate-window", type=float, default=60.0, help="Seconds until a rate limit window resets")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Seconds per generated LLM token")
+    parser.add_argument("--first-token-latency", type=float, default=0.05, help="Seconds before the first LLM token")
+    parser.add_argument("--llm-backend", choices=("ollama", "openai"), default="ollama",
+                        help="Backend that answers; with openai the fake Ollama fails every request")
+    parser.add_argument("--llm-policy", choices=[policy.value for policy in LLMBackendPolicy],
+                        default=LLMBackendPolicy.SEQUENTIAL.value, help="LLM_BACKEND_POLICY for the run")
+    parser.add_argument("--download-mode", choices=[mode.value for mode in DownloadMode],
+                        default=DownloadMode.CONCURRENT.value, help="DOWNLOAD_MODE for the run")
+    parser.add_argument("--venv-pool", action="store_true", help="Build in pooled virtualenvs")
+    parser.add_argument("--startup-target", type=float, default=DEFAULT_STARTUP_TARGET,
+                        help="Seconds main.py and scanner_main.py may take to start; slower runs fail")
+    parser.add_argument("--output", type=Path, help="Result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier result file to compare median timings with")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch working directory")
+    parser.add_argument("--verbose", action="store_true", help="Show the analyzer's log output")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if not args.verbose:
+        logging.disable(logging.ERROR)
+    output = (args.output or RESULTS_DIRECTORY / f"{datetime.now():%Y%m%d-%H%M%S}.json").resolve()
+    previous = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+
+    cwd = os.getcwd()
+    workdir = Path(tempfile.mkdtemp(prefix="github-analyzer-bench-"))
+    try:
+        results = asyncio.run(run_benchmarks(args, workdir))
+    finally:
+        os.chdir(cwd)
+        if args.keep:
+            print(f"Working directory kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    for scenario in results["scenarios"]:
+        seconds = scenario["seconds"]
+        timing = f"median {seconds['median']:.3f}s, min {seconds['min']:.3f}s" if seconds else "no successful runs"
+        print(f"{scenario['name']}: {timing}, {scenario['failures']} failed")
+    if previous:
+        for line in compare(previous, results):
+            print(line)
+    print(f"Results written to {output}")
+    if any(scenario["failures"] for scenario in results["scenarios"]):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+class FakeServer:
+    """
+    HTTP server on a free localhost port, served from a background thread.
+
+    Subclasses implement handle(). Every request is delayed by `latency`
+    seconds before it is handled and counted under the kind returned by
+    handle(), so scenarios can report how many requests of each kind they
+    caused. Connections are kept alive like those of the real services.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests: Counter = Counter()
+        self.base_url = ""
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> str:
+        """Start serving and return the base URL"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._dispatch(self, "GET")
+
+            def do_POST(self):
+                server._dispatch(self, "POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, name=type(self).__name__, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_port}"
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def snapshot(self) -> Dict[str, int]:
+        """Request counts so far, by kind"""
+        with self._lock:
+            return dict(self.requests)
+
+    def handle(self, handler: BaseHTTPRequestHandler, method: str, path: str,
+               query: Dict[str, List[str]], body: bytes) -> str:
+        """Answer one request and return its kind for the request counts"""
+        raise NotImplementedError
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        url = urlsplit(handler.path)
+        body = handler.rfile.read(int(handler.headers.get("Content-Length") or 0))
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            kind = self.handle(handler, method, url.path, parse_qs(url.query), body)
+        except (BrokenPipeError, ConnectionResetError):
+            kind = "disconnected"
+        with self._lock:
+            self.requests[kind] += 1
+
+    @staticmethod
+    def send(handler: BaseHTTPRequestHandler, status: int, body: bytes, content_type: str,
+             headers: Optional[Dict[str, Any]] = None) -> None:
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, str(value))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    @classmethod
+    def send_json(cls, handler: BaseHTTPRequestHandler, status: int, data: Any,
+                  headers: Optional[Dict[str, Any]] = None) -> None:
+        cls.send(handler, status, json.dumps(data).encode("utf-8"), "application/json", headers)
+
+    @staticmethod
+    def send_chunks(handler: BaseHTTPRequestHandler, chunks: Iterable[bytes], content_type: str,
+                    delay: float = 0.0) -> None:
+        """Stream a response with chunked transfer encoding, pausing `delay` seconds between chunks"""
+        handler.send_response(200)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        for chunk in chunks:
+            handler.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            handler.wfile.flush()
+            if delay:
+                time.sleep(delay)
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import shutil
+import stat
+import uuid
+from pathlib import Path
+from typing import Optional
+from logger import setup_logger
+from config import Config
+
+class BlobStore:
+    """
+    Content-addressed store of file contents keyed by git blob SHA.
+
+    Blobs live under <root>/<sha[:2]>/<sha[2:]> and are read-only. Working
+    directories that are built get private copies (reflinks where the file
+    system supports them), since a build writing to a hardlinked file would
+    change the blob for every other repository. Only working directories that
+    are never built or modified, such as the scanner's working copies and
+    comparison targets, are hardlinked.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
+        self.root = Path(config.BLOB_STORE_DIRECTORY or Path(config.BASE_DIRECTORY) / ".blobs")
+        self.tmp_dir = self.root / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def blob_sha(file_path: Path) -> str:
+        """Compute the git blob SHA of a file"""
+        digest = hashlib.sha1(f"blob {file_path.stat().st_size}\0".encode())
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def path_for(self, sha: str) -> Path:
+        return self.root / sha[:2] / sha[2:]
+
+    def has(self, sha: str) -> bool:
+        return self.path_for(sha).exists()
+
+    def temp_path(self) -> Path:
+        """Return a fresh path to download a blob into before adding it"""
+        return self.tmp_dir / uuid.uuid4().hex
+
+    def add(self, sha: str, tmp_path: Path) -> None:
+        """
+        Move a downloaded file into the store after verifying its SHA.
+
+        Raises:
+            ValueError: If the file content does not match sha
+        """
+        actual = self.blob_sha(tmp_path)
+        if actual != sha:
+            tmp_path.unlink(missing_ok=True)
+            raise ValueError(f"Blob SHA mismatch: expected {sha}, got {actual}")
+
+        blob_path = self.path_for(sha)
+        blob_path.parent.mkdir(exist_ok=True)
+        os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        size = tmp_path.stat().st_size
+        try:
+            os.link(tmp_path, blob_path)
+            created = True
+        except FileExistsError:
+            # A concurrent writer stored the same blob first and already counted it
+            created = False
+        except OSError:
+            # No hardlinks on this file system
+            created = not blob_path.exists()
+            os.replace(tmp_path, blob_path)
+        tmp_path.unlink(missing_ok=True)
+        if created and self._size is not None:
+            self._size += size
+
+    def copy(self, sha: str, dest: Path) -> None:
+        """
+        Populate dest with a private, writable copy of a stored blob.
+
+        copy_file_range lets file systems such as Btrfs and XFS share the
+        blocks until either file is written.
+        """
+        blob_path = self.path_for(sha)
+        dest.unlink(missing_ok=True)
+        with open(blob_path, "rb") as source, open(dest, "wb") as target:
+            try:
+                size = os.fstat(source.fileno()).st_size
+                while size > 0:
+                    copied = os.copy_file_range(source.fileno(), target.fileno(), size)
+                    if not copied:
+                        break
+                    size -= copied
+            except (AttributeError, OSError):
+                source.seek(0)
+                target.seek(0)
+                target.truncate()
+                shutil.copyfileobj(source, target)
+        os.utime(blob_path)
+
+    def link(self, sha: str, dest: Path) -> bool:
+        """
+        Populate dest with the read-only content of a stored blob.
+
+        A hardlink is used where the filesystem allows it, otherwise the blob is
+        copied. The blob's mtime is refreshed so garbage collection evicts the
+        least recently used blobs first.
+
+        Returns:
+            bool: True if a hardlink was created, False if the blob was copied
+        """
+        blob_path = self.path_for(sha)
+        dest.unlink(missing_ok=True)
+        try:
+            os.link(blob_path, dest)
+            linked = True
+        except OSError:
+            shutil.copyfile(blob_path, dest)
+            linked = False
+        os.utime(blob_path)
+        return linked
+
+    def size(self) -> int:
+        """Total size of the stored blobs in bytes"""
+        if self._size is None:
+            self._size = sum(blob.stat().st_size for blob in self._blobs())
+        return self._size
+
+    def gc(self, max_bytes: int) -> int:
+        """
+        Evict least recently used blobs until the store fits in max_bytes.
+
+        Blobs still hardlinked from a working directory are kept: deleting them
+        would not free any disk space.
+
+        Returns:
+            int: Number of bytes freed
+        """
+        if self.size() <= max_bytes:
+            return 0
+
+        candidates = []
+        for blob in self._blobs():
+            info = blob.stat()
+            if info.st_nlink == 1:
+                candidates.append((info.st_mtime, info.st_size, blob))
+        candidates.sort()
+
+        freed = 0
+        for _, size, blob in candidates:
+            if self._size - freed <= max_bytes:
+                break
+            blob.unlink(missing_ok=True)
+            freed += size
+
+        self._size -= freed
+        self.logger.info("Blob store GC freed %s bytes, %s bytes remain", freed, self._size)
+        return freed
+
+    def _blobs(self):
+        for shard in self.root.iterdir():
+            if shard.is_dir() and shard != self.tmp_dir:
+                yield from shard.iterdir()
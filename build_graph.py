@@ -0,0 +1,74 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+from constants import BuildStepType
+from exceptions import BuildError
+
+@dataclass
+class BuildStep:
+    """One command of a build plan and the steps it has to wait for"""
+    id: str
+    type: BuildStepType
+    command: str
+    description: str = ""
+    depends_on: List[str] = field(default_factory=list)
+
+def plan_build_steps(build_instructions: Dict) -> List[BuildStep]:
+    """
+    Turn build instructions into a dependency graph of steps in topological order.
+
+    Steps may carry an `id` and a `depends_on` list of step ids. A step without
+    `depends_on` waits for the step listed before it (setup, then build, then
+    test steps), which keeps plain instruction lists sequential. An explicit
+    empty `depends_on` lets a step start right away.
+
+    Args:
+        build_instructions: Dictionary containing setup_steps, build_steps and test_steps
+
+    Returns:
+        List[BuildStep]: Steps ordered so that every step follows its dependencies
+
+    Raises:
+        BuildError: If a step depends on an unknown step or the dependencies form a cycle
+    """
+    steps: List[BuildStep] = []
+    for step_type in (BuildStepType.SETUP, BuildStepType.BUILD, BuildStepType.TEST):
+        for index, raw in enumerate(build_instructions.get(f"{step_type.value}_steps") or []):
+            if isinstance(raw, str):
+                raw = {"command": raw}
+            step_id = str(raw.get("id") or f"{step_type.value}-{index + 1}")
+            if "depends_on" in raw:
+                depends_on = raw["depends_on"] or []
+                depends_on = [str(dep) for dep in ([depends_on] if isinstance(depends_on, str) else depends_on)]
+            else:
+                depends_on = [steps[-1].id] if steps else []
+            steps.append(BuildStep(step_id, step_type, raw["command"], raw.get("description", ""), depends_on))
+
+    by_id = {}
+    for step in steps:
+        if step.id in by_id:
+            raise BuildError(f"Duplicate build step id: {step.id}")
+        by_id[step.id] = step
+    for step in steps:
+        unknown = [dep for dep in step.depends_on if dep not in by_id]
+        if unknown:
+            raise BuildError(f"Build step {step.id} depends on unknown steps: {', '.join(unknown)}")
+
+    # Kahn's algorithm, keeping the listed order among steps that are ready together
+    waiting = {step.id: len(set(step.depends_on)) for step in steps}
+    dependents: Dict[str, List[str]] = {step.id: [] for step in steps}
+    for step in steps:
+        for dep in set(step.depends_on):
+            dependents[dep].append(step.id)
+    ready = [step.id for step in steps if waiting[step.id] == 0]
+    ordered = []
+    while ready:
+        step_id = ready.pop(0)
+        ordered.append(by_id[step_id])
+        for dependent in dependents[step_id]:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                ready.append(dependent)
+    if len(ordered) != len(steps):
+        cyclic = sorted(step_id for step_id, count in waiting.items() if count)
+        raise BuildError(f"Build steps have circular dependencies: {', '.join(cyclic)}")
+    return ordered
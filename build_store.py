@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from config import Config
+
+STORE_FILENAME = "builds.sqlite3"
+
+@dataclass
+class StepRecord:
+    """Outcome of one build command"""
+    id: str
+    returncode: Optional[int]
+    duration: float
+    peak_rss: Optional[int] = None
+    timed_out: bool = False
+
+@dataclass
+class BuildRecord:
+    """Outcome of building one commit with one set of build instructions"""
+    full_name: str
+    commit_sha: str
+    instructions_hash: str
+    success: bool
+    duration: float
+    steps: List[StepRecord] = field(default_factory=list)
+    output_tail: str = ""
+    error: str = ""
+    created: float = field(default_factory=time.time)
+
+    def summary(self) -> str:
+        status = "succeeded" if self.success else "failed"
+        built_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created))
+        return f"{self.full_name}@{self.commit_sha[:7]} {status} in {self.duration:.1f}s on {built_at}"
+
+class BuildResultStore:
+    """
+    Persistent record of build outcomes backed by SQLite.
+
+    Builds are keyed by repository, commit SHA and a hash of the build
+    instructions, so a repeated build of an unchanged commit with the same
+    instructions can be skipped. The store lives in BUILD_CACHE_DIRECTORY and
+    can be shared between processes.
+    """
+
+    def __init__(self, config: Config):
+        self.store_path = Path(config.BUILD_CACHE_DIRECTORY)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    @staticmethod
+    def instructions_hash(build_instructions: Dict) -> str:
+        """Stable hash of a build instructions dict"""
+        payload = json.dumps(build_instructions, sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not be shared with forked children
+        if self._conn is None or self._pid != os.getpid():
+            self.store_path.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.store_path / STORE_FILENAME, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS builds ("
+                "full_name TEXT NOT NULL, commit_sha TEXT NOT NULL, instructions_hash TEXT NOT NULL, "
+                "success INTEGER NOT NULL, duration REAL NOT NULL, steps TEXT NOT NULL, "
+                "output_tail TEXT NOT NULL, error TEXT NOT NULL, created REAL NOT NULL, "
+                "PRIMARY KEY (full_name, commit_sha, instructions_hash))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS builds_latest ON builds (full_name, created)")
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _record(self, row) -> BuildRecord:
+        full_name, commit_sha, instructions_hash, success, duration, steps, output_tail, error, created = row
+        return BuildRecord(
+            full_name, commit_sha, instructions_hash, bool(success), duration,
+            [StepRecord(**step) for step in json.loads(steps)], output_tail, error, created,
+        )
+
+    def get(self, full_name: str, commit_sha: str, instructions_hash: str) -> Optional[BuildRecord]:
+        """Look up the build of a commit with the given instructions"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT * FROM builds WHERE full_name = ? AND commit_sha = ? AND instructions_hash = ?",
+                (full_name, commit_sha, instructions_hash),
+            ).fetchone()
+        return self._record(row) if row else None
+
+    def last_status(self, full_name: str) -> Optional[BuildRecord]:
+        """Most recent build of a repository, whatever its commit or instructions"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT * FROM builds WHERE full_name = ? ORDER BY created DESC LIMIT 1", (full_name,)
+            ).fetchone()
+        return self._record(row) if row else None
+
+    def record(self, build: BuildRecord) -> None:
+        """Store a build outcome, replacing an earlier build of the same key"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO builds VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    build.full_name, build.commit_sha, build.instructions_hash, int(build.success),
+                    build.duration, json.dumps([asdict(step) for step in build.steps]),
+                    build.output_tail, build.error, build.created,
+                ),
+            )
+            conn.commit()
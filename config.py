@@ -1,11 +1,30 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List
 import os
 import yaml
 from pathlib import Path
 from constants import (
     DEFAULT_BASE_DIR, DEFAULT_LOG_DIR, DEFAULT_MODEL,
-    DEFAULT_TIMEOUT, DEFAULT_MAX_RETRIES, DEFAULT_OLLAMA_URL, DEFAULT_OLLAMA_MODEL
+    DEFAULT_TIMEOUT, DEFAULT_MAX_RETRIES, DEFAULT_OLLAMA_URL, DEFAULT_OLLAMA_MODEL,
+    DEFAULT_OLLAMA_KEEP_ALIVE, DEFAULT_OLLAMA_NUM_CTX, DEFAULT_OLLAMA_MAX_PARALLEL,
+    DEFAULT_LLM_BACKEND_POLICY, DEFAULT_LLM_HEDGE_DELAY,
+    DEFAULT_DSPY_TIMEOUT, DEFAULT_DSPY_MAX_WORKERS, DEFAULT_OLLAMA_TIMEOUT, DEFAULT_OPENAI_TIMEOUT,
+    DEFAULT_README_TOKEN_BUDGET, DEFAULT_README_MAX_CHUNKS,
+    DEFAULT_MANIFEST_ANALYSIS_ENABLED, DEFAULT_MANIFEST_CONFIDENCE_THRESHOLD,
+    DEFAULT_BUILD_MAX_PARALLEL, DEFAULT_BUILD_FAIL_FAST, DEFAULT_BUILD_STEP_TIMEOUT, DEFAULT_BUILD_TOTAL_TIMEOUT,
+    DEFAULT_BUILD_OUTPUT_TAIL_LINES, DEFAULT_BUILD_CACHE_ENABLED, DEFAULT_BUILD_CACHE_DIR,
+    DEFAULT_VENV_POOL_ENABLED, DEFAULT_VENV_POOL_SIZE, DEFAULT_VENV_POOL_DIR, DEFAULT_WHEELHOUSE_DIR,
+    DEFAULT_GITHUB_API_URL, DEFAULT_GITHUB_RAW_URL, DEFAULT_DOWNLOAD_MODE, DEFAULT_DOWNLOAD_CONCURRENCY,
+    DEFAULT_BLOB_STORE_ENABLED, DEFAULT_BLOB_STORE_MAX_BYTES, DEFAULT_COMPARE_MAX_WORKERS,
+    DEFAULT_LOG_FORMAT, DEFAULT_LOG_MAX_BYTES, DEFAULT_LOG_BACKUP_COUNT,
+    DEFAULT_METRICS_ENABLED, DEFAULT_METRICS_REPORT_FILE, DEFAULT_METRICS_HOST, DEFAULT_METRICS_PORT,
+    DEFAULT_HTTP_CACHE_DIR, DEFAULT_HTTP_CACHE_ENABLED, DEFAULT_HTTP_CACHE_MAX_ENTRIES, DEFAULT_HTTP_CACHE_MAX_BYTES,
+    DEFAULT_GITHUB_MAX_REQUESTS_PER_SECOND, DEFAULT_GITHUB_REQUEST_BURST, DEFAULT_GITHUB_QUOTA_RESERVE_RATIO,
+    DEFAULT_GITHUB_TOKEN_VALIDATION_TTL, DEFAULT_TOKEN_CACHE_DIR,
+    DEFAULT_SCANNER_SEARCH_LIMIT, DEFAULT_SCANNER_QUEUE_SIZE, DEFAULT_SCANNER_METADATA_CONCURRENCY,
+    DEFAULT_SCANNER_DOWNLOAD_CONCURRENCY, DEFAULT_SCANNER_ANALYSIS_CONCURRENCY,
+    DEFAULT_SCANNER_QUEUE_DIR, DEFAULT_SCANNER_LEASE_SECONDS, DEFAULT_SCANNER_WORKERS, DownloadMode, LLMBackendPolicy,
+    LogFormat
 )
 
 @dataclass
@@ -15,10 +34,70 @@ class Config:
     BASE_DIRECTORY: Path
     LOG_DIRECTORY: Path
     MODEL_NAME: str = DEFAULT_MODEL
+    LOG_FORMAT: str = DEFAULT_LOG_FORMAT
+    LOG_MAX_BYTES: int = DEFAULT_LOG_MAX_BYTES
+    LOG_BACKUP_COUNT: int = DEFAULT_LOG_BACKUP_COUNT
     OLLAMA_BASE_URL: str = DEFAULT_OLLAMA_URL
     OLLAMA_MODEL: str = DEFAULT_OLLAMA_MODEL
+    OLLAMA_KEEP_ALIVE: str = DEFAULT_OLLAMA_KEEP_ALIVE
+    OLLAMA_NUM_CTX: int = DEFAULT_OLLAMA_NUM_CTX
+    OLLAMA_MAX_PARALLEL: int = DEFAULT_OLLAMA_MAX_PARALLEL
+    LLM_BACKEND_POLICY: str = DEFAULT_LLM_BACKEND_POLICY
+    LLM_HEDGE_DELAY: float = DEFAULT_LLM_HEDGE_DELAY
+    DSPY_TIMEOUT: float = DEFAULT_DSPY_TIMEOUT
+    DSPY_MAX_WORKERS: int = DEFAULT_DSPY_MAX_WORKERS
+    OLLAMA_TIMEOUT: float = DEFAULT_OLLAMA_TIMEOUT
+    OPENAI_TIMEOUT: float = DEFAULT_OPENAI_TIMEOUT
+    README_TOKEN_BUDGET: int = DEFAULT_README_TOKEN_BUDGET
+    README_MAX_CHUNKS: int = DEFAULT_README_MAX_CHUNKS
+    MANIFEST_ANALYSIS_ENABLED: bool = DEFAULT_MANIFEST_ANALYSIS_ENABLED
+    MANIFEST_CONFIDENCE_THRESHOLD: float = DEFAULT_MANIFEST_CONFIDENCE_THRESHOLD
+    BUILD_MAX_PARALLEL: int = DEFAULT_BUILD_MAX_PARALLEL
+    BUILD_FAIL_FAST: bool = DEFAULT_BUILD_FAIL_FAST
+    BUILD_STEP_TIMEOUT: float = DEFAULT_BUILD_STEP_TIMEOUT
+    BUILD_TOTAL_TIMEOUT: float = DEFAULT_BUILD_TOTAL_TIMEOUT
+    BUILD_OUTPUT_TAIL_LINES: int = DEFAULT_BUILD_OUTPUT_TAIL_LINES
+    BUILD_LOG_DIRECTORY: Optional[Path] = None
+    BUILD_CACHE_ENABLED: bool = DEFAULT_BUILD_CACHE_ENABLED
+    BUILD_CACHE_DIRECTORY: Path = DEFAULT_BUILD_CACHE_DIR
+    VENV_POOL_ENABLED: bool = DEFAULT_VENV_POOL_ENABLED
+    VENV_POOL_SIZE: int = DEFAULT_VENV_POOL_SIZE
+    VENV_POOL_DIRECTORY: Path = DEFAULT_VENV_POOL_DIR
+    WHEELHOUSE_DIRECTORY: Path = DEFAULT_WHEELHOUSE_DIR
     MAX_RETRIES: int = DEFAULT_MAX_RETRIES
     TIMEOUT: int = DEFAULT_TIMEOUT
+    GITHUB_API_URL: str = DEFAULT_GITHUB_API_URL
+    GITHUB_RAW_URL: str = DEFAULT_GITHUB_RAW_URL
+    GITHUB_TOKENS: List[str] = field(default_factory=list)
+    GITHUB_MAX_REQUESTS_PER_SECOND: float = DEFAULT_GITHUB_MAX_REQUESTS_PER_SECOND
+    GITHUB_REQUEST_BURST: int = DEFAULT_GITHUB_REQUEST_BURST
+    GITHUB_QUOTA_RESERVE_RATIO: float = DEFAULT_GITHUB_QUOTA_RESERVE_RATIO
+    GITHUB_TOKEN_VALIDATION_TTL: float = DEFAULT_GITHUB_TOKEN_VALIDATION_TTL
+    TOKEN_CACHE_DIRECTORY: Path = DEFAULT_TOKEN_CACHE_DIR
+    HTTP_CACHE_ENABLED: bool = DEFAULT_HTTP_CACHE_ENABLED
+    HTTP_CACHE_DIRECTORY: Path = DEFAULT_HTTP_CACHE_DIR
+    HTTP_CACHE_MAX_ENTRIES: int = DEFAULT_HTTP_CACHE_MAX_ENTRIES
+    HTTP_CACHE_MAX_BYTES: int = DEFAULT_HTTP_CACHE_MAX_BYTES
+    DOWNLOAD_MODE: str = DEFAULT_DOWNLOAD_MODE
+    DOWNLOAD_CONCURRENCY: int = DEFAULT_DOWNLOAD_CONCURRENCY
+    BLOB_STORE_ENABLED: bool = DEFAULT_BLOB_STORE_ENABLED
+    BLOB_STORE_DIRECTORY: Optional[Path] = None
+    BLOB_STORE_MAX_BYTES: int = DEFAULT_BLOB_STORE_MAX_BYTES
+    COMPARE_MAX_WORKERS: int = DEFAULT_COMPARE_MAX_WORKERS
+    METRICS_ENABLED: bool = DEFAULT_METRICS_ENABLED
+    METRICS_REPORT_FILE: Optional[Path] = DEFAULT_METRICS_REPORT_FILE
+    METRICS_PROMETHEUS_FILE: Optional[Path] = None
+    METRICS_HOST: str = DEFAULT_METRICS_HOST
+    METRICS_PORT: int = DEFAULT_METRICS_PORT
+    SCANNER_SEARCH_LIMIT: int = DEFAULT_SCANNER_SEARCH_LIMIT
+    SCANNER_QUEUE_SIZE: int = DEFAULT_SCANNER_QUEUE_SIZE
+    SCANNER_METADATA_CONCURRENCY: int = DEFAULT_SCANNER_METADATA_CONCURRENCY
+    SCANNER_DOWNLOAD_CONCURRENCY: int = DEFAULT_SCANNER_DOWNLOAD_CONCURRENCY
+    SCANNER_ANALYSIS_CONCURRENCY: int = DEFAULT_SCANNER_ANALYSIS_CONCURRENCY
+    SCANNER_QUEUE_DIRECTORY: Path = DEFAULT_SCANNER_QUEUE_DIR
+    SCANNER_LEASE_SECONDS: float = DEFAULT_SCANNER_LEASE_SECONDS
+    SCANNER_WORKERS: int = DEFAULT_SCANNER_WORKERS
+    DSPY_SETTINGS: Optional[Dict] = None
     
     @classmethod
     def from_yaml(cls, config_path: str = "config.yaml") -> 'Config':
@@ -46,13 +125,32 @@ class Config:
         
         # Environment variables override file config
         config_data['GITHUB_TOKEN'] = os.getenv('GITHUB_TOKEN', config_data.get('GITHUB_TOKEN'))
+        if os.getenv('GITHUB_TOKENS'):
+            config_data['GITHUB_TOKENS'] = [token.strip() for token in os.environ['GITHUB_TOKENS'].split(',') if token.strip()]
         config_data['OPENAI_API_KEY'] = os.getenv('OPENAI_API_KEY', config_data.get('OPENAI_API_KEY'))
         config_data['OLLAMA_BASE_URL'] = os.getenv('OLLAMA_BASE_URL', config_data.get('OLLAMA_BASE_URL', DEFAULT_OLLAMA_URL))
         config_data['OLLAMA_MODEL'] = os.getenv('OLLAMA_MODEL', config_data.get('OLLAMA_MODEL', DEFAULT_OLLAMA_MODEL))
+        config_data['GITHUB_API_URL'] = os.getenv('GITHUB_API_URL', config_data.get('GITHUB_API_URL', DEFAULT_GITHUB_API_URL))
+        config_data['GITHUB_RAW_URL'] = os.getenv('GITHUB_RAW_URL', config_data.get('GITHUB_RAW_URL', DEFAULT_GITHUB_RAW_URL))
+        config_data['DOWNLOAD_MODE'] = os.getenv('DOWNLOAD_MODE', config_data.get('DOWNLOAD_MODE', DEFAULT_DOWNLOAD_MODE))
+        config_data['LLM_BACKEND_POLICY'] = os.getenv('LLM_BACKEND_POLICY', config_data.get('LLM_BACKEND_POLICY', DEFAULT_LLM_BACKEND_POLICY))
         
         # Convert string paths to Path objects
         config_data['BASE_DIRECTORY'] = Path(config_data.get('BASE_DIRECTORY', DEFAULT_BASE_DIR))
         config_data['LOG_DIRECTORY'] = Path(config_data.get('LOG_DIRECTORY', DEFAULT_LOG_DIR))
+        config_data['HTTP_CACHE_DIRECTORY'] = Path(config_data.get('HTTP_CACHE_DIRECTORY', DEFAULT_HTTP_CACHE_DIR))
+        config_data['TOKEN_CACHE_DIRECTORY'] = Path(config_data.get('TOKEN_CACHE_DIRECTORY', DEFAULT_TOKEN_CACHE_DIR))
+        config_data['BUILD_CACHE_DIRECTORY'] = Path(config_data.get('BUILD_CACHE_DIRECTORY', DEFAULT_BUILD_CACHE_DIR))
+        config_data['VENV_POOL_DIRECTORY'] = Path(config_data.get('VENV_POOL_DIRECTORY', DEFAULT_VENV_POOL_DIR))
+        config_data['WHEELHOUSE_DIRECTORY'] = Path(config_data.get('WHEELHOUSE_DIRECTORY', DEFAULT_WHEELHOUSE_DIR))
+        config_data['SCANNER_QUEUE_DIRECTORY'] = Path(config_data.get('SCANNER_QUEUE_DIRECTORY', DEFAULT_SCANNER_QUEUE_DIR))
+        if config_data.get('BLOB_STORE_DIRECTORY'):
+            config_data['BLOB_STORE_DIRECTORY'] = Path(config_data['BLOB_STORE_DIRECTORY'])
+        if config_data.get('BUILD_LOG_DIRECTORY'):
+            config_data['BUILD_LOG_DIRECTORY'] = Path(config_data['BUILD_LOG_DIRECTORY'])
+        for key in ('METRICS_REPORT_FILE', 'METRICS_PROMETHEUS_FILE'):
+            if config_data.get(key):
+                config_data[key] = Path(config_data[key])
         
         return cls(**config_data)
     
@@ -66,6 +164,23 @@ class Config:
         """
         if not self.GITHUB_TOKEN:
             raise ValueError("GITHUB_TOKEN is required")
+        try:
+            DownloadMode(self.DOWNLOAD_MODE)
+        except ValueError:
+            modes = ", ".join(mode.value for mode in DownloadMode)
+            raise ValueError(f"DOWNLOAD_MODE must be one of: {modes}")
+        try:
+            LogFormat(self.LOG_FORMAT)
+        except ValueError:
+            formats = ", ".join(log_format.value for log_format in LogFormat)
+            raise ValueError(f"LOG_FORMAT must be one of: {formats}")
+        try:
+            LLMBackendPolicy(self.LLM_BACKEND_POLICY)
+        except ValueError:
+            policies = ", ".join(policy.value for policy in LLMBackendPolicy)
+            raise ValueError(f"LLM_BACKEND_POLICY must be one of: {policies}")
+        if self.SCANNER_LEASE_SECONDS <= 0:
+            raise ValueError("SCANNER_LEASE_SECONDS must be positive")
         if not self.OPENAI_API_KEY:
             self.logger.warning("OPENAI_API_KEY is not set; OpenAI fallback will be unavailable")
             
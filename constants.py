@@ -6,15 +6,116 @@ class BuildStepType(Enum):
     BUILD = "build"
     TEST = "test"
 
+class DownloadMode(Enum):
+    CONTENTS = "contents"
+    ARCHIVE = "archive"
+    CONCURRENT = "concurrent"
+    INCREMENTAL = "incremental"
+
+class LogFormat(Enum):
+    TEXT = "text"
+    JSON = "json"
+
+class LLMBackendPolicy(Enum):
+    SEQUENTIAL = "sequential"
+    HEDGED = "hedged"
+    RACE = "race"
+
 # File system constants
 DEFAULT_BASE_DIR = Path("github-repos")
 DEFAULT_LOG_DIR = Path("logs")
+DEFAULT_LOG_FORMAT = LogFormat.TEXT.value
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 ** 2
+DEFAULT_LOG_BACKUP_COUNT = 5
 
 # API constants
+DEFAULT_GITHUB_API_URL = "https://api.github.com"
+DEFAULT_GITHUB_RAW_URL = "https://raw.githubusercontent.com"
+DEFAULT_DOWNLOAD_MODE = DownloadMode.CONTENTS.value
 DEFAULT_MODEL = "gpt-4.0-mini"
 DEFAULT_OLLAMA_URL = "http://localhost:11434/api"
 DEFAULT_OLLAMA_MODEL = "llama3"
+DEFAULT_OLLAMA_KEEP_ALIVE = "30m"
+DEFAULT_OLLAMA_NUM_CTX = 8192
+DEFAULT_OLLAMA_MAX_PARALLEL = 1
+
+# LLM backend selection
+DEFAULT_LLM_BACKEND_POLICY = LLMBackendPolicy.SEQUENTIAL.value
+DEFAULT_LLM_HEDGE_DELAY = 10.0
+DEFAULT_DSPY_TIMEOUT = 60.0
+DEFAULT_DSPY_MAX_WORKERS = 2
+DEFAULT_OLLAMA_TIMEOUT = 120.0
+DEFAULT_OPENAI_TIMEOUT = 60.0
+
+# README preprocessing
+DEFAULT_README_TOKEN_BUDGET = 2000
+DEFAULT_README_MAX_CHUNKS = 4
+
+# Manifest-based analysis
+DEFAULT_MANIFEST_ANALYSIS_ENABLED = True
+DEFAULT_MANIFEST_CONFIDENCE_THRESHOLD = 0.75
+
+# Build execution
+DEFAULT_BUILD_MAX_PARALLEL = 4
+DEFAULT_BUILD_FAIL_FAST = True
+DEFAULT_BUILD_STEP_TIMEOUT = 30 * 60
+DEFAULT_BUILD_TOTAL_TIMEOUT = 60 * 60
+DEFAULT_BUILD_OUTPUT_TAIL_LINES = 200
+
+# Build result store
+DEFAULT_BUILD_CACHE_ENABLED = True
+DEFAULT_BUILD_CACHE_DIR = Path("cache/builds")
+
+# Build virtualenvs
+DEFAULT_VENV_POOL_ENABLED = True
+DEFAULT_VENV_POOL_SIZE = 2
+DEFAULT_VENV_POOL_DIR = Path("cache/venvs")
+DEFAULT_WHEELHOUSE_DIR = Path("cache/wheels")
 
 # Timeouts and retries
 DEFAULT_TIMEOUT = 30
-DEFAULT_MAX_RETRIES = 3 
\ No newline at end of file
+DEFAULT_MAX_RETRIES = 3
+
+# GitHub request scheduling
+DEFAULT_GITHUB_MAX_REQUESTS_PER_SECOND = 10.0
+DEFAULT_GITHUB_REQUEST_BURST = 20
+DEFAULT_GITHUB_QUOTA_RESERVE_RATIO = 0.02
+DEFAULT_GITHUB_TOKEN_VALIDATION_TTL = 900
+DEFAULT_TOKEN_CACHE_DIR = Path("cache/tokens")
+
+# Conditional request cache
+DEFAULT_HTTP_CACHE_DIR = Path("cache/http")
+DEFAULT_HTTP_CACHE_ENABLED = True
+DEFAULT_HTTP_CACHE_MAX_ENTRIES = 100000
+DEFAULT_HTTP_CACHE_MAX_BYTES = 512 * 1024 ** 2
+
+# Download concurrency
+DEFAULT_DOWNLOAD_CONCURRENCY = 16
+
+# Content-addressed blob store
+DEFAULT_BLOB_STORE_ENABLED = True
+DEFAULT_BLOB_STORE_MAX_BYTES = 2 * 1024 ** 3
+
+# Repository comparison
+DEFAULT_COMPARE_MAX_WORKERS = 8
+
+# Metrics
+DEFAULT_METRICS_ENABLED = False
+DEFAULT_METRICS_REPORT_FILE = Path("logs/metrics.json")
+DEFAULT_METRICS_HOST = "127.0.0.1"
+DEFAULT_METRICS_PORT = 0
+
+# Scanner pipeline
+DEFAULT_SCANNER_SEARCH_LIMIT = 10
+DEFAULT_SCANNER_QUEUE_SIZE = 16
+DEFAULT_SCANNER_METADATA_CONCURRENCY = 4
+DEFAULT_SCANNER_DOWNLOAD_CONCURRENCY = 2
+DEFAULT_SCANNER_ANALYSIS_CONCURRENCY = 2
+DEFAULT_SCANNER_QUEUE_DIR = Path("cache/scanner")
+DEFAULT_SCANNER_LEASE_SECONDS = 300
+DEFAULT_SCANNER_WORKERS = 1
+
+# Result cache
+DEFAULT_CACHE_TTL = 7 * 24 * 3600
+DEFAULT_CACHE_MAX_ENTRIES = 10000
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 ** 2
@@ -2,7 +2,10 @@ import asyncio
 import functools
 import time
 import inspect
-from typing import Any, Callable
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from constants import DEFAULT_CACHE_TTL, DEFAULT_CACHE_MAX_ENTRIES, DEFAULT_CACHE_MAX_BYTES
+from result_cache import ResultCache
+from metrics import metrics
 
 def retry_on_failure(max_attempts: int = 3, delay: float = 1.0):
     def decorator(func: Callable) -> Callable:
@@ -15,6 +18,7 @@ def retry_on_failure(max_attempts: int = 3, delay: float = 1.0):
                     except Exception as e:
                         if attempt == max_attempts - 1:
                             raise e
+                        metrics.increment("retries", operation=func.__qualname__)
                         await asyncio.sleep(delay)
                 return None
             return wrapper
@@ -27,28 +31,153 @@ def retry_on_failure(max_attempts: int = 3, delay: float = 1.0):
                     except Exception as e:
                         if attempt == max_attempts - 1:
                             raise e
+                        metrics.increment("retries", operation=func.__qualname__)
                         time.sleep(delay)
                 return None
             return wrapper
     return decorator
 
-def cache_result(cache_path: Optional[str] = None):
-    cache = {}
+class timed:
+    """
+    Record the duration of a function or a block as a metrics span.
+
+    Works as a decorator on sync and async functions and as a context manager:
+
+        @timed("readme_fetch")
+        def get_readme_content(self, repo): ...
+
+        async with timed("build_step", type="test"):
+            ...
+
+    While metrics are disabled the wrapped function is called directly.
+    """
+
+    def __init__(self, name: str, **labels):
+        self.name = name
+        self.labels = labels
+        self._span = None
+
+    def __call__(self, func: Callable) -> Callable:
+        name, labels = self.name, self.labels
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs) -> Any:
+                if not metrics.enabled:
+                    return await func(*args, **kwargs)
+                async with metrics.span(name, **labels):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs) -> Any:
+                if not metrics.enabled:
+                    return func(*args, **kwargs)
+                with metrics.span(name, **labels):
+                    return func(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        self._span = metrics.span(self.name, **self.labels)
+        return self._span.__enter__()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._span.__exit__(exc_type, exc, tb)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+class SingleFlight:
+    """
+    Coalesces concurrent async calls that share a key into a single execution.
+
+    The first caller starts the work as its own task and later callers await
+    the same task. Cancelling one caller does not cancel the shared work, and
+    an exception is raised to every waiting caller. The key is released once
+    the task finishes, so a failure is never remembered.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, key)
+        task = self._calls.get(flight_key)
+        if task is None:
+            task = loop.create_task(func())
+            self._calls[flight_key] = task
+            task.add_done_callback(lambda done: self._finish(flight_key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, flight_key: Tuple[asyncio.AbstractEventLoop, str], task: asyncio.Task) -> None:
+        if self._calls.get(flight_key) is task:
+            del self._calls[flight_key]
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+def cache_result(cache_path: Optional[str] = None, ttl: Optional[float] = DEFAULT_CACHE_TTL,
+                 max_entries: int = DEFAULT_CACHE_MAX_ENTRIES, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+    """
+    Cache function results in a bounded ResultCache.
+
+    Keys are a hash of the function name and its arguments, leaving out self/cls
+    so that results are shared between instances; calls with arguments that
+    ResultCache.make_key rejects raise TypeError. None results are not cached.
+    Concurrent async calls with the same key share one execution through a
+    SingleFlight. The cache and coalescer are available as the wrapper's
+    `cache` and `single_flight` attributes.
+
+    Args:
+        cache_path: Directory for the on-disk cache, or None for an in-memory cache
+        ttl: Seconds before an entry expires, or None to keep entries until evicted
+        max_entries: Maximum number of entries kept
+        max_bytes: Maximum total size of the pickled values
+    """
     def decorator(func: Callable) -> Callable:
+        cache = ResultCache(cache_path, ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+        parameters = list(inspect.signature(func).parameters)
+        skip_first = bool(parameters) and parameters[0] in ("self", "cls")
+        name = f"{func.__module__}.{func.__qualname__}"
+        single_flight = SingleFlight()
+
+        def make_key(args, kwargs) -> str:
+            return ResultCache.make_key(name, args[1:] if skip_first else args, kwargs)
+
         if inspect.iscoroutinefunction(func):
             @functools.wraps(func)
             async def wrapper(*args, **kwargs) -> Any:
-                key = str(args) + str(kwargs)
-                if key not in cache:
-                    cache[key] = await func(*args, **kwargs)
-                return cache[key]
-            return wrapper
+                key = make_key(args, kwargs)
+
+                async def load() -> Any:
+                    hit, value = await asyncio.to_thread(cache.get, key)
+                    metrics.increment("result_cache_hits" if hit else "result_cache_misses", function=func.__qualname__)
+                    if hit:
+                        return value
+                    value = await func(*args, **kwargs)
+                    if value is not None:
+                        await asyncio.to_thread(cache.set, key, value)
+                    return value
+
+                return await single_flight.do(key, load)
         else:
             @functools.wraps(func)
             def wrapper(*args, **kwargs) -> Any:
-                key = str(args) + str(kwargs)
-                if key not in cache:
-                    cache[key] = func(*args, **kwargs)
-                return cache[key]
-            return wrapper
-    return decorator 
\ No newline at end of file
+                key = make_key(args, kwargs)
+                hit, value = cache.get(key)
+                metrics.increment("result_cache_hits" if hit else "result_cache_misses", function=func.__qualname__)
+                if hit:
+                    return value
+                value = func(*args, **kwargs)
+                if value is not None:
+                    cache.set(key, value)
+                return value
+        wrapper.cache = cache
+        wrapper.single_flight = single_flight
+        return wrapper
+    return decorator
@@ -0,0 +1,220 @@
+import asyncio
+import os
+import stat
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+from urllib.parse import quote
+from config import Config
+from logger import setup_logger
+from metrics import metrics
+from github_api import GitHubApiClient
+from blob_store import BlobStore
+from exceptions import GitHubServiceError
+
+# Git tree mode of executable files
+EXECUTABLE_MODE = "100755"
+
+def set_executable(file_path: Path, executable: bool) -> None:
+    """Give a file execute permission wherever it is readable, or take it away"""
+    mode = stat.S_IMODE(file_path.stat().st_mode)
+    if executable:
+        new_mode = mode | (mode & 0o444) >> 2
+    else:
+        new_mode = mode & ~0o111
+    if new_mode != mode:
+        os.chmod(file_path, new_mode)
+
+def executable_paths(tree: List[dict]) -> Set[str]:
+    """Paths of the executable files in a git tree listing"""
+    return {entry["path"] for entry in tree if entry.get("mode") == EXECUTABLE_MODE}
+
+@dataclass
+class DownloadStats:
+    """Throughput figures for a single repository download"""
+    files: int = 0
+    bytes: int = 0
+    directories: int = 0
+    retries: int = 0
+    reused: int = 0
+    failed: List[str] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+    finished: float = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.files} files, {self.bytes} bytes in {self.elapsed:.2f}s "
+            f"({self.files_per_second:.1f} files/s, {self.bytes_per_second / 1024:.1f} KiB/s, "
+            f"{self.reused} reused from blob store, {self.retries} retries, {len(self.failed)} failed)"
+        )
+
+class ConcurrentDownloader:
+    """
+    Downloads a repository tree through the contents API with bounded concurrency.
+
+    Files found in the blob store are copied into the working directory. With
+    hardlink, they are hardlinked instead, which is only safe for working
+    directories that are never built or modified.
+    """
+
+    def __init__(self, config: Config, api: GitHubApiClient, blob_store: Optional[BlobStore] = None,
+                 hardlink: bool = False):
+        self.config = config
+        self.api = api
+        self.blob_store = blob_store
+        self.hardlink = hardlink
+        self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
+        self.semaphore = asyncio.Semaphore(config.DOWNLOAD_CONCURRENCY)
+
+    async def download(self, full_name: str, ref: str, repo_path: Path) -> DownloadStats:
+        """
+        Download every file of a repository into repo_path.
+
+        Directory listings are fetched in parallel and files are streamed by a
+        bounded pool of workers sharing one keep-alive connection pool. Each file
+        is retried on its own; the download only fails once all other files have
+        been attempted.
+
+        Args:
+            full_name: Repository name in "owner/repo" form
+            ref: Branch, tag or commit to download
+            repo_path: Destination directory
+
+        Returns:
+            DownloadStats: Throughput figures for the download
+
+        Raises:
+            GitHubServiceError: If any listing or file could not be downloaded
+        """
+        stats = DownloadStats()
+        # The contents API does not report file modes, the tree does
+        executables, _ = await asyncio.gather(
+            self._executables(full_name, ref), self._download_directory(full_name, ref, "", repo_path, stats)
+        )
+        self._apply_modes(repo_path, executables)
+        stats.finished = time.perf_counter()
+        self._record_metrics(stats)
+
+        self.logger.info("Downloaded %s: %s", full_name, stats.summary())
+        if stats.failed:
+            raise GitHubServiceError(
+                f"Failed to download {len(stats.failed)} files from {full_name}: {', '.join(stats.failed[:10])}"
+            )
+        return stats
+
+    @staticmethod
+    def _record_metrics(stats: DownloadStats) -> None:
+        metrics.increment("downloaded_files", stats.files)
+        metrics.increment("downloaded_bytes", stats.bytes)
+        metrics.increment("blob_store_reused", stats.reused)
+        metrics.increment("retries", stats.retries, operation="file_download")
+
+    async def _executables(self, full_name: str, ref: str) -> Set[str]:
+        """Paths of the executable files at ref, or none if the tree is unavailable"""
+        try:
+            async with self.semaphore:
+                tree = await self.api.get_json(
+                    f"/repos/{full_name}/git/trees/{quote(ref, safe='')}", params={"recursive": "1"}
+                )
+        except GitHubServiceError as e:
+            self.logger.warning("Could not read file modes of %s, executables lose their mode: %s", full_name, e)
+            return set()
+        return executable_paths(tree.get("tree", []))
+
+    def _apply_modes(self, repo_path: Path, executables: Iterable[str], paths: Optional[Iterable[str]] = None):
+        """
+        Set the execute bits of downloaded files from their tree modes.
+
+        Hardlinked files share their mode with the blob store and keep it.
+        Without paths, only executables are touched: new files start without
+        execute permission.
+        """
+        if self.hardlink and self.blob_store:
+            return
+        executables = set(executables)
+        for path in executables if paths is None else paths:
+            file_path = repo_path / path
+            if file_path.is_file():
+                set_executable(file_path, path in executables)
+
+    async def _download_directory(self, full_name: str, ref: str, path: str, current_path: Path, stats: DownloadStats):
+        """Fetch one directory listing and fan out over its entries"""
+        try:
+            async with self.semaphore:
+                entries = await self.api.get_json(f"/repos/{full_name}/contents/{path}", params={"ref": ref})
+        except GitHubServiceError as e:
+            self.logger.error("Failed to list %s: %s", path or '/', e)
+            stats.failed.append(path or "/")
+            return
+
+        current_path.mkdir(parents=True, exist_ok=True)
+        stats.directories += 1
+        tasks = []
+        for entry in entries:
+            file_path = current_path / entry["name"]
+            if entry["type"] == "dir":
+                tasks.append(self._download_directory(full_name, ref, entry["path"], file_path, stats))
+            elif entry.get("download_url"):
+                tasks.append(self._download_file(entry["path"], entry["download_url"], file_path, stats, entry.get("sha")))
+            else:
+                self.logger.debug("Skipping %s entry: %s", entry['type'], entry['path'])
+        await asyncio.gather(*tasks)
+
+    async def _download_file(self, path: str, url: str, file_path: Path, stats: DownloadStats, sha: Optional[str] = None):
+        """Stream a single file to disk, retrying it independently of the others"""
+        if self.blob_store and sha and self.blob_store.has(sha):
+            self._checkout_blob(sha, file_path)
+            stats.reused += 1
+            self.logger.debug("Linked file from blob store: %s", file_path)
+            return
+
+        import httpx
+        # Blobs with a known SHA are downloaded into the store and linked from there
+        target_path = self.blob_store.temp_path() if self.blob_store and sha else file_path
+        for attempt in range(1, self.config.MAX_RETRIES + 1):
+            try:
+                async with self.semaphore:
+                    size = 0
+                    async with self.api.client.stream("GET", url) as response:
+                        response.raise_for_status()
+                        with open(target_path, "wb") as target:
+                            async for chunk in response.aiter_bytes():
+                                target.write(chunk)
+                                size += len(chunk)
+                if target_path != file_path:
+                    await asyncio.to_thread(self.blob_store.add, sha, target_path)
+                    self._checkout_blob(sha, file_path)
+                stats.files += 1
+                stats.bytes += size
+                self.logger.debug("Downloaded file: %s", file_path)
+                return
+            except (httpx.HTTPError, OSError, ValueError) as e:
+                client_error = isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500
+                if client_error or attempt == self.config.MAX_RETRIES:
+                    self.logger.error("Failed to download %s: %s", path, e)
+                    stats.failed.append(path)
+                    if target_path != file_path:
+                        target_path.unlink(missing_ok=True)
+                    return
+                stats.retries += 1
+                self.logger.debug("Retrying %s (attempt %s): %s", path, attempt, e)
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+
+    def _checkout_blob(self, sha: str, file_path: Path):
+        if self.hardlink:
+            self.blob_store.link(sha, file_path)
+        else:
+            self.blob_store.copy(sha, file_path)
@@ -1,30 +1,65 @@
-import dspy
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, List
-from pathlib import Path
-from decorators import cache_result, retry_on_failure
 from logger import setup_logger
 from config import Config
 
+# dspy.settings may only be changed by the thread that first configured them
+_configure_lock = threading.Lock()
+_configured = False
+
 class DSPyAnalyzer:
+    """
+    README analysis with DSPy.
+
+    DSPy calls block, so they run in a dedicated pool of DSPY_MAX_WORKERS
+    threads instead of on the event loop. Cancelling analyze_readme, e.g. on a
+    timeout, drops the call if it is still queued; a call that already started
+    finishes in the background and its result is discarded. DSPy takes seconds
+    to import, so it is only imported by the first prediction, in a worker
+    thread.
+    """
+
     def __init__(self, config: Config):
         self.config = config
         self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
-        # Initialize DSPy with preferred model
-        dspy.settings.configure(model=config.MODEL_NAME)
-        
-    class ReadmeAnalyzer(dspy.Signature):
-        """Analyze README content for build instructions"""
-        input_readme = dspy.InputField(desc="README content to analyze")
-        dependencies = dspy.OutputField(desc="List of required dependencies")
-        setup_steps = dspy.OutputField(desc="List of setup commands and descriptions")
-        build_steps = dspy.OutputField(desc="List of build commands and descriptions")
-        test_steps = dspy.OutputField(desc="List of test commands and descriptions")
+        self.executor = ThreadPoolExecutor(max_workers=config.DSPY_MAX_WORKERS, thread_name_prefix="dspy")
+        self._predictor = None
+        self._predictor_lock = threading.Lock()
+
+    def _get_predictor(self):
+        """Import DSPy and build the shared predictor on first use"""
+        with self._predictor_lock:
+            if self._predictor is None:
+                import dspy
+
+                class ReadmeAnalyzer(dspy.Signature):
+                    """Analyze README content for build instructions"""
+                    input_readme = dspy.InputField(desc="README content to analyze")
+                    dependencies = dspy.OutputField(desc="List of required dependencies")
+                    setup_steps = dspy.OutputField(desc="List of setup commands and descriptions")
+                    build_steps = dspy.OutputField(desc="List of build commands and descriptions")
+                    test_steps = dspy.OutputField(desc="List of test commands and descriptions")
+
+                global _configured
+                with _configure_lock:
+                    if not _configured:
+                        # Initialize DSPy with preferred model
+                        dspy.settings.configure(model=self.config.MODEL_NAME)
+                        _configured = True
+                self._predictor = dspy.Predict(ReadmeAnalyzer)
+        return self._predictor
+
+    def close(self) -> None:
+        """Stop the worker threads, dropping calls that have not started"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
     async def analyze_readme(self, readme_content: str) -> Optional[Dict]:
         """Analyze README using DSPy"""
         try:
-            analyzer = dspy.Predict(self.ReadmeAnalyzer)
-            result = analyzer(input_readme=readme_content)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, self._predict, readme_content)
             
             return {
                 "dependencies": result.dependencies,
@@ -33,8 +68,12 @@ class DSPyAnalyzer:
                 "test_steps": self._parse_steps(result.test_steps)
             }
         except Exception as e:
-            self.logger.error(f"Error in DSPy analysis: {e}")
+            self.logger.error("Error in DSPy analysis: %s", e)
             return None
+
+    def _predict(self, readme_content: str):
+        """Run the shared predictor; called in a worker thread"""
+        return self._get_predictor()(input_readme=readme_content)
             
     def _parse_steps(self, steps_str: str) -> List[Dict]:
         """Parse steps string into structured format"""
@@ -46,4 +85,4 @@ class DSPyAnalyzer:
                     "command": command.strip(),
                     "description": description.strip()
                 })
-        return steps
\ No newline at end of file
+        return steps
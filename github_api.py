@@ -0,0 +1,130 @@
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from urllib.parse import urlsplit
+from config import Config
+from logger import setup_logger
+from metrics import metrics
+from exceptions import GitHubServiceError
+from rate_limiter import MAX_RATE_LIMIT_RETRIES, GitHubRequestScheduler, resource_for_path
+from http_cache import HttpCache
+
+if TYPE_CHECKING:
+    import httpx
+
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+class GitHubApiClient:
+    """Pooled asynchronous client for the GitHub REST API and raw file downloads"""
+
+    def __init__(self, config: Config, scheduler: Optional[GitHubRequestScheduler] = None,
+                 http_cache: Optional[HttpCache] = None):
+        self.config = config
+        self.scheduler = scheduler or GitHubRequestScheduler(config)
+        self.http_cache = http_cache
+        self.api_host = urlsplit(config.GITHUB_API_URL).netloc
+        self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
+        # Imported here so that importing the module stays cheap for callers
+        # that never use the asynchronous client
+        import httpx
+        limits = httpx.Limits(
+            max_connections=config.DOWNLOAD_CONCURRENCY,
+            max_keepalive_connections=config.DOWNLOAD_CONCURRENCY,
+        )
+        self.client = httpx.AsyncClient(
+            base_url=config.GITHUB_API_URL,
+            headers={
+                "Authorization": f"token {config.GITHUB_TOKEN}",
+                "Accept": "application/vnd.github+json",
+            },
+            timeout=config.TIMEOUT,
+            limits=limits,
+            follow_redirects=True,
+        )
+
+    async def __aenter__(self) -> 'GitHubApiClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying connection pool"""
+        await self.client.aclose()
+
+    async def request(self, method: str, url: str, **kwargs) -> 'httpx.Response':
+        """
+        Send a request, retrying transport errors, 5xx and rate limited responses.
+
+        Requests to the API host take their token from the scheduler and report
+        the rate limit headers of the response back to it. GET requests to the
+        API are sent as conditional requests when the HTTP cache holds a copy,
+        and a 304 reply is answered from the cache.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL or path relative to GITHUB_API_URL
+
+        Returns:
+            httpx.Response: Successful response
+
+        Raises:
+            GitHubServiceError: If the request still fails after MAX_RETRIES attempts
+        """
+        import httpx
+        request_url = self.client.build_request(method, url, params=kwargs.get("params")).url
+        scheduled = request_url.netloc.decode() == self.api_host
+        resource = resource_for_path(request_url.path)
+        cache_key = str(request_url)
+        cached = None
+        if self.http_cache and scheduled and method == "GET":
+            cached = await asyncio.to_thread(self.http_cache.get, cache_key)
+            if cached:
+                kwargs["headers"] = {**kwargs.get("headers", {}), **cached.conditional_headers()}
+        attempt = 0
+        rate_limit_retries = 0
+        while True:
+            token = None
+            try:
+                if scheduled:
+                    token = await self.scheduler.acquire(resource)
+                    kwargs["headers"] = {**kwargs.get("headers", {}), "Authorization": f"token {token}"}
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except BaseException:
+                    # Failed or cancelled before a response arrived; the slot must still be returned
+                    if token:
+                        self.scheduler.release(token, resource)
+                    raise
+                if token and self.scheduler.update(token, response.headers, response.status_code, resource):
+                    rate_limit_retries += 1
+                    if rate_limit_retries > MAX_RATE_LIMIT_RETRIES:
+                        raise GitHubServiceError(f"GitHub request for {url} kept hitting the rate limit")
+                    continue
+                if response.status_code == 304 and cached:
+                    self.http_cache.record_saved()
+                    return httpx.Response(
+                        200, content=cached.body, headers={"Content-Type": cached.content_type},
+                        request=response.request,
+                    )
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+                    if self.http_cache and scheduled and method == "GET":
+                        await asyncio.to_thread(self.http_cache.update, cache_key, response.headers, response.content)
+                    return response
+                error = f"HTTP {response.status_code}"
+            except httpx.HTTPStatusError as e:
+                raise GitHubServiceError(f"GitHub request failed for {url}: {str(e)}")
+            except httpx.TransportError as e:
+                error = str(e) or type(e).__name__
+
+            attempt += 1
+            if attempt == self.config.MAX_RETRIES:
+                raise GitHubServiceError(f"GitHub request failed for {url} after {attempt} attempts: {error}")
+            metrics.increment("retries", operation="github_api")
+            self.logger.debug("Retrying %s (attempt %s): %s", url, attempt, error)
+            await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET a JSON document from the API"""
+        response = await self.request("GET", url, params=params)
+        return response.json()
@@ -1,74 +1,328 @@
 from github import Github, GithubException
+from github.ContentFile import ContentFile
+from github.Repository import Repository
+import asyncio
+import json
 import requests
 from pathlib import Path
-from typing import Tuple, Optional, Dict, List
+from typing import Any, AsyncIterator, Tuple, Optional, Dict, List
+from datetime import date, timedelta
+import math
+import re
 import shutil
+import sqlite3
+import tarfile
+from urllib.parse import quote, urlencode
+from urllib3.util.retry import Retry
 from config import Config
+from constants import DownloadMode
+from github_api import RETRYABLE_STATUS_CODES, GitHubApiClient
+from download_engine import ConcurrentDownloader, set_executable
+from repo_sync import RepositorySync
+from repo_compare import ComparisonResult, RepositoryComparer
+from blob_store import BlobStore
+from rate_limiter import MAX_RATE_LIMIT_RETRIES, GitHubRequestScheduler, ScheduledAuth
+from http_cache import HttpCache
+from result_cache import ResultCache
 from logger import setup_logger
+from metrics import metrics
+from decorators import timed
 from exceptions import GitHubServiceError
 
+# GitHub never returns more than this many results for one search query
+SEARCH_RESULT_CEILING = 1000
+SEARCH_PAGE_SIZE = 100
+# Searches split by creation date start here, before GitHub's launch
+SEARCH_EPOCH = date(2007, 10, 1)
+
+# A created: qualifier in a search query, possibly negated
+CREATED_QUALIFIER = re.compile(r"(?:^|\s)(-?)created:(\S+)")
+
+def created_range(query: str) -> Optional[Tuple[str, date, date]]:
+    """
+    Split the creation date bounds off a search query.
+
+    Returns:
+        Optional[Tuple[str, date, date]]: The query without its created:
+        qualifier and the first and last creation day it allows, clamped to
+        SEARCH_EPOCH and today; None if the qualifier is negated, repeated or
+        not a plain date range, so the query cannot be split by date
+    """
+    today = date.today()
+    matches = list(CREATED_QUALIFIER.finditer(query))
+    if not matches:
+        return query, SEARCH_EPOCH, today
+    if len(matches) > 1 or matches[0].group(1):
+        return None
+    match = matches[0]
+    value = match.group(2)
+    try:
+        if ".." in value:
+            low, high = value.split("..", 1)
+            start = SEARCH_EPOCH if low == "*" else date.fromisoformat(low)
+            end = today if high == "*" else date.fromisoformat(high)
+        elif value.startswith(">="):
+            start, end = date.fromisoformat(value[2:]), today
+        elif value.startswith(">"):
+            start, end = date.fromisoformat(value[1:]) + timedelta(days=1), today
+        elif value.startswith("<="):
+            start, end = SEARCH_EPOCH, date.fromisoformat(value[2:])
+        elif value.startswith("<"):
+            start, end = SEARCH_EPOCH, date.fromisoformat(value[1:]) - timedelta(days=1)
+        else:
+            start = end = date.fromisoformat(value)
+    except ValueError:
+        return None
+    # The match takes the whitespace before the qualifier with it
+    remainder = (query[:match.start()] + query[match.end():]).strip()
+    return remainder, max(start, SEARCH_EPOCH), min(end, today)
+
+# Modes implemented on top of the async API client
+ASYNC_DOWNLOAD_MODES = {DownloadMode.CONCURRENT, DownloadMode.INCREMENTAL}
+
 class GitHubService:
     def __init__(self, config: Config):
         self.config = config
         self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
+        self._api_client: Optional[GitHubApiClient] = None
+        self._api_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._blob_store: Optional[BlobStore] = None
         try:
-            self.github = Github(config.GITHUB_TOKEN)
+            self.scheduler = GitHubRequestScheduler(config)
+            self.auth = ScheduledAuth(self.scheduler)
+            self.http_cache = HttpCache(
+                config.HTTP_CACHE_DIRECTORY, config.HTTP_CACHE_MAX_ENTRIES, config.HTTP_CACHE_MAX_BYTES
+            ) if config.HTTP_CACHE_ENABLED else None
+            # Rate limited responses are left to _get_json, which retries them when
+            # the scheduler allows; PyGithub's own retry would back off blindly
+            # and hide the response from the scheduler
+            retry = Retry(
+                total=config.MAX_RETRIES, status_forcelist=RETRYABLE_STATUS_CODES, backoff_factor=0.5,
+                raise_on_status=False,
+            )
+            self.github = Github(
+                auth=self.auth, base_url=config.GITHUB_API_URL, per_page=SEARCH_PAGE_SIZE, retry=retry
+            )
             self.validate_token()
         except Exception as e:
             raise GitHubServiceError(f"Failed to initialize GitHub service: {str(e)}")
 
+    def _get_json(self, path: str, resource: str = "core") -> Tuple[Dict, Any]:
+        """
+        GET an API path as a conditional request, serving the body from the HTTP cache on 304.
+
+        The rate limit headers of the response go back to the scheduler, and a
+        response rejected by a rate limit is sent again once the scheduler hands
+        out a token, up to MAX_RATE_LIMIT_RETRIES times.
+        """
+        url = f"{self.config.GITHUB_API_URL.rstrip('/')}{path}"
+        cached = self.http_cache.get(url) if self.http_cache else None
+        with self.auth.reporting(resource):
+            for retries in range(MAX_RATE_LIMIT_RETRIES + 1):
+                try:
+                    status, headers, output = self.github.requester.requestJson(
+                        "GET", url, headers=cached.conditional_headers() if cached else None
+                    )
+                except Exception:
+                    self.auth.release({}, 0)
+                    raise
+                if not self.auth.release(headers, status) or retries == MAX_RATE_LIMIT_RETRIES:
+                    break
+                self.logger.info("GitHub %s rate limit reached, retrying when the quota allows", resource)
+                metrics.increment("retries", operation="github_call")
+
+        if status == 304 and cached:
+            self.http_cache.record_saved()
+            return headers, json.loads(cached.body)
+        data = json.loads(output) if output else None
+        if status >= 400:
+            raise GithubException(status, data, headers)
+        if self.http_cache:
+            self.http_cache.update(url, headers, output.encode("utf-8"))
+        return headers, data
+
+    def summary(self) -> str:
+        """Request scheduling and HTTP cache figures for this run"""
+        parts = [self.scheduler.summary()]
+        if self.http_cache:
+            parts.append(self.http_cache.summary())
+        return "; ".join(parts)
+
     def validate_token(self) -> bool:
-        """Validate GitHub token is present and valid"""
+        """
+        Validate GitHub token is present and valid.
+
+        A successful validation is remembered for GITHUB_TOKEN_VALIDATION_TTL
+        seconds, so runs started shortly after another one skip the API call.
+        Only a hash of the tokens is stored.
+        """
+        ttl = self.config.GITHUB_TOKEN_VALIDATION_TTL
+        # Successful validations, keyed by a hash of the API URL and tokens
+        cache = ResultCache(self.config.TOKEN_CACHE_DIRECTORY, ttl=ttl) if ttl > 0 else None
+        cache_key = ResultCache.make_key("validate_token", (self.config.GITHUB_API_URL, *self.scheduler.tokens), {})
+        try:
+            if cache and cache.get(cache_key)[0]:
+                self.logger.debug("GitHub token validated in the last %ss, skipping validation", ttl)
+                return True
+        except (sqlite3.Error, OSError) as e:
+            self.logger.debug("Token validation cache unavailable: %s", e)
+            cache = None
         try:
-            self.github.get_user().login
-            self.logger.info("GitHub token validated successfully")
-            return True
+            self._get_json("/user")
         except GithubException as e:
-            self.logger.error(f"Invalid GitHub token: {e.data.get('message', str(e))}")
+            self.logger.error("Invalid GitHub token: %s", e.data.get('message', str(e)))
             raise GitHubServiceError(f"Invalid GitHub token: {str(e)}")
         except Exception as e:
-            self.logger.error(f"Unexpected error validating token: {str(e)}")
+            self.logger.error("Unexpected error validating token: %s", e)
             raise GitHubServiceError(f"Token validation failed: {str(e)}")
+        self.logger.info("GitHub token validated successfully")
+        if cache:
+            try:
+                cache.set(cache_key, True)
+            except (sqlite3.Error, OSError) as e:
+                self.logger.debug("Could not cache token validation: %s", e)
+        return True
+
+    def download_repository(self, repo_url: str, repo: Optional[object] = None,
+                            read_only: bool = False) -> Tuple[Optional[Path], Optional[object]]:
+        """
+        Download repository contents, reusing an already fetched repository object if given.
+
+        With read_only, files may be hardlinked to the shared blob store; only
+        pass it for working copies that are never built or modified.
+        """
+        if DownloadMode(self.config.DOWNLOAD_MODE) in ASYNC_DOWNLOAD_MODES:
+            return asyncio.run(self._download_repository_once(repo_url, repo, read_only))
 
-    def download_repository(self, repo_url: str) -> Tuple[Optional[Path], Optional[object]]:
-        """Download repository contents"""
         try:
-            # Extract owner and repo name from URL
-            url_parts = repo_url.replace("https://github.com/", "").split('/')
-            if len(url_parts) != 2:
-                raise GitHubServiceError("Invalid GitHub repository URL format")
-                
-            owner, repo_name = url_parts
-            self.logger.info(f"Attempting to download repository: {owner}/{repo_name}")
-            
-            try:
-                repo = self.github.get_repo(f"{owner}/{repo_name}")
-            except GithubException as e:
-                self.logger.error(f"Failed to access repository: {e.data.get('message', str(e))}")
-                raise GitHubServiceError(f"Repository access failed: {str(e)}")
+            repo, full_name = self._resolve_repository(repo_url, repo)
+            repo_path = self._prepare_repo_path(full_name)
 
-            # Create repository directory
-            repo_path = Path(self.config.BASE_DIRECTORY) / repo_name
+            with timed("download", mode=self.config.DOWNLOAD_MODE):
+                if DownloadMode(self.config.DOWNLOAD_MODE) == DownloadMode.ARCHIVE:
+                    self._download_archive(repo, repo_path)
+                else:
+                    self._download_contents(repo, self._list_contents(repo, ""), repo_path)
+            self.logger.info("Repository downloaded successfully to %s", repo_path)
             
-            # Clean existing directory if present
-            if repo_path.exists():
-                self.logger.info(f"Removing existing repository at {repo_path}")
-                shutil.rmtree(repo_path)
+            return repo_path, repo
             
-            repo_path.mkdir(parents=True, exist_ok=True)
-            self.logger.info(f"Created directory: {repo_path}")
+        except GitHubServiceError:
+            raise
+        except Exception as e:
+            self.logger.error("Unexpected error downloading repository: %s", e)
+            raise GitHubServiceError(f"Repository download failed: {str(e)}")
+
+    async def download_repository_async(self, repo_url: str, repo: Optional[object] = None,
+                                        read_only: bool = False) -> Tuple[Optional[Path], Optional[object]]:
+        """Download repository contents without blocking the event loop; see download_repository"""
+        mode = DownloadMode(self.config.DOWNLOAD_MODE)
+        if mode not in ASYNC_DOWNLOAD_MODES:
+            return await asyncio.to_thread(self.download_repository, repo_url, repo, read_only)
+
+        try:
+            repo, full_name = await asyncio.to_thread(self._resolve_repository, repo_url, repo)
+
+            blob_store = self._get_blob_store()
+            async with timed("download", mode=mode.value):
+                if mode == DownloadMode.INCREMENTAL:
+                    repo_path = self.repo_directory(full_name)
+                    sync = RepositorySync(self.config, self._get_api_client(), blob_store, hardlink=read_only)
+                    await sync.sync(repo.full_name, repo.default_branch, repo_path)
+                else:
+                    repo_path = self._prepare_repo_path(full_name)
+                    downloader = ConcurrentDownloader(self.config, self._get_api_client(), blob_store, hardlink=read_only)
+                    await downloader.download(repo.full_name, repo.default_branch, repo_path)
+
+            if blob_store:
+                await asyncio.to_thread(blob_store.gc, self.config.BLOB_STORE_MAX_BYTES)
+            self.logger.info("Repository downloaded successfully to %s", repo_path)
 
-            self._download_contents(repo, repo.get_contents(""), repo_path)
-            self.logger.info(f"Repository downloaded successfully to {repo_path}")
-            
             return repo_path, repo
-            
+
         except GitHubServiceError:
             raise
         except Exception as e:
-            self.logger.error(f"Unexpected error downloading repository: {str(e)}")
+            self.logger.error("Unexpected error downloading repository: %s", e)
             raise GitHubServiceError(f"Repository download failed: {str(e)}")
 
+    async def _download_repository_once(self, repo_url: str, repo: Optional[object],
+                                        read_only: bool = False) -> Tuple[Optional[Path], Optional[object]]:
+        """Run an async download from synchronous code and release its connection pool"""
+        try:
+            return await self.download_repository_async(repo_url, repo, read_only)
+        finally:
+            await self.aclose()
+
+    def _get_api_client(self) -> GitHubApiClient:
+        """Return the pooled API client, creating it for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._api_client is None or self._api_loop is not loop:
+            self._api_client = GitHubApiClient(self.config, self.scheduler, self.http_cache)
+            self._api_loop = loop
+        return self._api_client
+
+    def _get_blob_store(self) -> Optional[BlobStore]:
+        """Return the shared blob store if it is enabled"""
+        if self.config.BLOB_STORE_ENABLED and self._blob_store is None:
+            self._blob_store = BlobStore(self.config)
+        return self._blob_store
+
+    async def aclose(self):
+        """Close the pooled API client"""
+        if self._api_client is not None:
+            await self._api_client.aclose()
+            self._api_client = None
+            self._api_loop = None
+
+    def _resolve_repository(self, repo_url: str, repo: Optional[object]) -> Tuple[object, str]:
+        """Return the repository object and its "owner/repo" name for a download"""
+        if repo is not None:
+            return repo, repo.full_name
+        return self._get_repository(repo_url)
+
+    def _get_repository(self, repo_url: str) -> Tuple[object, str]:
+        """Resolve a repository URL to a PyGithub repository object"""
+        full_name = self.full_name_from_url(repo_url)
+        self.logger.info("Attempting to download repository: %s", full_name)
+        return self.get_repository(full_name), full_name
+
+    @staticmethod
+    def full_name_from_url(repo_url: str) -> str:
+        """Extract the "owner/repo" name from a GitHub repository URL"""
+        url_parts = repo_url.replace("https://github.com/", "").split('/')
+        if len(url_parts) != 2:
+            raise GitHubServiceError("Invalid GitHub repository URL format")
+        return '/'.join(url_parts)
+
+    def repo_directory(self, full_name: str) -> Path:
+        """
+        Working directory of a repository, BASE_DIRECTORY/owner/repo.
+
+        Keyed by owner as well as name, so forks and unrelated repositories
+        with the same name never share a directory.
+        """
+        owner, name = full_name.split('/')
+        return Path(self.config.BASE_DIRECTORY) / owner / name
+
+    def _prepare_repo_path(self, full_name: str) -> Path:
+        """Create an empty working directory for a repository"""
+        repo_path = self.repo_directory(full_name)
+        
+        # Clean existing directory if present
+        if repo_path.exists():
+            self.logger.info("Removing existing repository at %s", repo_path)
+            shutil.rmtree(repo_path)
+        
+        repo_path.mkdir(parents=True, exist_ok=True)
+        self.logger.info("Created directory: %s", repo_path)
+        return repo_path
+
+    def _list_contents(self, repo, path: str) -> List[ContentFile]:
+        """List a directory of the repository's default branch through the contents API"""
+        headers, data = self._get_json(f"/repos/{repo.full_name}/contents/{quote(path)}")
+        return [self.github.create_from_raw_data(ContentFile, item, headers) for item in data]
+
     def _download_contents(self, repo, contents, current_path: Path):
         """Recursively download repository contents"""
         for content_file in contents:
@@ -77,36 +331,202 @@ class GitHubService:
                 
                 if content_file.type == "dir":
                     file_path.mkdir(exist_ok=True)
-                    self._download_contents(repo, repo.get_contents(content_file.path), file_path)
-                    self.logger.debug(f"Created directory: {file_path}")
+                    self._download_contents(repo, self._list_contents(repo, content_file.path), file_path)
+                    self.logger.debug("Created directory: %s", file_path)
                 else:
                     response = requests.get(content_file.download_url)
                     response.raise_for_status()
                     
                     file_path.write_bytes(response.content)
-                    self.logger.debug(f"Downloaded file: {file_path}")
+                    metrics.increment("downloaded_files")
+                    metrics.increment("downloaded_bytes", len(response.content))
+                    self.logger.debug("Downloaded file: %s", file_path)
                     
             except requests.exceptions.RequestException as e:
-                self.logger.error(f"Failed to download {content_file.path}: {str(e)}")
+                self.logger.error("Failed to download %s: %s", content_file.path, e)
                 raise GitHubServiceError(f"Failed to download {content_file.path}: {str(e)}")
             except Exception as e:
-                self.logger.error(f"Error processing {content_file.path}: {str(e)}")
+                self.logger.error("Error processing %s: %s", content_file.path, e)
                 raise GitHubServiceError(f"Error processing {content_file.path}: {str(e)}")
 
+    def _download_archive(self, repo, repo_path: Path):
+        """Stream the repository tarball and unpack it while it downloads"""
+        archive_url = f"{repo.url}/tarball/{repo.default_branch}"
+        token = self.scheduler.acquire_sync("core")
+        headers = {"Authorization": f"token {token}"}
+        try:
+            with requests.get(archive_url, headers=headers, stream=True, timeout=self.config.TIMEOUT) as response:
+                # The API answers with a redirect to the archive host; its headers carry the quota
+                api_response = response.history[0] if response.history else response
+                self.scheduler.update(token, api_response.headers, api_response.status_code)
+                response.raise_for_status()
+                response.raw.decode_content = True
+                # "r|*" reads the archive as a forward-only stream, so members are
+                # written to disk as soon as their bytes arrive
+                with tarfile.open(fileobj=response.raw, mode="r|*") as archive:
+                    for member in archive:
+                        self._extract_archive_member(archive, member, repo_path)
+        except requests.exceptions.RequestException as e:
+            self.logger.error("Failed to download archive for %s: %s", repo.full_name, e)
+            raise GitHubServiceError(f"Failed to download archive for {repo.full_name}: {str(e)}")
+        except tarfile.TarError as e:
+            self.logger.error("Invalid archive for %s: %s", repo.full_name, e)
+            raise GitHubServiceError(f"Invalid archive for {repo.full_name}: {str(e)}")
+
+    def _extract_archive_member(self, archive: tarfile.TarFile, member: tarfile.TarInfo, repo_path: Path):
+        """Write a single tarball member below repo_path"""
+        # GitHub wraps everything in a single "<owner>-<repo>-<sha>/" directory
+        parts = Path(member.name).parts[1:]
+        if not parts:
+            return
+        if any(part in ("..", "") for part in parts) or Path(member.name).is_absolute():
+            self.logger.warning("Skipping unsafe archive member: %s", member.name)
+            return
+
+        file_path = repo_path.joinpath(*parts)
+        if member.isdir():
+            file_path.mkdir(parents=True, exist_ok=True)
+            self.logger.debug("Created directory: %s", file_path)
+        elif member.isfile():
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            source = archive.extractfile(member)
+            with open(file_path, "wb") as target:
+                shutil.copyfileobj(source, target)
+            if member.mode & 0o100:
+                set_executable(file_path, True)
+            metrics.increment("downloaded_files")
+            metrics.increment("downloaded_bytes", member.size)
+            self.logger.debug("Downloaded file: %s", file_path)
+        else:
+            self.logger.debug("Skipping non-regular archive member: %s", member.name)
+
     def search_repositories(self, query: str, limit: int = 10) -> List[str]:
         """Search for repositories."""
         try:
-            results = self.github.search_repositories(query=query)
-            return [repo.full_name for repo in results[:limit]]
+            names = []
+            for page_number in range(math.ceil(limit / SEARCH_PAGE_SIZE)):
+                total, page = self._search_page(query, page_number)
+                names.extend(repo.full_name for repo in page)
+                if (page_number + 1) * SEARCH_PAGE_SIZE >= total:
+                    break
+            return names[:limit]
         except Exception as e:
-            self.logger.error(f"Search failed: {e}")
+            self.logger.error("Search failed: %s", e)
             return []
 
+    async def iter_search_repositories(self, query: str, max_results: Optional[int] = None,
+                                       split_by_date: bool = True) -> AsyncIterator[object]:
+        """
+        Yield repositories matching a query as search result pages arrive.
+
+        Pages are fetched lazily, with the next page requested while the current
+        one is being consumed. GitHub serves at most 1000 results per query; with
+        split_by_date the query is bisected on its creation date range until
+        every slice fits under that ceiling. A created: qualifier in the query
+        narrows that range; one that is not a plain date range disables
+        splitting.
+
+        Args:
+            query: GitHub search query
+            max_results: Stop after this many repositories, or None for all
+            split_by_date: Split queries with more than 1000 results by creation date
+
+        Yields:
+            Repository objects from the search results
+        """
+        start, end = None, date.today()
+        if split_by_date:
+            bounds = created_range(query)
+            if bounds is None:
+                self.logger.info("Not splitting search %s by date, its created: qualifier is not a date range", query)
+            else:
+                query, start, end = bounds
+                if start > end:
+                    return
+        yielded = 0
+        try:
+            async for repo in self._iter_search_range(query, start, end):
+                yield repo
+                yielded += 1
+                if max_results and yielded >= max_results:
+                    return
+        except GithubException as e:
+            self.logger.error("Search failed: %s", e.data.get('message', str(e)))
+
+    async def _iter_search_range(self, query: str, start: Optional[date], end: date) -> AsyncIterator[object]:
+        """Yield the results of one (optionally date-bounded) query, splitting it when it is too large"""
+        ranged_query = f"{query} created:{start.isoformat()}..{end.isoformat()}".strip() if start else query
+        total, page = await asyncio.to_thread(self._search_page, ranged_query, 0)
+
+        if start and total > SEARCH_RESULT_CEILING and start < end:
+            middle = start + (end - start) // 2
+            self.logger.debug("Splitting search %s (%s results)", ranged_query, total)
+            async for repo in self._iter_search_range(query, start, middle):
+                yield repo
+            async for repo in self._iter_search_range(query, middle + timedelta(days=1), end):
+                yield repo
+            return
+
+        if total > SEARCH_RESULT_CEILING:
+            self.logger.warning("Search %s has %s results, only the first %s are reachable", ranged_query, total, SEARCH_RESULT_CEILING)
+        page_count = math.ceil(min(total, SEARCH_RESULT_CEILING) / SEARCH_PAGE_SIZE)
+        next_page: Optional[asyncio.Task] = None
+        try:
+            for page_number in range(1, page_count + 1):
+                if page_number < page_count:
+                    next_page = asyncio.ensure_future(asyncio.to_thread(self._search_page, ranged_query, page_number))
+                for repo in page:
+                    yield repo
+                if next_page is None or not page:
+                    return
+                (_, page), next_page = await next_page, None
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    def _search_page(self, query: str, page_number: int) -> Tuple[int, List[Repository]]:
+        """Fetch one page of repository search results, numbered from 0, and the total result count"""
+        params = urlencode({"q": query, "per_page": SEARCH_PAGE_SIZE, "page": page_number + 1})
+        headers, data = self._get_json(f"/search/repositories?{params}", "search")
+        return data["total_count"], [self.github.create_from_raw_data(Repository, item, headers) for item in data["items"]]
+
+    def get_repository(self, full_name: str):
+        """Fetch a repository object by its "owner/repo" name."""
+        try:
+            headers, data = self._get_json(f"/repos/{full_name}")
+            return self.github.create_from_raw_data(Repository, data, headers)
+        except GithubException as e:
+            self.logger.error("Failed to access repository: %s", e.data.get('message', str(e)))
+            raise GitHubServiceError(f"Repository access failed: {str(e)}")
+
+    def get_head_commit(self, repo) -> Optional[str]:
+        """SHA of the latest commit on the repository's default branch, or None if it cannot be read."""
+        try:
+            _, data = self._get_json(f"/repos/{repo.full_name}/branches/{quote(repo.default_branch, safe='')}")
+            return data["commit"]["sha"]
+        except Exception as e:
+            self.logger.warning("Could not read head commit of %s: %s", repo.full_name, e)
+            return None
+
+    async def compare_repositories(self, base_repo, other_repo) -> ComparisonResult:
+        """
+        Compare the default branches of two repositories without downloading them.
+
+        Raises:
+            GitHubServiceError: If a branch or tree could not be fetched
+        """
+        comparer = RepositoryComparer(self.config, self._get_api_client())
+        return await comparer.compare_remote(
+            (base_repo.full_name, base_repo.default_branch), (other_repo.full_name, other_repo.default_branch)
+        )
+
+    @timed("readme_fetch")
     def get_readme_content(self, repo) -> Optional[str]:
         """Get README content from a repository object."""
         try:
-            readme = repo.get_readme()
+            headers, data = self._get_json(f"/repos/{repo.full_name}/readme")
+            readme = self.github.create_from_raw_data(ContentFile, data, headers)
             return readme.decoded_content.decode('utf-8')
         except Exception as e:
-            self.logger.warning(f"No README found or could not decode: {e}")
+            self.logger.warning("No README found or could not decode: %s", e)
             return None
\ No newline at end of file
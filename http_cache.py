@@ -0,0 +1,66 @@
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+from result_cache import ResultCache
+from metrics import metrics
+
+@dataclass
+class CachedResponse:
+    """Body and validators of a cached GET response"""
+    body: bytes
+    content_type: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class HttpCache:
+    """
+    Persistent cache of GitHub API responses for conditional requests.
+
+    Responses carrying an ETag or Last-Modified header are stored per URL.
+    Later requests for the same URL send If-None-Match/If-Modified-Since, and
+    a 304 reply, which GitHub does not count against the rate limit, is
+    answered from disk.
+    """
+
+    def __init__(self, cache_path: Path, max_entries: int, max_bytes: int):
+        self.store = ResultCache(cache_path, ttl=None, max_entries=max_entries, max_bytes=max_bytes)
+        self.saved = 0
+        self.refreshed = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        hit, entry = self.store.get(url)
+        return entry if hit else None
+
+    def update(self, url: str, headers: Mapping[str, str], body: bytes) -> None:
+        """Store a 200 response if it can be revalidated later"""
+        headers = {key.lower(): value for key, value in headers.items()}
+        if "etag" not in headers and "last-modified" not in headers:
+            return
+        entry = CachedResponse(
+            body=body,
+            content_type=headers.get("content-type", "application/json"),
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+        )
+        self.store.set(url, entry)
+        with self._lock:
+            self.refreshed += 1
+
+    def record_saved(self) -> None:
+        """Count a request answered with 304 Not Modified"""
+        with self._lock:
+            self.saved += 1
+        metrics.increment("http_cache_hits")
+
+    def summary(self) -> str:
+        return f"HTTP cache: {self.saved} requests answered by 304 Not Modified, {self.refreshed} responses stored"
@@ -1,53 +1,208 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import socket
 import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
+from constants import LogFormat, DEFAULT_LOG_FORMAT, DEFAULT_LOG_MAX_BYTES, DEFAULT_LOG_BACKUP_COUNT
+
+LOG_FILE_STEM = "github_analyzer"
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class DirectoryFileHandler(logging.Handler):
+    """Writes each record to a size-rotated log file in the log directory of its logger"""
+
+    def __init__(self):
+        super().__init__()
+        self.log_format = DEFAULT_LOG_FORMAT
+        self.max_bytes = DEFAULT_LOG_MAX_BYTES
+        self.backup_count = DEFAULT_LOG_BACKUP_COUNT
+        self.file_stem = LOG_FILE_STEM
+        self._handlers: Dict[Path, RotatingFileHandler] = {}
+
+    def configure(self, log_format: str, max_bytes: int, backup_count: int) -> None:
+        """Change the file format and rotation; files are reopened on the next record"""
+        with self.lock:
+            self.log_format = log_format
+            self.max_bytes = max_bytes
+            self.backup_count = backup_count
+            self._close_files()
+
+    def use_file_stem(self, file_stem: str) -> None:
+        """Write to <file_stem>.log or .jsonl from the next record on"""
+        with self.lock:
+            self.file_stem = file_stem
+            self._close_files()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        log_dir = getattr(record, "log_dir", None)
+        if log_dir is None:
+            return
+        handler = self._handlers.get(log_dir)
+        if handler is None:
+            handler = self._handlers[log_dir] = self._open(log_dir)
+        handler.handle(record)
+
+    def _open(self, log_dir: Path) -> RotatingFileHandler:
+        log_dir.mkdir(parents=True, exist_ok=True)
+        if self.log_format == LogFormat.JSON.value:
+            log_file, formatter = log_dir / f"{self.file_stem}.jsonl", JsonFormatter()
+        else:
+            log_file = log_dir / f"{self.file_stem}.log"
+            formatter = logging.Formatter(
+                '[%(asctime)s] {%(name)s} %(levelname)s: %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            )
+        handler = RotatingFileHandler(
+            log_file, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding='utf-8'
+        )
+        handler.setFormatter(formatter)
+        return handler
+
+    def _close_files(self) -> None:
+        for handler in self._handlers.values():
+            handler.close()
+        self._handlers.clear()
+
+    def close(self) -> None:
+        with self.lock:
+            self._close_files()
+        super().close()
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without formatting them.
+
+    QueueHandler formats the message in the calling thread so that records
+    can cross process boundaries. The queue here never leaves the process, so
+    message interpolation and traceback formatting are left to the listener,
+    and a log call on the event loop costs little more than a queue put.
+    Arguments are therefore formatted after the call returns; log values, not
+    objects that are mutated right afterwards.
+    """
+
+    def __init__(self, log_dir: Optional[Path]):
+        super().__init__(None)
+        self.log_dir = Path(log_dir) if log_dir else None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.log_dir = self.log_dir
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if _shut_down:
+            # Records logged during interpreter shutdown are written directly
+            for handler in _handlers:
+                handler.handle(record)
+            return
+        _listener().queue.put_nowait(record)
+
+_lock = threading.Lock()
+_queue_listener: Optional[QueueListener] = None
+_shut_down = False
+_console_handler = logging.StreamHandler(sys.stdout)
+_console_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+_file_handler = DirectoryFileHandler()
+_handlers = (_console_handler, _file_handler)
+
+def _listener() -> QueueListener:
+    """Return the background thread that writes log records, starting it on first use"""
+    global _queue_listener
+    if _queue_listener is None:
+        with _lock:
+            if _queue_listener is None:
+                listener = QueueListener(queue.SimpleQueue(), *_handlers)
+                listener.start()
+                _queue_listener = listener
+    return _queue_listener
+
+def _before_fork() -> None:
+    # Keep the listener out of the handlers so no file is mid-write while forking
+    for handler in _handlers:
+        handler.acquire()
+
+def _after_fork_in_parent() -> None:
+    for handler in reversed(_handlers):
+        handler.release()
+
+def _after_fork_in_child() -> None:
+    # The listener thread does not survive a fork; the child starts its own
+    global _queue_listener, _lock
+    for handler in _handlers:
+        handler._at_fork_reinit()
+    _queue_listener = None
+    _lock = threading.Lock()
+
+def shutdown_logging() -> None:
+    """Write out every queued record and stop the listener thread"""
+    global _queue_listener, _shut_down
+    with _lock:
+        listener, _queue_listener = _queue_listener, None
+        _shut_down = True
+    if listener is not None:
+        listener.stop()
+
+os.register_at_fork(
+    before=_before_fork, after_in_parent=_after_fork_in_parent, after_in_child=_after_fork_in_child
+)
+atexit.register(shutdown_logging)
+
+def configure_logging(config) -> None:
+    """Apply the log file format and rotation settings from the configuration"""
+    _file_handler.configure(config.LOG_FORMAT, config.LOG_MAX_BYTES, config.LOG_BACKUP_COUNT)
+
+def use_process_log_file() -> None:
+    """
+    Log to a file of this process's own, named after the host and process id.
+
+    RotatingFileHandler rotates without coordinating with other processes, so
+    processes writing to one file would rename it under each other's feet.
+    """
+    _file_handler.use_file_stem(f"{LOG_FILE_STEM}.{socket.gethostname()}-{os.getpid()}")
 
 def setup_logger(name: str, log_level: str = "INFO", log_dir: Optional[Path] = None) -> logging.Logger:
-    """Set up a logger with console and optional file handlers.
-    
+    """Set up a logger that writes to the console and, optionally, to a log file.
+
+    Records are queued and written by a single background thread, so logging
+    from the event loop never waits for the console or the disk. With log_dir,
+    they also go to github_analyzer.log (or .jsonl with LOG_FORMAT "json") in
+    that directory, shared by all modules and rotated by size.
+
     Args:
         name: Logger name
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_dir: Optional directory for log files
-        
+
     Returns:
         logging.Logger: Configured logger instance
     """
     # Create logger
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, log_level.upper()))
-    
+
     # Prevent duplicate handlers
     if logger.handlers:
         return logger
-        
-    # Create formatters
-    detailed_formatter = logging.Formatter(
-        '[%(asctime)s] {%(name)s} %(levelname)s: %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_formatter = logging.Formatter(
-        '%(levelname)s: %(message)s'
-    )
-    
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
-    
-    # File handler
-    if log_dir:
-        log_dir = Path(log_dir)
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Create daily log file
-        timestamp = datetime.now().strftime('%Y%m%d')
-        log_file = log_dir / f"{name}_{timestamp}.log"
-        
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setFormatter(detailed_formatter)
-        logger.addHandler(file_handler)
-    
-    return logger
\ No newline at end of file
+
+    logger.addHandler(DeferredQueueHandler(log_dir))
+    return logger
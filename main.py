@@ -1,85 +1,120 @@
+import argparse
 import asyncio
 from pathlib import Path
 import json
 import sys
+from typing import Optional
 from github_service import GitHubService, GitHubServiceError
 from auto_builder import AutoBuilder
 from config import Config
-from logger import setup_logger
+from logger import configure_logging, setup_logger
+from metrics import metrics
 from exceptions import BuildError
+from repo_compare import ComparisonResult, RepositoryComparer
 
 logger = setup_logger(__name__)
 
-async def compare_repositories(repo1_path: Path, repo2_path: Path) -> list:
-    """Find missing files between 2 repos"""
+async def compare_repositories(repo1_path: Path, repo2_path: Path, config: Config) -> Optional[ComparisonResult]:
+    """Find files added, removed or modified in repo2 relative to repo1"""
     try:
-        repo1_files = set(f.relative_to(repo1_path) for f in repo1_path.rglob('*') if f.is_file())
-        repo2_files = set(f.relative_to(repo2_path) for f in repo2_path.rglob('*') if f.is_file())
-        return list(repo1_files - repo2_files)
+        return await RepositoryComparer(config).compare_local(repo1_path, repo2_path)
     except Exception as e:
-        logger.error(f"Error comparing repositories: {str(e)}")
-        return []
+        logger.error("Error comparing repositories: %s", e)
+        return None
 
-async def run_project(repo_url1: str, repo_url2: str = None):
+def log_comparison(result: ComparisonResult, other_name: str):
+    logger.info("\nComparison with %s: %s", other_name, result.summary())
+    if result.identical:
+        logger.info("No differences found")
+    for change in result.changes():
+        logger.info("  - %s", change.summary())
+
+def report_metrics():
+    """Log the per-stage timings and write the metrics exports, if enabled"""
+    lines = metrics.summary()
+    if lines:
+        logger.info("\nTime per stage:")
+    for line in lines:
+        logger.info("  %s", line)
+    metrics.export()
+
+async def run_project(repo_url1: str, repo_url2: str = None, force_build: bool = False):
     """Run the full project"""
     try:
         config = Config.from_yaml()
         config.validate()
+        configure_logging(config)
+        metrics.configure(config)
         
         github_service = GitHubService(config)
         auto_builder = AutoBuilder(config)
 
-        logger.info(f"Processing repository 1: {repo_url1}")
+        logger.info("Processing repository 1: %s", repo_url1)
         try:
-            repo1_path, repo1 = github_service.download_repository(repo_url1)
+            repo1_path, repo1 = await github_service.download_repository_async(repo_url1)
             if not repo1_path or not repo1:
                 logger.error("Failed to download repository 1")
                 return
         except GitHubServiceError as e:
-            logger.error(f"Failed to process repository 1: {str(e)}")
+            logger.error("Failed to process repository 1: %s", e)
             return
         
         readme_content = github_service.get_readme_content(repo1)
         if not readme_content:
-            logger.warning("No README found in repository")
-            return
+            logger.warning("No README found in repository, relying on build manifests")
 
         try:
-            build_instructions = await auto_builder.analyze_build_steps(readme_content)
+            build_instructions = await auto_builder.analyze_repository(repo1_path, readme_content, repo1.full_name)
             if not build_instructions:
-                logger.warning("No build instructions found in README")
+                logger.warning("No build instructions found in manifests or README")
                 return
 
             logger.info("\nAnalyzed build instructions:")
             logger.info(json.dumps(build_instructions, indent=2))
 
-            if await auto_builder.execute_build_steps(repo1_path, build_instructions):
+            commit_sha = await asyncio.to_thread(github_service.get_head_commit, repo1)
+            if await auto_builder.execute_build_steps(
+                repo1_path, build_instructions, repo1.full_name, commit_sha, force=force_build
+            ):
                 logger.info("\nRepository built successfully!")
             else:
                 logger.error("\nRepository build failed!")
         except BuildError as e:
-            logger.error(f"Build process failed: {str(e)}")
+            logger.error("Build process failed: %s", e)
         
         if repo_url2:
-            logger.info(f"\nProcessing repository 2: {repo_url2}")
+            logger.info("\nProcessing repository 2: %s", repo_url2)
             try:
-                repo2_path, repo2 = github_service.download_repository(repo_url2)
-                if repo2_path:
-                    missing_files = await compare_repositories(repo1_path, repo2_path)
-                    if missing_files:
-                        logger.info("\nMissing files:")
-                        for file in missing_files:
-                            logger.info(f"  - {file}")
-                    else:
-                        logger.info("\nNo missing files found")
+                repo2 = await asyncio.to_thread(
+                    github_service.get_repository, github_service.full_name_from_url(repo_url2)
+                )
+                try:
+                    result = await github_service.compare_repositories(repo1, repo2)
+                except GitHubServiceError as e:
+                    logger.warning("Remote comparison failed, comparing downloaded copies: %s", e)
+                    # Only compared, never built, so it may share files with the blob store
+                    repo2_path, repo2 = await github_service.download_repository_async(repo_url2, repo2, read_only=True)
+                    result = await compare_repositories(repo1_path, repo2_path, config) if repo2_path else None
+                if result:
+                    log_comparison(result, repo2.full_name)
             except GitHubServiceError as e:
-                logger.error(f"Failed to process repository 2: {str(e)}")
+                logger.error("Failed to process repository 2: %s", e)
+
+        logger.info(github_service.summary())
+        for line in auto_builder.analysis_summary():
+            logger.info(line)
+        await github_service.aclose()
+        await auto_builder.aclose()
 
     except Exception as e:
-        logger.error(f"Critical error running project: {str(e)}")
+        logger.error("Critical error running project: %s", e)
         sys.exit(1)
 
 def main():
+    parser = argparse.ArgumentParser(description="Analyze and build a GitHub repository")
+    parser.add_argument("--force-build", action="store_true",
+                        help="Build even if this commit already built successfully with the same instructions")
+    args = parser.parse_args()
     try:
         repo_url = input("Enter the GitHub repository URL to analyze and build: ").strip()
         if not repo_url:
@@ -87,12 +122,14 @@ def main():
             return
             
         repo_url2 = input("Enter second repository URL for comparison (optional, press Enter to skip): ").strip()
-        asyncio.run(run_project(repo_url, repo_url2 if repo_url2 else None))
+        asyncio.run(run_project(repo_url, repo_url2 if repo_url2 else None, force_build=args.force_build))
     except KeyboardInterrupt:
         logger.info("\nOperation cancelled by user")
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+        logger.error("Unexpected error: %s", e)
         sys.exit(1)
+    finally:
+        report_metrics()
 
 if __name__ == "__main__":
     main()
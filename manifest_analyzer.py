@@ -0,0 +1,216 @@
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from config import Config
+from logger import setup_logger
+
+try:
+    import tomllib
+except ImportError:  # Python 3.10
+    tomllib = None
+
+# Confidence multiplier for repositories that mix several build systems
+MIXED_ECOSYSTEM_PENALTY = 0.8
+TEST_DIRECTORIES = ("tests", "test", "testing")
+MAKE_TARGET = re.compile(r"^([A-Za-z0-9_.-]+)\s*:(?!=)", re.MULTILINE)
+
+def step(command: str, description: str) -> Dict[str, str]:
+    return {"command": command, "description": description}
+
+@dataclass
+class ManifestAnalysis:
+    """Build instructions derived from a repository's manifests"""
+    ecosystems: List[str]
+    confidence: float
+    dependencies: List[str] = field(default_factory=list)
+    setup_steps: List[Dict] = field(default_factory=list)
+    build_steps: List[Dict] = field(default_factory=list)
+    test_steps: List[Dict] = field(default_factory=list)
+
+    def instructions(self) -> Dict:
+        """The analysis in the format produced by the LLM backends"""
+        return {
+            "dependencies": self.dependencies,
+            "setup_steps": self.setup_steps,
+            "build_steps": self.build_steps,
+            "test_steps": self.test_steps,
+        }
+
+class ManifestAnalyzer:
+    """
+    Derives build instructions from standard build manifests without an LLM.
+
+    Only the repository root is inspected. Each recognised ecosystem (Python,
+    Node.js, Rust, Go, CMake, Make) contributes its usual install, build and
+    test commands and a confidence score reflecting how much the manifest
+    tells about the build. Repositories that mix ecosystems get the lowest of
+    their scores, reduced by MIXED_ECOSYSTEM_PENALTY. Make is only used when no
+    other build system is present, since a Makefile usually wraps one.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
+        self.detectors: List[Callable[[Path, Dict[str, os.DirEntry]], Optional[ManifestAnalysis]]] = [
+            self._python, self._node, self._rust, self._go, self._cmake,
+        ]
+
+    def analyze(self, repo_path: Path) -> Optional[ManifestAnalysis]:
+        """
+        Inspect the repository root for build manifests.
+
+        Args:
+            repo_path: Path to the downloaded repository
+
+        Returns:
+            Optional[ManifestAnalysis]: Combined analysis, or None if no manifest was recognised
+        """
+        try:
+            with os.scandir(repo_path) as entries:
+                root = {entry.name: entry for entry in entries}
+        except OSError as e:
+            self.logger.error("Cannot list %s: %s", repo_path, e)
+            return None
+
+        results = [self._detect(detector, repo_path, root) for detector in self.detectors]
+        results = [result for result in results if result]
+        if not results:
+            make = self._detect(self._make, repo_path, root)
+            results = [make] if make else []
+        if not results:
+            return None
+        if len(results) == 1:
+            return results[0]
+
+        combined = ManifestAnalysis(
+            ecosystems=[name for result in results for name in result.ecosystems],
+            confidence=min(result.confidence for result in results) * MIXED_ECOSYSTEM_PENALTY,
+        )
+        for result in results:
+            combined.dependencies.extend(result.dependencies)
+            combined.setup_steps.extend(result.setup_steps)
+            combined.build_steps.extend(result.build_steps)
+            combined.test_steps.extend(result.test_steps)
+        return combined
+
+    def _detect(self, detector, repo_path: Path, root: Dict[str, os.DirEntry]) -> Optional[ManifestAnalysis]:
+        try:
+            return detector(repo_path, root)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            # Unreadable or malformed manifest: leave the repository to the LLM
+            self.logger.warning("Manifest check %s failed for %s: %s", detector.__name__, repo_path, e)
+            return None
+
+    def _read(self, repo_path: Path, name: str) -> str:
+        return (repo_path / name).read_text(encoding="utf-8", errors="replace")
+
+    def _has_tests(self, root: Dict[str, os.DirEntry]) -> bool:
+        return any(name in root and root[name].is_dir() for name in TEST_DIRECTORIES)
+
+    def _python(self, repo_path: Path, root: Dict[str, os.DirEntry]) -> Optional[ManifestAnalysis]:
+        packaged = "pyproject.toml" in root or "setup.py" in root or "setup.cfg" in root
+        if not packaged and "requirements.txt" not in root:
+            return None
+        analysis = ManifestAnalysis(["python"], confidence=0.9 if packaged else 0.6)
+
+        pyproject = {}
+        if "pyproject.toml" in root and tomllib:
+            pyproject = tomllib.loads(self._read(repo_path, "pyproject.toml"))
+            if "setup.py" not in root and "build-system" not in pyproject and "project" not in pyproject:
+                # Tool configuration only, e.g. black or ruff settings
+                packaged = "setup.cfg" in root
+                analysis.confidence = 0.9 if packaged else 0.6
+
+        if "requirements.txt" in root:
+            for line in self._read(repo_path, "requirements.txt").splitlines():
+                line = line.split("#", 1)[0].strip()
+                if line and not line.startswith("-"):
+                    analysis.dependencies.append(line)
+        if packaged:
+            analysis.setup_steps.append(step("pip install .", "Install the package and its dependencies"))
+
+        uses_pytest = (
+            "pytest.ini" in root or "conftest.py" in root
+            or "pytest" in pyproject.get("tool", {})
+            or any(re.match(r"pytest\b", dependency) for dependency in analysis.dependencies)
+        )
+        if uses_pytest:
+            analysis.test_steps.append(step("python -m pytest", "Run the test suite"))
+        elif self._has_tests(root):
+            analysis.test_steps.append(step("python -m unittest discover", "Run the test suite"))
+        elif packaged:
+            analysis.confidence -= 0.05
+        return analysis
+
+    def _node(self, repo_path: Path, root: Dict[str, os.DirEntry]) -> Optional[ManifestAnalysis]:
+        if "package.json" not in root:
+            return None
+        package = json.loads(self._read(repo_path, "package.json"))
+        scripts = package.get("scripts") or {}
+        analysis = ManifestAnalysis(["node"], confidence=0.9)
+
+        if "pnpm-lock.yaml" in root:
+            runner, install = "pnpm", "pnpm install --frozen-lockfile"
+        elif "yarn.lock" in root:
+            runner, install = "yarn", "yarn install --frozen-lockfile"
+        elif "package-lock.json" in root:
+            runner, install = "npm", "npm ci"
+        else:
+            runner, install = "npm", "npm install"
+        analysis.setup_steps.append(step(install, "Install Node.js dependencies"))
+        if "build" in scripts:
+            analysis.build_steps.append(step(f"{runner} run build", "Run the build script"))
+        test = scripts.get("test", "")
+        if test and "no test specified" not in test:
+            analysis.test_steps.append(step(f"{runner} test", "Run the test script"))
+        return analysis
+
+    def _rust(self, repo_path: Path, root: Dict[str, os.DirEntry]) -> Optional[ManifestAnalysis]:
+        if "Cargo.toml" not in root:
+            return None
+        return ManifestAnalysis(
+            ["rust"], confidence=0.95,
+            setup_steps=[step("cargo fetch", "Download crate dependencies")],
+            build_steps=[step("cargo build --locked" if "Cargo.lock" in root else "cargo build", "Build the crate")],
+            test_steps=[step("cargo test", "Run the test suite")],
+        )
+
+    def _go(self, repo_path: Path, root: Dict[str, os.DirEntry]) -> Optional[ManifestAnalysis]:
+        if "go.mod" not in root:
+            return None
+        return ManifestAnalysis(
+            ["go"], confidence=0.95,
+            setup_steps=[step("go mod download", "Download module dependencies")],
+            build_steps=[step("go build ./...", "Build all packages")],
+            test_steps=[step("go test ./...", "Run the test suite")],
+        )
+
+    def _cmake(self, repo_path: Path, root: Dict[str, os.DirEntry]) -> Optional[ManifestAnalysis]:
+        if "CMakeLists.txt" not in root:
+            return None
+        analysis = ManifestAnalysis(
+            ["cmake"], confidence=0.8,
+            setup_steps=[step("cmake -S . -B build", "Configure the build")],
+            build_steps=[step("cmake --build build", "Build the project")],
+        )
+        if re.search(r"enable_testing\s*\(|add_test\s*\(", self._read(repo_path, "CMakeLists.txt"), re.IGNORECASE):
+            analysis.test_steps.append(step("ctest --test-dir build", "Run the test suite"))
+        return analysis
+
+    def _make(self, repo_path: Path, root: Dict[str, os.DirEntry]) -> Optional[ManifestAnalysis]:
+        name = next((name for name in ("GNUmakefile", "Makefile", "makefile") if name in root), None)
+        if name is None:
+            return None
+        targets = set(MAKE_TARGET.findall(self._read(repo_path, name)))
+        analysis = ManifestAnalysis(["make"], confidence=0.7)
+        if "deps" in targets:
+            analysis.setup_steps.append(step("make deps", "Install dependencies"))
+        analysis.build_steps.append(step("make", "Build the default target"))
+        for target in ("test", "check"):
+            if target in targets:
+                analysis.test_steps.append(step(f"make {target}", "Run the test suite"))
+                break
+        return analysis
@@ -0,0 +1,260 @@
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from constants import DEFAULT_METRICS_HOST
+from logger import setup_logger
+
+PROMETHEUS_PREFIX = "github_analyzer"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+@dataclass
+class SpanStats:
+    """Aggregated durations of one span name and label set"""
+    count: int = 0
+    total: float = 0.0
+    min: float = math.inf
+    max: float = 0.0
+    errors: int = 0
+
+    def add(self, seconds: float, error: bool) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        if error:
+            self.errors += 1
+
+class Span:
+    """Times a block of code as a `with` or `async with` context manager"""
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, labels: Dict[str, object]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Cancellation is not a failure of the timed code
+        error = exc_type is not None and issubclass(exc_type, Exception)
+        self.registry.observe(self.name, time.perf_counter() - self.start, error, **self.labels)
+
+    async def __aenter__(self) -> 'Span':
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+class NullSpan:
+    """Stand-in for Span while metrics are disabled"""
+    __slots__ = ()
+
+    def __enter__(self) -> 'NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+    async def __aenter__(self) -> 'NullSpan':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        pass
+
+NULL_SPAN = NullSpan()
+
+class MetricsRegistry:
+    """
+    Process-wide timing spans and counters for one run.
+
+    Spans aggregate the count, total, minimum and maximum duration and the
+    number of failures per name and label set; counters add up values per
+    name and label set. Both are exported as a JSON run report and in the
+    Prometheus text format, written to a file for the node exporter's
+    textfile collector or served over HTTP. While disabled, span() returns a
+    shared no-op object and increment() returns at once, so instrumented code
+    costs an attribute lookup and a call.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.report_file: Optional[Path] = None
+        self.prometheus_file: Optional[Path] = None
+        self.logger = None
+        self.started = time.time()
+        self._spans: Dict[Tuple[str, LabelKey], SpanStats] = {}
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def configure(self, config) -> None:
+        """Enable or disable collection from the configuration and start a new run"""
+        self.enabled = config.METRICS_ENABLED
+        self.report_file = Path(config.METRICS_REPORT_FILE) if config.METRICS_REPORT_FILE else None
+        self.prometheus_file = Path(config.METRICS_PROMETHEUS_FILE) if config.METRICS_PROMETHEUS_FILE else None
+        self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
+        self.reset()
+        if self.enabled and config.METRICS_PORT and self._server is None:
+            self.serve(config.METRICS_PORT, config.METRICS_HOST)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self.started = time.time()
+
+    def span(self, name: str, **labels) -> Span:
+        """Context manager that records the duration of its block under name"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, labels)
+
+    def observe(self, name: str, seconds: float, error: bool = False, **labels) -> None:
+        """Record a duration measured by the caller"""
+        if not self.enabled:
+            return
+        key = (name, label_key(labels))
+        with self._lock:
+            stats = self._spans.get(key)
+            if stats is None:
+                stats = self._spans[key] = SpanStats()
+            stats.add(seconds, error)
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """Add value to a counter"""
+        if not self.enabled:
+            return
+        key = (name, label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def report(self) -> Dict:
+        """The run's spans and counters as a JSON-serialisable dict"""
+        with self._lock:
+            spans = [
+                {
+                    "name": name, "labels": dict(labels), "count": stats.count, "total": stats.total,
+                    "mean": stats.total / stats.count, "min": stats.min, "max": stats.max, "errors": stats.errors,
+                }
+                for (name, labels), stats in sorted(self._spans.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        return {
+            "started": self.started,
+            "duration": time.time() - self.started,
+            "spans": spans,
+            "counters": counters,
+        }
+
+    def summary(self) -> List[str]:
+        """One line per span name with its total time, slowest first"""
+        totals: Dict[str, SpanStats] = {}
+        with self._lock:
+            for (name, _), stats in self._spans.items():
+                merged = totals.setdefault(name, SpanStats())
+                merged.count += stats.count
+                merged.total += stats.total
+                merged.errors += stats.errors
+        return [
+            f"{name}: {stats.total:.2f}s in {stats.count} spans (avg {stats.total / stats.count:.3f}s, "
+            f"{stats.errors} failed)"
+            for name, stats in sorted(totals.items(), key=lambda item: item[1].total, reverse=True)
+        ]
+
+    def prometheus(self) -> str:
+        """The run's spans and counters in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {PROMETHEUS_PREFIX}_span_seconds Time spent in instrumented spans",
+            f"# TYPE {PROMETHEUS_PREFIX}_span_seconds summary",
+        ]
+        with self._lock:
+            spans = sorted(self._spans.items())
+            counters = sorted(self._counters.items())
+        for (name, labels), stats in spans:
+            selector = self._labels((("span", name),) + labels)
+            lines.append(f"{PROMETHEUS_PREFIX}_span_seconds_sum{selector} {stats.total:.6f}")
+            lines.append(f"{PROMETHEUS_PREFIX}_span_seconds_count{selector} {stats.count}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_span_errors_total counter")
+        for (name, labels), stats in spans:
+            lines.append(f"{PROMETHEUS_PREFIX}_span_errors_total{self._labels((('span', name),) + labels)} {stats.errors}")
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{self._labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(labels: LabelKey) -> str:
+        if not labels:
+            return ""
+        escaped = (f'{name}="{escape_label(value)}"' for name, value in labels)
+        return "{" + ",".join(escaped) + "}"
+
+    def export(self) -> None:
+        """Write the JSON run report and the Prometheus file, if configured"""
+        if not self.enabled:
+            return
+        try:
+            if self.report_file:
+                self._write(self.report_file, json.dumps(self.report(), indent=2))
+            if self.prometheus_file:
+                self._write(self.prometheus_file, self.prometheus())
+        except OSError as e:
+            self.logger.warning("Could not write metrics: %s", e)
+
+    def _write(self, path: Path, content: str) -> None:
+        """Atomically replace a file so collectors never read a partial export"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = DEFAULT_METRICS_HOST) -> None:
+        """Serve the Prometheus text format on http://<host>:<port>/metrics from a background thread"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        self.logger.info("Serving metrics on %s:%s", host, port)
+
+metrics = MetricsRegistry()
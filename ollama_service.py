@@ -1,35 +1,108 @@
-import httpx
+import asyncio
+import json
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional
 from logger import setup_logger
 from config import Config
 
+if TYPE_CHECKING:
+    import httpx
+
+# Seconds to wait for a connection to the Ollama server, capped at OLLAMA_TIMEOUT
+OLLAMA_CONNECT_TIMEOUT = 10.0
+
 class OllamaServiceError(Exception):
     """Base exception for Ollama service errors"""
     pass
 
 class OllamaService:
+    """
+    Client for the Ollama generate API.
+
+    A single pooled HTTP client is kept for the lifetime of the service so that
+    connections are reused between prompts, and `keep_alive` keeps the model
+    loaded between calls. At most OLLAMA_MAX_PARALLEL requests are sent at once
+    to match the server's own parallelism. Use the service as an async context
+    manager, or call aclose(), to release the connection pool.
+    """
+
     def __init__(self, config: Config):
         self.config = config
         self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
         self.base_url = config.OLLAMA_BASE_URL.rstrip("/")
+        self._client: Optional['httpx.AsyncClient'] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
 
-    async def generate(self, prompt: str, model: str = None) -> str:
-        """Send a prompt to Ollama and get a response."""
-        model = model or self.config.OLLAMA_MODEL
+    async def __aenter__(self) -> 'OllamaService':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    def _get_client(self) -> 'httpx.AsyncClient':
+        """Return the pooled client, creating it for the running event loop"""
+        import httpx
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            parallel = self.config.OLLAMA_MAX_PARALLEL
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(
+                    self.config.OLLAMA_TIMEOUT, connect=min(OLLAMA_CONNECT_TIMEOUT, self.config.OLLAMA_TIMEOUT)
+                ),
+                limits=httpx.Limits(max_connections=parallel, max_keepalive_connections=parallel),
+            )
+            self._semaphore = asyncio.Semaphore(parallel)
+            self._loop = loop
+        return self._client
+
+    def _payload(self, prompt: str, model: Optional[str], format: Optional[str]) -> Dict:
+        payload = {
+            "model": model or self.config.OLLAMA_MODEL,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.config.OLLAMA_KEEP_ALIVE,
+        }
+        if self.config.OLLAMA_NUM_CTX:
+            payload["options"] = {"num_ctx": self.config.OLLAMA_NUM_CTX}
+        if format:
+            payload["format"] = format
+        return payload
+
+    async def stream(self, prompt: str, model: str = None, format: Optional[str] = None) -> AsyncIterator[str]:
+        """Send a prompt to Ollama and yield response tokens as they arrive."""
+        import httpx
+        client = self._get_client()
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/generate",
-                    json={
-                        "model": model,
-                        "prompt": prompt,
-                        "stream": False
-                    }
-                )
-                response.raise_for_status()
-                return response.json().get("response", "")
+            async with self._semaphore:
+                async with client.stream("POST", "/generate", json=self._payload(prompt, model, format)) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("error"):
+                            raise OllamaServiceError(f"Ollama returned an error: {chunk['error']}")
+                        # Keep reading past the final "done" chunk so the
+                        # connection goes back to the pool instead of being closed
+                        if chunk.get("response"):
+                            yield chunk["response"]
         except httpx.HTTPError as e:
-            self.logger.error(f"Ollama API request failed: {e}")
+            self.logger.error("Ollama API request failed: %s", e)
             raise OllamaServiceError(f"Ollama request failed: {e}")
+        except OllamaServiceError:
+            raise
         except Exception as e:
-            self.logger.error(f"Unexpected error in Ollama service: {e}")
+            self.logger.error("Unexpected error in Ollama service: %s", e)
             raise OllamaServiceError(f"Ollama service error: {e}")
+
+    async def generate(self, prompt: str, model: str = None, format: Optional[str] = None) -> str:
+        """Send a prompt to Ollama and get a response."""
+        return "".join([token async for token in self.stream(prompt, model, format)])
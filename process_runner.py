@@ -0,0 +1,222 @@
+import asyncio
+import os
+import signal
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Deque, Dict, List, Optional, Sequence, Union
+from config import Config
+from logger import setup_logger
+
+READ_CHUNK_SIZE = 64 * 1024
+# Longer lines are cut so a single line cannot grow without bound
+MAX_LINE_LENGTH = 4096
+RSS_SAMPLE_INTERVAL = 0.25
+# Time a process group gets between SIGTERM and SIGKILL after a timeout
+TERMINATE_GRACE_PERIOD = 5.0
+# How long to wait for output after the main process exited
+OUTPUT_DRAIN_TIMEOUT = 5.0
+EXIT_POLL_INTERVAL = 0.05
+KILL_SIGNAL = getattr(signal, "SIGKILL", signal.SIGTERM)
+
+@dataclass
+class ProcessResult:
+    """Outcome and resource figures of one command"""
+    name: str
+    returncode: Optional[int]
+    duration: float
+    peak_rss: Optional[int] = None
+    timed_out: bool = False
+    tail: List[str] = field(default_factory=list)
+    log_path: Optional[Path] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def tail_text(self) -> str:
+        return "\n".join(self.tail)
+
+    def summary(self) -> str:
+        rss = f"{self.peak_rss / 1024 ** 2:.1f} MiB" if self.peak_rss is not None else "n/a"
+        if self.timed_out:
+            status = "timed out"
+        else:
+            status = f"exit code {self.returncode}"
+        return f"{self.name}: {status} after {self.duration:.2f}s, peak RSS {rss}"
+
+class ProcessRunner:
+    """
+    Runs commands with streamed output, timeouts and bounded memory.
+
+    Output (stdout and stderr combined) is read line by line as it is produced
+    and sent to the debug log and, optionally, a log file; only the last
+    BUILD_OUTPUT_TAIL_LINES lines are kept in memory for error reports. Every
+    command runs in its own process group, so a timeout or cancellation
+    terminates everything the command started. Peak RSS of the group is
+    sampled from /proc where available.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
+        self.tail_lines = config.BUILD_OUTPUT_TAIL_LINES
+        self.proc_available = os.path.isdir("/proc/self")
+
+    async def run(self, command: Union[str, Sequence[str]], name: str, cwd: Optional[Path] = None,
+                  timeout: Optional[float] = None, log_path: Optional[Path] = None,
+                  env: Optional[Dict[str, str]] = None) -> ProcessResult:
+        """
+        Run a command to completion.
+
+        Args:
+            command: Shell command line, or an argument list run without a shell
+            name: Label used in log messages
+            cwd: Working directory
+            timeout: Seconds before the process group is terminated, or None for no limit
+            log_path: File that receives the full output, if any
+            env: Environment of the process, or None to inherit ours
+
+        Returns:
+            ProcessResult: Exit code, duration, peak RSS and the tail of the output
+        """
+        tail: Deque[str] = deque(maxlen=self.tail_lines)
+        log_file = None
+        if log_path:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            log_file = open(log_path, "w", encoding="utf-8", errors="replace")
+
+        start = time.perf_counter()
+        process = None
+        sampler = reader = None
+        peak = [None]
+        timed_out = False
+        try:
+            spawn_options = dict(
+                cwd=cwd, env=env, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+                stdin=asyncio.subprocess.DEVNULL, start_new_session=True,
+            )
+            if isinstance(command, str):
+                process = await asyncio.create_subprocess_shell(command, **spawn_options)
+            else:
+                process = await asyncio.create_subprocess_exec(*command, **spawn_options)
+            reader = asyncio.create_task(self._read_output(process.stdout, name, tail, log_file))
+            if self.proc_available:
+                sampler = asyncio.create_task(self._sample_rss(process.pid, peak))
+
+            try:
+                await asyncio.wait_for(self._wait_exit(process), timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                self.logger.warning("%s timed out after %gs, terminating", name, timeout)
+                await self._terminate(process)
+
+            try:
+                await asyncio.wait_for(asyncio.shield(reader), OUTPUT_DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                # A background child still holds the output pipe open
+                self._signal_group(process, KILL_SIGNAL)
+                reader.cancel()
+        except asyncio.CancelledError:
+            if process and process.returncode is None:
+                self._signal_group(process, KILL_SIGNAL)
+                await self._wait_exit(process)
+            raise
+        finally:
+            for task in (reader, sampler):
+                if task and not task.done():
+                    task.cancel()
+            await asyncio.gather(*(task for task in (reader, sampler) if task), return_exceptions=True)
+            if log_file:
+                log_file.close()
+
+        return ProcessResult(
+            name=name,
+            returncode=process.returncode,
+            duration=time.perf_counter() - start,
+            peak_rss=peak[0],
+            timed_out=timed_out,
+            tail=list(tail),
+            log_path=log_path,
+        )
+
+    async def _read_output(self, stream: asyncio.StreamReader, name: str, tail: Deque[str],
+                           log_file: Optional[IO[str]]) -> None:
+        buffer = b""
+        while True:
+            chunk = await stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            if len(buffer) > MAX_LINE_LENGTH:
+                lines.append(buffer)
+                buffer = b""
+            for line in lines:
+                self._emit(line, name, tail, log_file)
+        if buffer:
+            self._emit(buffer, name, tail, log_file)
+
+    def _emit(self, raw: bytes, name: str, tail: Deque[str], log_file: Optional[IO[str]]) -> None:
+        line = raw.decode("utf-8", errors="replace").rstrip("\r")
+        if log_file:
+            log_file.write(line + "\n")
+        line = line[:MAX_LINE_LENGTH]
+        tail.append(line)
+        self.logger.debug("[%s] %s", name, line)
+
+    async def _sample_rss(self, pgid: int, peak: List[Optional[int]]) -> None:
+        while True:
+            rss = await asyncio.to_thread(self._group_rss, pgid)
+            if rss is not None and (peak[0] is None or rss > peak[0]):
+                peak[0] = rss
+            await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+    def _group_rss(self, pgid: int) -> Optional[int]:
+        """Total resident memory of the processes in a process group, in bytes"""
+        total = 0
+        found = False
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", "rb") as f:
+                    # The command name may contain spaces; fields after it are fixed
+                    fields = f.read().rsplit(b")", 1)[1].split()
+                if int(fields[2]) != pgid:
+                    continue
+                with open(f"/proc/{entry}/statm", "rb") as f:
+                    total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+                found = True
+            except (OSError, IndexError, ValueError):
+                continue
+        return total if found else None
+
+    async def _wait_exit(self, process: asyncio.subprocess.Process) -> int:
+        """
+        Wait for the main process to exit.
+
+        Process.wait() only returns once the output pipe is closed as well,
+        which never happens while a background child keeps it open.
+        """
+        while process.returncode is None:
+            await asyncio.sleep(EXIT_POLL_INTERVAL)
+        return process.returncode
+
+    async def _terminate(self, process: asyncio.subprocess.Process) -> None:
+        self._signal_group(process, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(self._wait_exit(process), TERMINATE_GRACE_PERIOD)
+        except asyncio.TimeoutError:
+            self._signal_group(process, KILL_SIGNAL)
+            await self._wait_exit(process)
+
+    def _signal_group(self, process: asyncio.subprocess.Process, sig: int) -> None:
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, sig)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
@@ -0,0 +1,305 @@
+import asyncio
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+from github.Auth import Auth
+from config import Config
+from logger import setup_logger
+from metrics import metrics
+
+# Rate limited responses are retried on top of MAX_RETRIES, once the scheduler allows it
+MAX_RATE_LIMIT_RETRIES = 5
+
+# Length of GitHub's quota window for each rate limit resource, in seconds
+RESOURCE_WINDOWS = {"core": 3600, "search": 60, "graphql": 3600}
+# How long to back off after a secondary rate limit without a Retry-After header
+SECONDARY_LIMIT_BACKOFF = 60
+# How often to check again while a token's quota is still unknown and a full burst is in flight
+UNKNOWN_QUOTA_POLL_INTERVAL = 0.05
+
+def resource_for_path(path: str) -> str:
+    """Map an API path to the rate limit resource it is counted against"""
+    if path.startswith("/search/"):
+        return "search"
+    if path.startswith("/graphql"):
+        return "graphql"
+    return "core"
+
+@dataclass
+class TokenState:
+    """Quota and pacing state of one token for one rate limit resource"""
+    token: str
+    resource: str
+    level: float
+    remaining: Optional[int] = None
+    limit: Optional[int] = None
+    reset_at: float = 0.0
+    blocked_until: float = 0.0
+    in_flight: int = 0
+    refilled_at: float = field(default_factory=time.time)
+
+    @property
+    def available(self) -> Optional[int]:
+        """Quota left once the requests still in flight are counted"""
+        return None if self.remaining is None else self.remaining - self.in_flight
+
+class GitHubRequestScheduler:
+    """
+    Central pacing point for GitHub API requests across a pool of tokens.
+
+    Each token/resource pair has a token bucket that refills at up to
+    GITHUB_MAX_REQUESTS_PER_SECOND. When a token is spending its quota faster
+    than its window allows, the refill rate drops so that the remaining quota
+    lasts until the reset, always keeping GITHUB_QUOTA_RESERVE_RATIO of the
+    limit untouched. Until the first response of a token reports its quota, at
+    most GITHUB_REQUEST_BURST of its requests are in flight. Requests go to
+    whichever token can serve them soonest, and tokens that received a
+    Retry-After or hit their limit are skipped until they recover. The scheduler is thread-safe so PyGithub calls running in
+    worker threads and async httpx calls can share it.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
+        self.tokens: List[str] = list(dict.fromkeys([config.GITHUB_TOKEN, *config.GITHUB_TOKENS]))
+        self.max_rate = config.GITHUB_MAX_REQUESTS_PER_SECOND
+        self.burst = config.GITHUB_REQUEST_BURST
+        self.reserve_ratio = config.GITHUB_QUOTA_RESERVE_RATIO
+        self.requests = 0
+        self.rate_limited = 0
+        self.wait_time = 0.0
+        self._states: Dict[Tuple[str, str], TokenState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, token: str, resource: str) -> TokenState:
+        key = (token, resource)
+        if key not in self._states:
+            self._states[key] = TokenState(token, resource, level=float(self.burst))
+        return self._states[key]
+
+    def _rate(self, state: TokenState, now: float) -> float:
+        """Refill rate of a bucket given the quota it has left"""
+        if state.remaining is None or state.limit is None or state.reset_at <= now:
+            return self.max_rate
+        budget = state.available - math.ceil(state.limit * self.reserve_ratio)
+        if budget <= 0:
+            return 0.0
+        window_left = state.reset_at - now
+        window = RESOURCE_WINDOWS.get(state.resource, 3600)
+        if budget / state.limit >= window_left / window:
+            # Spending slower than the window refills: no need to hold back
+            return self.max_rate
+        return min(self.max_rate, budget / window_left)
+
+    def _refill(self, state: TokenState, now: float) -> None:
+        if state.reset_at and now >= state.reset_at:
+            # The quota window rolled over; real numbers arrive with the next response
+            state.remaining = state.limit
+            state.reset_at = 0.0
+        state.level = min(self.burst, state.level + (now - state.refilled_at) * self._rate(state, now))
+        state.refilled_at = now
+
+    def _ready_at(self, state: TokenState, now: float) -> float:
+        ready = max(now, state.blocked_until)
+        if state.remaining is None and state.in_flight >= self.burst:
+            # Until a response reveals the quota, no more than a burst is sent
+            return max(ready, now + UNKNOWN_QUOTA_POLL_INTERVAL)
+        rate = self._rate(state, now)
+        if rate == 0:
+            return max(ready, state.reset_at)
+        if state.level < 1:
+            ready = max(ready, now + (1 - state.level) / rate)
+        return ready
+
+    def try_acquire(self, resource: str = "core") -> Tuple[Optional[str], float]:
+        """
+        Take a request slot from the token that can serve it soonest.
+
+        A slot is only taken when it is available right away, so waiting callers
+        always decide with the latest quota figures.
+
+        Returns:
+            Tuple[Optional[str], float]: The token to use, or None and the seconds to wait before trying again
+        """
+        with self._lock:
+            now = time.time()
+            best: Optional[Tuple[Tuple[float, float], TokenState]] = None
+            for token in self.tokens:
+                state = self._state(token, resource)
+                self._refill(state, now)
+                available = state.available if state.available is not None else math.inf
+                key = (self._ready_at(state, now), -available)
+                if best is None or key < best[0]:
+                    best = (key, state)
+
+            (ready, _), state = best
+            if ready > now:
+                return None, ready - now
+            state.level -= 1
+            state.in_flight += 1
+            self.requests += 1
+            return state.token, 0.0
+
+    def acquire_sync(self, resource: str = "core") -> str:
+        """Block the calling thread until a request may be sent and return its token"""
+        while True:
+            token, delay = self.try_acquire(resource)
+            if token:
+                return token
+            self._record_wait(resource, delay)
+            time.sleep(delay)
+
+    async def acquire(self, resource: str = "core") -> str:
+        """Wait until a request may be sent and return its token"""
+        while True:
+            token, delay = self.try_acquire(resource)
+            if token:
+                return token
+            self._record_wait(resource, delay)
+            await asyncio.sleep(delay)
+
+    def _record_wait(self, resource: str, delay: float) -> None:
+        with self._lock:
+            self.wait_time += delay
+        metrics.increment("github_throttle_seconds", delay, resource=resource)
+        if delay > SECONDARY_LIMIT_BACKOFF:
+            self.logger.warning("GitHub %s quota exhausted on all tokens, waiting %.0fs", resource, delay)
+
+    def update(self, token: str, headers: Mapping[str, str], status_code: int, resource: str = "core") -> bool:
+        """
+        Record the rate limit headers of a response and release its slot.
+
+        Every acquired token must be returned once, through update() or, if
+        the request failed before a response arrived, release().
+
+        Returns:
+            bool: True if the response was rejected by a rate limit and should be retried
+        """
+        headers = {key.lower(): value for key, value in headers.items()}
+        resource = headers.get("x-ratelimit-resource", resource)
+        metrics.increment("github_requests", resource=resource, status=status_code)
+        now = time.time()
+        with self._lock:
+            state = self._state(token, resource)
+            state.in_flight = max(0, state.in_flight - 1)
+            reset_at = float(headers.get("x-ratelimit-reset", 0))
+            # A response from a window that has since ended or been replaced says
+            # nothing about the current one; only later windows are taken over
+            if "x-ratelimit-remaining" in headers and reset_at > now and reset_at >= state.reset_at:
+                remaining = int(headers["x-ratelimit-remaining"])
+                if reset_at != state.reset_at or state.remaining is None:
+                    state.remaining = remaining
+                else:
+                    # Responses can arrive out of order; the lowest figure is the latest
+                    state.remaining = min(state.remaining, remaining)
+                state.limit = int(headers.get("x-ratelimit-limit", state.limit or remaining))
+                state.reset_at = reset_at
+
+            if status_code not in (403, 429):
+                return False
+            if "retry-after" in headers:
+                state.blocked_until = now + float(headers["retry-after"])
+            elif headers.get("x-ratelimit-remaining") == "0":
+                # Retried right away if the window ended while the response was on its way
+                state.blocked_until = max(state.blocked_until, reset_at)
+            elif status_code == 429:
+                state.blocked_until = now + SECONDARY_LIMIT_BACKOFF
+            else:
+                # A plain 403 is a permission error, not a rate limit
+                return False
+            self.rate_limited += 1
+        self.logger.warning(
+            "GitHub rate limit hit for %s, token backing off for %.0fs", resource, state.blocked_until - now
+        )
+        return True
+
+    def release(self, token: str, resource: str = "core") -> None:
+        """Release the slot of a request whose response was never seen"""
+        metrics.increment("github_requests", resource=resource, status=0)
+        with self._lock:
+            state = self._state(token, resource)
+            state.in_flight = max(0, state.in_flight - 1)
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} GitHub requests over {len(self.tokens)} tokens, "
+            f"{self.wait_time:.1f}s cumulative pacing delay, {self.rate_limited} rate limited responses"
+        )
+
+class ScheduledAuth(Auth):
+    """
+    PyGithub authentication that draws a token from the scheduler for every request.
+
+    PyGithub sends requests synchronously and does not hand their responses to
+    the auth, so a request's slot can only be released with its rate limit
+    headers by a caller that sees the response. Inside reporting() the
+    calling thread's token stays pending until the caller reports the
+    response with release(); the block returns any slot still pending when it
+    ends. Requests PyGithub sends anywhere else, such as lazy attribute
+    completion, are paced like every other request but released right away.
+    The pending token and the resource requests are counted against are kept
+    per thread, so concurrent calls from worker threads never mix them up.
+    """
+
+    def __init__(self, scheduler: GitHubRequestScheduler):
+        self.scheduler = scheduler
+        self._local = threading.local()
+
+    @property
+    def token_type(self) -> str:
+        return "token"
+
+    @property
+    def token(self) -> str:
+        return getattr(self._local, "pending", None) or self.scheduler.tokens[0]
+
+    @property
+    def resource(self) -> str:
+        return getattr(self._local, "resource", "core")
+
+    @contextmanager
+    def reporting(self, resource: str) -> Iterator[None]:
+        """Count the calling thread's requests in the block against resource and hold them until release()"""
+        previous = getattr(self._local, "resource", None)
+        self._local.resource = resource
+        try:
+            yield
+        finally:
+            self._release_pending()
+            if previous is None:
+                del self._local.resource
+            else:
+                self._local.resource = previous
+
+    def release(self, headers: Mapping[str, str], status_code: int) -> bool:
+        """
+        Release the slot of the calling thread's last request with its response.
+
+        Returns:
+            bool: True if the response was rejected by a rate limit
+        """
+        token = getattr(self._local, "pending", None)
+        self._local.pending = None
+        if token is None:
+            return False
+        return self.scheduler.update(token, headers, status_code, self.resource)
+
+    def _release_pending(self) -> None:
+        """Release the slot of a request whose response will not be reported"""
+        token = getattr(self._local, "pending", None)
+        self._local.pending = None
+        if token is not None:
+            self.scheduler.release(token, self.resource)
+
+    def authentication(self, headers: dict) -> None:
+        self._release_pending()
+        token = self.scheduler.acquire_sync(self.resource)
+        if hasattr(self._local, "resource"):
+            self._local.pending = token
+        else:
+            # Outside reporting() nobody reports the response
+            self.scheduler.release(token, self.resource)
+        headers["Authorization"] = f"{self.token_type} {token}"
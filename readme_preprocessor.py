@@ -0,0 +1,288 @@
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from config import Config
+from logger import setup_logger
+
+# Rough token estimate used for budgeting; close enough for English Markdown
+CHARS_PER_TOKEN = 4
+
+RELEVANT_HEADING = re.compile(
+    r"install|setup|set up|getting started|quick ?start|build|compil|usage|how to use|running|"
+    r"test|requirement|dependenc|prerequisite|development|contributing",
+    re.IGNORECASE,
+)
+SHELL_LANGUAGES = {
+    "", "sh", "bash", "shell", "console", "shell-session", "zsh", "fish",
+    "powershell", "ps1", "pwsh", "cmd", "bat", "bash-session", "make", "makefile", "dockerfile",
+}
+
+ATX_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+SETEXT_UNDERLINE = re.compile(r"^(=+|-+)\s*$")
+FENCE = re.compile(r"^\s*(```+|~~~+)\s*([\w+-]*)")
+IMAGE = re.compile(r"\[?!\[[^\]]*\]\([^)]*\)(\]\([^)]*\))?")
+HTML_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+HTML_TAG_LINE = re.compile(r"^\s*</?(img|a|p|div|picture|source|br|h\d)\b[^>]*>\s*$", re.IGNORECASE)
+LINK_REFERENCE = re.compile(r"^\s*\[[^\]]+\]:\s+\S+.*$")
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the number of LLM tokens in text"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+@dataclass
+class Section:
+    """A Markdown heading and the lines below it, up to the next heading"""
+    heading: str
+    level: int
+    lines: List[str] = field(default_factory=list)
+
+@dataclass
+class PreprocessedReadme:
+    """Build-relevant README content split into prompt-sized chunks"""
+    chunks: List[str]
+    original_tokens: int
+    kept_tokens: int
+    dropped_chunks: int = 0
+
+    def summary(self) -> str:
+        reduction = 100 * (1 - self.kept_tokens / self.original_tokens) if self.original_tokens else 0.0
+        text = (
+            f"README reduced from ~{self.original_tokens} to ~{self.kept_tokens} tokens "
+            f"({reduction:.0f}% less) in {len(self.chunks)} chunk(s)"
+        )
+        if self.dropped_chunks:
+            text += f", {self.dropped_chunks} chunk(s) over the limit dropped"
+        return text
+
+class ReadmePreprocessor:
+    """
+    Shrinks a README to the parts that matter for building it.
+
+    Sections whose heading mentions installation, building, usage or testing
+    are kept whole, together with their subsections. From every other
+    section only shell code blocks are kept. Badges, images, HTML comments and
+    link reference lines are removed throughout. When nothing build-related
+    is found the cleaned README is used as is. The result is split into chunks
+    of at most README_TOKEN_BUDGET tokens, and at most README_MAX_CHUNKS chunks
+    are analysed.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
+        self.token_budget = config.README_TOKEN_BUDGET
+        self.max_chunks = config.README_MAX_CHUNKS
+
+    def process(self, readme_content: str) -> PreprocessedReadme:
+        """
+        Extract the build-relevant content of a README.
+
+        Args:
+            readme_content: Raw Markdown README
+
+        Returns:
+            PreprocessedReadme: Chunks to analyse and the token counts before and after
+        """
+        original_tokens = estimate_tokens(readme_content)
+        sections = self._parse_sections(self._strip_noise(readme_content))
+        blocks = self._select(sections)
+        if not blocks:
+            blocks = [self._render(section) for section in sections]
+        blocks = [block for block in blocks if block.strip()]
+
+        chunks = self._chunk(blocks)
+        dropped = max(0, len(chunks) - self.max_chunks)
+        if dropped:
+            self.logger.warning("README split into %s chunks, analysing the first %s", len(chunks), self.max_chunks)
+            chunks = chunks[:self.max_chunks]
+        kept_tokens = sum(estimate_tokens(chunk) for chunk in chunks)
+        return PreprocessedReadme(chunks or [readme_content], original_tokens, kept_tokens, dropped)
+
+    def _strip_noise(self, text: str) -> str:
+        text = HTML_COMMENT.sub("", text)
+        lines = []
+        in_fence = False
+        for line in text.splitlines():
+            if FENCE.match(line):
+                in_fence = not in_fence
+            elif not in_fence:
+                if HTML_TAG_LINE.match(line) or LINK_REFERENCE.match(line):
+                    continue
+                line = IMAGE.sub("", line)
+                if not line.strip() and lines and not lines[-1].strip():
+                    continue
+            lines.append(line.rstrip())
+        return "\n".join(lines)
+
+    def _parse_sections(self, text: str) -> List[Section]:
+        sections = [Section("", 0)]
+        lines = text.splitlines()
+        in_fence = False
+        for index, line in enumerate(lines):
+            if FENCE.match(line):
+                in_fence = not in_fence
+            if not in_fence:
+                heading = self._heading(line, lines[index + 1] if index + 1 < len(lines) else "")
+                if heading:
+                    sections.append(Section(heading[1], heading[0], [line]))
+                    continue
+                if SETEXT_UNDERLINE.match(line) and len(sections[-1].lines) == 1 and sections[-1].level:
+                    # Underline of the setext heading that opened this section
+                    sections[-1].lines.append(line)
+                    continue
+            sections[-1].lines.append(line)
+        return sections
+
+    def _heading(self, line: str, next_line: str) -> Optional[Tuple[int, str]]:
+        match = ATX_HEADING.match(line)
+        if match:
+            return len(match.group(1)), match.group(2)
+        if line.strip() and not line.startswith((" ", "\t", "-", "*", "|")) and SETEXT_UNDERLINE.match(next_line):
+            return (1 if next_line.startswith("=") else 2), line.strip()
+        return None
+
+    def _select(self, sections: List[Section]) -> List[str]:
+        """Keep relevant sections whole and only shell code blocks from the rest"""
+        blocks = []
+        relevant_level = None
+        for section in sections:
+            if relevant_level is not None and (section.level == 0 or section.level > relevant_level):
+                blocks.append(self._render(section))
+                continue
+            relevant_level = None
+            if section.level and RELEVANT_HEADING.search(section.heading):
+                relevant_level = section.level
+                blocks.append(self._render(section))
+                continue
+            code = self._shell_blocks(section.lines)
+            if code:
+                title = f"{'#' * max(section.level, 1)} {section.heading}" if section.heading else ""
+                blocks.append("\n".join([title, *code]).strip())
+        return blocks
+
+    def _shell_blocks(self, lines: List[str]) -> List[str]:
+        blocks = []
+        current: Optional[List[str]] = None
+        keep = False
+        for line in lines:
+            match = FENCE.match(line)
+            if current is None:
+                if match:
+                    current = [line]
+                    keep = match.group(2).lower() in SHELL_LANGUAGES
+                continue
+            current.append(line)
+            if match:
+                if keep:
+                    blocks.append("\n".join(current))
+                current = None
+        return blocks
+
+    def _render(self, section: Section) -> str:
+        return "\n".join(section.lines).strip()
+
+    def _chunk(self, blocks: List[str]) -> List[str]:
+        """Pack blocks into chunks of at most token_budget tokens"""
+        max_chars = self.token_budget * CHARS_PER_TOKEN
+        pieces = []
+        for block in blocks:
+            if len(block) <= max_chars:
+                pieces.append(block)
+            else:
+                pieces.extend(self._split(block, max_chars))
+
+        chunks = []
+        current = ""
+        for piece in pieces:
+            if current and len(current) + len(piece) + 2 > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _split(self, block: str, max_chars: int) -> List[str]:
+        """Split an oversized block on line boundaries, hard-wrapping very long lines"""
+        parts = []
+        current = ""
+        for line in block.splitlines():
+            while len(line) > max_chars:
+                if current:
+                    parts.append(current)
+                    current = ""
+                parts.append(line[:max_chars])
+                line = line[max_chars:]
+            if current and len(current) + len(line) + 1 > max_chars:
+                parts.append(current)
+                current = ""
+            current = f"{current}\n{line}" if current else line
+        if current:
+            parts.append(current)
+        return parts
+
+def merge_analyses(results: List[Optional[Dict]]) -> Optional[Dict]:
+    """
+    Merge the analyses of several README chunks into one.
+
+    Dependencies and steps are concatenated in chunk order, dropping repeats.
+    Step ids only have to be unique within a chunk, so an id that an earlier
+    chunk already used is prefixed with the chunk number. `depends_on` entries
+    are rewritten to the renamed ids, and to the kept step when a repeat was
+    dropped.
+    """
+    results = [result for result in results if result]
+    if not results:
+        return None
+    merged: Dict[str, List] = {"dependencies": [], "setup_steps": [], "build_steps": [], "test_steps": []}
+    # Position of the kept item in merged[key] by its repr, or by its command for steps
+    seen: Dict[str, Dict[str, int]] = {key: {} for key in merged}
+    used_ids = set()
+    for chunk, result in enumerate(results, 1):
+        renamed: Dict[str, str] = {}
+        added: List[Tuple[str, int]] = []
+        for key, values in merged.items():
+            items = result.get(key) or []
+            if isinstance(items, str):
+                items = [items]
+            for item in items:
+                marker = repr(item.get("command", item)) if isinstance(item, dict) else repr(item)
+                step_id = str(item["id"]) if isinstance(item, dict) and item.get("id") is not None else None
+                if marker in seen[key]:
+                    if step_id is not None:
+                        renamed[step_id] = _step_id(values, seen[key][marker], step_id, chunk, used_ids)
+                    continue
+                if step_id is not None:
+                    unique_id = _unique_id(step_id, chunk, used_ids)
+                    if unique_id != step_id:
+                        renamed[step_id] = unique_id
+                        item = {**item, "id": unique_id}
+                seen[key][marker] = len(values)
+                added.append((key, len(values)))
+                values.append(item)
+        # Rewritten once the whole chunk is in, since a step may depend on one listed after it
+        for key, position in added:
+            item = merged[key][position]
+            if renamed and isinstance(item, dict) and item.get("depends_on"):
+                depends_on = item["depends_on"]
+                depends_on = [depends_on] if isinstance(depends_on, str) else depends_on
+                merged[key][position] = {**item, "depends_on": [renamed.get(str(dep), dep) for dep in depends_on]}
+    return merged
+
+def _unique_id(step_id: str, chunk: int, used_ids: Set[str]) -> str:
+    """Reserve step_id, prefixed with the chunk number if an earlier chunk used it"""
+    unique_id = step_id
+    while unique_id in used_ids:
+        unique_id = f"{chunk}.{unique_id}"
+    used_ids.add(unique_id)
+    return unique_id
+
+def _step_id(values: List, position: int, step_id: str, chunk: int, used_ids: Set[str]) -> str:
+    """Id of the kept step at position, giving it step_id if it has none so references to the repeat still resolve"""
+    kept = values[position]
+    if isinstance(kept, dict) and kept.get("id") is not None:
+        return str(kept["id"])
+    unique_id = _unique_id(step_id, chunk, used_ids)
+    values[position] = {**kept, "id": unique_id} if isinstance(kept, dict) else {"command": kept, "id": unique_id}
+    return unique_id
@@ -0,0 +1,331 @@
+import asyncio
+import hashlib
+import os
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+from blob_store import BlobStore
+from config import Config
+from exceptions import GitHubServiceError
+from github_api import GitHubApiClient
+from logger import setup_logger
+
+# Directories that are never part of a repository's content
+IGNORED_DIRECTORIES = {".git"}
+EMPTY_TREE_SHA = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+@dataclass
+class FileChange:
+    """A file that differs between two repositories; sizes are None on the side it is missing from"""
+    path: str
+    status: str
+    old_size: Optional[int] = None
+    new_size: Optional[int] = None
+
+    def summary(self) -> str:
+        if self.status == "modified":
+            sizes = f"{self.old_size} -> {self.new_size} bytes"
+        else:
+            sizes = f"{self.new_size if self.old_size is None else self.old_size} bytes"
+        return f"{self.status}: {self.path} ({sizes})"
+
+@dataclass
+class TreeNode:
+    """
+    A directory in git tree form.
+
+    The SHA covers the whole subtree, so two directories with the same SHA
+    have the same content. Remote subtrees are loaded on demand; until then
+    only their SHA is known.
+    """
+    sha: str
+    files: Dict[str, Tuple[str, int]] = field(default_factory=dict)
+    dirs: Dict[str, 'TreeNode'] = field(default_factory=dict)
+    loaded: bool = True
+
+@dataclass
+class ComparisonResult:
+    """Differences between a base repository and the one compared against it"""
+    added: List[FileChange] = field(default_factory=list)
+    removed: List[FileChange] = field(default_factory=list)
+    modified: List[FileChange] = field(default_factory=list)
+    skipped_trees: int = 0
+    duration: float = 0.0
+
+    @property
+    def identical(self) -> bool:
+        return not (self.added or self.removed or self.modified)
+
+    def changes(self) -> List[FileChange]:
+        return sorted(self.added + self.removed + self.modified, key=lambda change: change.path)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.removed)} removed, {len(self.modified)} modified, "
+            f"{self.skipped_trees} identical subtrees skipped in {self.duration:.2f}s"
+        )
+
+def tree_sha(entries: List[Tuple[str, str, str]]) -> str:
+    """
+    Git tree SHA of a directory.
+
+    Args:
+        entries: (mode, name, sha) of every file and non-empty subdirectory
+
+    Returns:
+        str: The SHA git would give the tree
+    """
+    # git orders subtrees as if their name ended with a slash
+    entries = sorted(entries, key=lambda entry: os.fsencode(entry[1]) + (b"/" if entry[0] == "40000" else b""))
+    body = b"".join(
+        f"{mode} ".encode() + os.fsencode(name) + b"\0" + bytes.fromhex(sha) for mode, name, sha in entries
+    )
+    return hashlib.sha1(b"tree %d\0" % len(body) + body).hexdigest()
+
+class RepositoryComparer:
+    """
+    Content-aware comparison of two repositories.
+
+    Both sides are turned into Merkle trees whose directory hashes are git
+    tree SHAs, and the trees are walked together: a pair of directories with
+    the same SHA is skipped without looking inside, so the cost grows with
+    the size of the difference rather than the size of the repositories.
+
+    Local trees are built from os.scandir listings, with file contents
+    hashed in a pool of COMPARE_MAX_WORKERS threads. Files hardlinked to the
+    same blob, as in working copies that share the blob store, are hashed
+    once. Remote trees come straight from the GitHub tree API, so two remote
+    repositories are compared without downloading either of them.
+    """
+
+    def __init__(self, config: Config, api: Optional[GitHubApiClient] = None):
+        self.config = config
+        self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
+        self.api = api
+        self.max_workers = config.COMPARE_MAX_WORKERS
+
+    async def compare_local(self, base_path: Path, other_path: Path) -> ComparisonResult:
+        """
+        Compare two directories on disk.
+
+        Args:
+            base_path: Repository the changes are relative to
+            other_path: Repository compared against it
+
+        Returns:
+            ComparisonResult: Files only in other_path (added), only in base_path (removed)
+            and in both with different content (modified)
+        """
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="compare") as executor:
+            base, other = await asyncio.gather(
+                loop.run_in_executor(executor, self._scan, Path(base_path)),
+                loop.run_in_executor(executor, self._scan, Path(other_path)),
+            )
+            # Hashing waits on the pool, so it is driven from outside it
+            await asyncio.to_thread(self._hash_files, base + other, executor)
+        base_tree, other_tree = await asyncio.to_thread(
+            lambda: (self._build_tree(base[0][1]), self._build_tree(other[0][1]))
+        )
+
+        result = ComparisonResult()
+        await self._diff(base_tree, other_tree, "", result)
+        result.duration = time.perf_counter() - start
+        self.logger.info("Compared %s with %s: %s", base_path, other_path, result.summary())
+        return result
+
+    async def compare_remote(self, base: Tuple[str, str], other: Tuple[str, str]) -> ComparisonResult:
+        """
+        Compare two GitHub repositories through their git trees.
+
+        Args:
+            base: ("owner/repo", branch) of the repository the changes are relative to
+            other: ("owner/repo", branch) of the repository compared against it
+
+        Returns:
+            ComparisonResult: The differences between the heads of both branches
+
+        Raises:
+            GitHubServiceError: If no API client was given or a tree could not be fetched
+        """
+        if self.api is None:
+            raise GitHubServiceError("Remote comparison needs a GitHub API client")
+        start = time.perf_counter()
+        base_sha, other_sha = await asyncio.gather(self._root_tree_sha(*base), self._root_tree_sha(*other))
+        base_tree = TreeNode(base_sha, loaded=False)
+        other_tree = TreeNode(other_sha, loaded=False)
+        # Subtrees are only fetched when their SHAs differ, so both sides share one cache
+        trees: Dict[str, asyncio.Future] = {}
+        result = ComparisonResult()
+        await self._diff(base_tree, other_tree, "", result, (base[0], other[0]), trees)
+        result.duration = time.perf_counter() - start
+        self.logger.info("Compared %s@%s with %s@%s: %s", base[0], base[1], other[0], other[1], result.summary())
+        return result
+
+    def _scan(self, root: Path) -> List[Tuple[Path, Dict]]:
+        """
+        List a directory tree with os.scandir.
+
+        Returns a list of (path, listing) in walk order, each listing holding
+        the stat data of its files and the listings of its subdirectories, so
+        the first entry is the root.
+        """
+        listings = []
+        pending = [(root, {"files": {}, "dirs": {}})]
+        while pending:
+            path, listing = pending.pop()
+            listings.append((path, listing))
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in IGNORED_DIRECTORIES:
+                                child = {"files": {}, "dirs": {}}
+                                listing["dirs"][entry.name] = child
+                                pending.append((Path(entry.path), child))
+                        elif entry.is_file(follow_symlinks=False) or entry.is_symlink():
+                            info = entry.stat(follow_symlinks=False)
+                            listing["files"][entry.name] = {
+                                "path": entry.path, "stat": info, "sha": None,
+                            }
+            except OSError as e:
+                self.logger.warning("Cannot list %s: %s", path, e)
+        return listings
+
+    def _hash_files(self, listings: List[Tuple[Path, Dict]], executor: ThreadPoolExecutor) -> None:
+        """Fill in the blob SHA of every listed file, hashing each inode once"""
+        by_inode: Dict[Tuple[int, int], List[Dict]] = {}
+        for _, listing in listings:
+            for record in listing["files"].values():
+                info = record["stat"]
+                key = (info.st_dev, info.st_ino) if info.st_ino else (id(record), 0)
+                by_inode.setdefault(key, []).append(record)
+        groups = list(by_inode.values())
+        for group, sha in zip(groups, executor.map(self._file_sha, (group[0] for group in groups))):
+            for record in group:
+                record["sha"] = sha
+
+    def _file_sha(self, record: Dict) -> str:
+        if stat.S_ISLNK(record["stat"].st_mode):
+            target = os.fsencode(os.readlink(record["path"]))
+            return hashlib.sha1(b"blob %d\0" % len(target) + target).hexdigest()
+        try:
+            return BlobStore.blob_sha(Path(record["path"]))
+        except OSError as e:
+            # Unreadable files compare as different from everything
+            self.logger.warning("Cannot read %s: %s", record['path'], e)
+            return hashlib.sha1(os.fsencode(record["path"])).hexdigest()
+
+    def _build_tree(self, listing: Dict) -> TreeNode:
+        """Turn a hashed listing into a TreeNode, computing tree SHAs bottom up"""
+        node = TreeNode(EMPTY_TREE_SHA)
+        entries = []
+        for name, record in listing["files"].items():
+            mode = record["stat"].st_mode
+            if stat.S_ISLNK(mode):
+                git_mode = "120000"
+            else:
+                git_mode = "100755" if mode & stat.S_IXUSR else "100644"
+            node.files[name] = (record["sha"], record["stat"].st_size)
+            entries.append((git_mode, name, record["sha"]))
+        for name, child_listing in listing["dirs"].items():
+            child = self._build_tree(child_listing)
+            # git does not record empty directories
+            if child.files or child.dirs:
+                node.dirs[name] = child
+                entries.append(("40000", name, child.sha))
+        node.sha = tree_sha(entries)
+        return node
+
+    async def _root_tree_sha(self, full_name: str, branch: str) -> str:
+        head = await self.api.get_json(f"/repos/{full_name}/branches/{quote(branch, safe='')}")
+        return head["commit"]["commit"]["tree"]["sha"]
+
+    async def _load(self, node: TreeNode, full_name: str, trees: Dict[str, asyncio.Future]) -> None:
+        """Fetch the entries of a remote tree that is only known by its SHA"""
+        if node.loaded:
+            return
+        if node.sha not in trees:
+            trees[node.sha] = asyncio.ensure_future(
+                self.api.get_json(f"/repos/{full_name}/git/trees/{node.sha}")
+            )
+        data = await trees[node.sha]
+        for entry in data["tree"]:
+            if entry["type"] == "blob":
+                node.files[entry["path"]] = (entry["sha"], entry.get("size", 0))
+            elif entry["type"] == "tree":
+                node.dirs[entry["path"]] = TreeNode(entry["sha"], loaded=False)
+        node.loaded = True
+
+    async def _load_all(self, node: TreeNode, full_name: str, trees: Dict[str, asyncio.Future]) -> None:
+        """Fetch a whole remote subtree, in a single request unless GitHub truncates it"""
+        if node.loaded:
+            await asyncio.gather(*(self._load_all(child, full_name, trees) for child in node.dirs.values()))
+            return
+        data = await self.api.get_json(f"/repos/{full_name}/git/trees/{node.sha}", params={"recursive": "1"})
+        if data.get("truncated"):
+            await self._load(node, full_name, trees)
+            await asyncio.gather(*(self._load_all(child, full_name, trees) for child in node.dirs.values()))
+            return
+        nodes = {"": node}
+        for entry in data["tree"]:
+            parent_path, _, name = entry["path"].rpartition("/")
+            parent = nodes[parent_path]
+            if entry["type"] == "blob":
+                parent.files[name] = (entry["sha"], entry.get("size", 0))
+            elif entry["type"] == "tree":
+                nodes[entry["path"]] = parent.dirs[name] = TreeNode(entry["sha"])
+        node.loaded = True
+
+    async def _diff(self, base: TreeNode, other: TreeNode, prefix: str, result: ComparisonResult,
+                    remotes: Optional[Tuple[str, str]] = None,
+                    trees: Optional[Dict[str, asyncio.Future]] = None) -> None:
+        if base.sha == other.sha:
+            result.skipped_trees += 1
+            return
+        if remotes:
+            await asyncio.gather(self._load(base, remotes[0], trees), self._load(other, remotes[1], trees))
+
+        for name in sorted(base.files.keys() | other.files.keys()):
+            path = prefix + name
+            if name not in other.files:
+                result.removed.append(FileChange(path, "removed", old_size=base.files[name][1]))
+            elif name not in base.files:
+                result.added.append(FileChange(path, "added", new_size=other.files[name][1]))
+            elif base.files[name][0] != other.files[name][0]:
+                result.modified.append(
+                    FileChange(path, "modified", old_size=base.files[name][1], new_size=other.files[name][1])
+                )
+
+        subtrees = []
+        for name in sorted(base.dirs.keys() | other.dirs.keys()):
+            path = f"{prefix}{name}/"
+            if name not in other.dirs:
+                subtrees.append(self._collect(base.dirs[name], path, result.removed, "removed",
+                                              remotes[0] if remotes else None, trees))
+            elif name not in base.dirs:
+                subtrees.append(self._collect(other.dirs[name], path, result.added, "added",
+                                              remotes[1] if remotes else None, trees))
+            else:
+                subtrees.append(self._diff(base.dirs[name], other.dirs[name], path, result, remotes, trees))
+        await asyncio.gather(*subtrees)
+
+    async def _collect(self, node: TreeNode, prefix: str, changes: List[FileChange], status: str,
+                       full_name: Optional[str], trees: Optional[Dict[str, asyncio.Future]]) -> None:
+        """Report every file of a directory that exists on one side only"""
+        if full_name:
+            await self._load_all(node, full_name, trees)
+        pending = [(node, prefix)]
+        while pending:
+            node, prefix = pending.pop()
+            for name, (_, size) in sorted(node.files.items()):
+                if status == "added":
+                    changes.append(FileChange(prefix + name, status, new_size=size))
+                else:
+                    changes.append(FileChange(prefix + name, status, old_size=size))
+            pending.extend((child, f"{prefix}{name}/") for name, child in node.dirs.items())
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import quote
+from download_engine import ConcurrentDownloader, DownloadStats, executable_paths
+from exceptions import GitHubServiceError
+
+MANIFEST_DIRECTORY = ".manifests"
+
+class RepositorySync(ConcurrentDownloader):
+    """
+    Keeps a local working copy in step with the default branch using git tree SHAs.
+
+    A manifest of path -> blob SHA is stored per repository under
+    BASE_DIRECTORY/.manifests/owner. Only blobs that were added or changed upstream are
+    downloaded and files removed upstream are deleted. Local edits to tracked
+    files are not detected; remove the manifest to force a full download. A
+    working copy that was hardlinked to the blob store is downloaded again in
+    full before it is synced for a build, so no build can write to a blob.
+    """
+
+    async def sync(self, full_name: str, branch: str, repo_path: Path) -> DownloadStats:
+        """
+        Bring repo_path up to date with the head of branch.
+
+        An unchanged repository costs a single branch lookup and no file writes.
+
+        Args:
+            full_name: Repository name in "owner/repo" form
+            branch: Branch to follow, normally the default branch
+            repo_path: Working directory of the repository
+
+        Returns:
+            DownloadStats: Throughput figures for the blobs that were fetched
+
+        Raises:
+            GitHubServiceError: If the tree or any changed blob could not be fetched
+        """
+        stats = DownloadStats()
+        head = await self.api.get_json(f"/repos/{full_name}/branches/{quote(branch, safe='')}")
+        commit_sha = head["commit"]["sha"]
+        tree_sha = head["commit"]["commit"]["tree"]["sha"]
+
+        manifest_path = self._manifest_path(full_name)
+        manifest = self._load_manifest(manifest_path, full_name) if repo_path.exists() else None
+        if manifest and manifest.get("hardlinked", True) and not self.hardlink:
+            self.logger.info("%s holds hardlinked blobs, downloading it again", repo_path)
+            manifest = None
+        if manifest and manifest["commit"] == commit_sha:
+            stats.finished = time.perf_counter()
+            self.logger.info("%s is up to date at %s", full_name, commit_sha[:7])
+            return stats
+        if manifest is None and repo_path.exists():
+            self.logger.info("No manifest for %s, starting from an empty directory", repo_path)
+            shutil.rmtree(repo_path)
+        repo_path.mkdir(parents=True, exist_ok=True)
+
+        tree = await self.api.get_json(f"/repos/{full_name}/git/trees/{tree_sha}", params={"recursive": "1"})
+        if tree.get("truncated"):
+            raise GitHubServiceError(f"Tree for {full_name} is too large for an incremental sync")
+
+        remote = {entry["path"]: entry["sha"] for entry in tree["tree"] if entry["type"] == "blob"}
+        executables = executable_paths(tree["tree"])
+        local: Dict[str, str] = manifest["files"] if manifest else {}
+        local_executables = set(manifest.get("executables", [])) if manifest else set()
+        changed = [
+            path for path, sha in remote.items()
+            if local.get(path) != sha or (path in executables) != (path in local_executables)
+        ]
+        removed = [path for path in local if path not in remote]
+        self.logger.info(
+            "Syncing %s to %s: %s changed, %s removed", full_name, commit_sha[:7], len(changed), len(removed)
+        )
+
+        for path in removed:
+            self._remove_file(repo_path, path)
+
+        tasks = []
+        for path in changed:
+            file_path = repo_path / path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            url = f"{self.config.GITHUB_RAW_URL}/{full_name}/{commit_sha}/{quote(path)}"
+            tasks.append(self._download_file(path, url, file_path, stats, remote[path]))
+        await asyncio.gather(*tasks)
+        self._apply_modes(repo_path, executables, changed)
+        stats.finished = time.perf_counter()
+        self._record_metrics(stats)
+
+        self.logger.info("Synced %s: %s", full_name, stats.summary())
+        if stats.failed:
+            # Keep the previous manifest so the failed paths are retried next time
+            raise GitHubServiceError(
+                f"Failed to download {len(stats.failed)} files from {full_name}: {', '.join(stats.failed[:10])}"
+            )
+
+        self._save_manifest(manifest_path, {
+            "repository": full_name, "commit": commit_sha, "files": remote,
+            "executables": sorted(executables), "hardlinked": self.hardlink and self.blob_store is not None,
+        })
+        return stats
+
+    def _manifest_path(self, full_name: str) -> Path:
+        owner, name = full_name.split("/")
+        return Path(self.config.BASE_DIRECTORY) / MANIFEST_DIRECTORY / owner / f"{name}.json"
+
+    def _load_manifest(self, manifest_path: Path, full_name: str) -> Optional[Dict]:
+        """Load a manifest, ignoring it if it is unreadable or belongs to another repository"""
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if manifest.get("repository") != full_name:
+            return None
+        return manifest
+
+    def _save_manifest(self, manifest_path: Path, manifest: Dict):
+        """Atomically replace the manifest"""
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp_path, manifest_path)
+
+    def _remove_file(self, repo_path: Path, path: str):
+        """Delete a file removed upstream along with any directories it leaves empty"""
+        file_path = repo_path / path
+        file_path.unlink(missing_ok=True)
+        self.logger.debug("Removed file: %s", file_path)
+        parent = file_path.parent
+        while parent != repo_path and parent.exists() and not any(parent.iterdir()):
+            parent.rmdir()
+            parent = parent.parent
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from enum import Enum
+from pathlib import Path, PurePath
+from typing import Any, Dict, Optional, Tuple
+from constants import DEFAULT_CACHE_MAX_ENTRIES, DEFAULT_CACHE_MAX_BYTES, DEFAULT_CACHE_TTL
+
+CACHE_FILENAME = "cache.sqlite3"
+# Least recently used entries read per step while evicting down to max_bytes
+EVICTION_BATCH = 64
+# Access times of hits are kept in memory and written once this many are pending,
+# or once the oldest is this many seconds old, so readers rarely take the write lock
+ACCESS_BATCH = 64
+ACCESS_FLUSH_INTERVAL = 30.0
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS entries ("
+    "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+    "created REAL NOT NULL, accessed REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)",
+    "CREATE INDEX IF NOT EXISTS entries_created ON entries (created)",
+    # Running totals, so bounds are checked without scanning the table
+    "CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), "
+    "entries INTEGER NOT NULL, bytes INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO totals SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM entries",
+    "CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN "
+    "UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size; END",
+    "CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN "
+    "UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size; END",
+    "CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries BEGIN "
+    "UPDATE totals SET bytes = bytes + NEW.size - OLD.size; END",
+)
+
+class ResultCache:
+    """
+    Bounded key/value cache for function results backed by SQLite.
+
+    With a cache_path the entries are stored on disk and shared safely between
+    processes through SQLite's WAL journal; without one they live in memory for
+    the lifetime of the process. Entries expire after ttl seconds and the least
+    recently used ones are evicted once max_entries or max_bytes is exceeded.
+    Triggers keep the entry count and total size in a one-row table, so a
+    write costs the same however large the cache is. Access times of hits are
+    written in batches, and always before entries are evicted, so a hit is
+    normally a read-only transaction.
+    """
+
+    def __init__(self, cache_path: Optional[Path] = None, ttl: Optional[float] = DEFAULT_CACHE_TTL,
+                 max_entries: int = DEFAULT_CACHE_MAX_ENTRIES, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # Access times of hits not yet written, by key
+        self._accessed: Dict[str, float] = {}
+        self._accessed_since = 0.0
+
+    @staticmethod
+    def make_key(name: str, args: Tuple, kwargs: Dict) -> str:
+        """
+        Derive a stable key from a function name and its arguments.
+
+        Arguments must be JSON values, paths or enum members, whose keys are the
+        same in every run.
+
+        Raises:
+            TypeError: If an argument has no stable representation
+        """
+        payload = json.dumps([name, list(args), kwargs], sort_keys=True, default=_key_default)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not be shared with forked children
+        if self._conn is None or self._pid != os.getpid():
+            if self.cache_path:
+                self.cache_path.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.cache_path / CACHE_FILENAME, timeout=30, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+            else:
+                conn = sqlite3.connect(":memory:", check_same_thread=False)
+            # The totals must be seeded in the same transaction that adds the triggers
+            conn.execute("BEGIN IMMEDIATE")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a key.
+
+        Returns:
+            Tuple[bool, Any]: (True, value) on a hit, (False, None) on a miss
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return False, None
+            if not self._accessed:
+                self._accessed_since = now
+            self._accessed[key] = now
+            if len(self._accessed) >= ACCESS_BATCH or now - self._accessed_since >= ACCESS_FLUSH_INTERVAL:
+                self._write_accessed(conn)
+                conn.commit()
+            self.hits += 1
+        return True, pickle.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value and evict entries beyond the configured bounds"""
+        data = pickle.dumps(value)
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the triggers
+            conn.execute(
+                "INSERT INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "created = excluded.created, accessed = excluded.accessed",
+                (key, data, len(data), now, now),
+            )
+            self._write_accessed(conn)
+            self._evict(conn, now)
+            conn.commit()
+
+    def _write_accessed(self, conn: sqlite3.Connection) -> None:
+        """Write the pending access times of hits, keeping any later time another process wrote"""
+        if self._accessed:
+            conn.executemany(
+                "UPDATE entries SET accessed = MAX(accessed, ?) WHERE key = ?",
+                [(accessed, key) for key, accessed in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl is not None:
+            conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl,))
+        count, total = conn.execute("SELECT entries, bytes FROM totals").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            total = conn.execute("SELECT bytes FROM totals").fetchone()[0]
+        while total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed LIMIT ?", (EVICTION_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            evicted = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+            self._accessed.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this process and the current number of entries"""
+        with self._lock:
+            entries, size = self._connect().execute("SELECT entries, bytes FROM totals").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+def _key_default(value: Any) -> Any:
+    """JSON form of the non-JSON arguments make_key accepts"""
+    if isinstance(value, PurePath):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(
+        f"Cannot derive a stable cache key from a {type(value).__name__} argument; "
+        "pass JSON values, paths or enum members"
+    )
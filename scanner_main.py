@@ -1,15 +1,80 @@
+import argparse
 import asyncio
+import multiprocessing
+from typing import Optional
 from config import Config
+from logger import use_process_log_file
 from scanner_service import ScannerService
+from work_queue import WorkQueue
 
-async def main():
-    config = Config.from_yaml()
-    config.validate()
-    
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Search for and audit GitHub repositories")
+    parser.add_argument("--keyword", help="search keyword; prompted for when neither it nor --queue is given")
+    parser.add_argument(
+        "--queue", action="store_true",
+        help="queue the search results in the persistent work queue and audit everything queued",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="worker processes draining the queue (default: SCANNER_WORKERS)",
+    )
+    parser.add_argument("--status", action="store_true", help="print the work queue's state and exit")
+    return parser.parse_args()
+
+async def scan(config: Config, keyword: Optional[str]):
     scanner = ScannerService(config)
-    keyword = input("Enter keyword to scan: ").strip()
+    keyword = keyword or input("Enter keyword to scan: ").strip()
     if keyword:
         await scanner.scan_and_audit(keyword)
 
+async def enqueue(config: Config, keyword: str):
+    await ScannerService(config).enqueue(keyword)
+
+async def drain(config: Config):
+    await ScannerService(config).drain_queue()
+
+def run_worker(config: Config, own_log_file: bool = False):
+    """Entry point of a worker process"""
+    if own_log_file:
+        use_process_log_file()
+    try:
+        asyncio.run(drain(config))
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    args = parse_args()
+    config = Config.from_yaml()
+    config.validate()
+
+    if args.status:
+        print(WorkQueue(config).summary())
+        return
+    if not args.queue:
+        asyncio.run(scan(config, args.keyword))
+        return
+
+    if args.keyword:
+        asyncio.run(enqueue(config, args.keyword))
+    workers = args.workers or config.SCANNER_WORKERS
+    if workers <= 1:
+        run_worker(config)
+        return
+    # Spawned rather than forked, so no worker inherits the parent's threads or connections
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(config, True), name=f"scanner-worker-{i}")
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Workers receive the interrupt too and return their leases before exiting
+        for process in processes:
+            process.join()
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
@@ -1,36 +1,333 @@
 import asyncio
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set
 from github_service import GitHubService
 from auto_builder import AutoBuilder
 from config import Config
-from logger import setup_logger
+from logger import configure_logging, setup_logger
+from metrics import metrics
+from work_queue import WorkQueue, worker_id
+
+# Seconds between work queue checks while other workers hold the remaining repositories
+QUEUE_POLL_INTERVAL = 1.0
+
+def pushed_at(repo) -> Optional[str]:
+    """Timestamp of a repository's latest push as stored in the work queue"""
+    return repo.pushed_at.isoformat() if getattr(repo, "pushed_at", None) else None
+
+@dataclass
+class ScanItem:
+    """A repository travelling through the scanner pipeline"""
+    full_name: str
+    repo: Optional[object] = None
+    readme_content: Optional[str] = None
+    repo_path: Optional[Path] = None
+    pushed_at: Optional[str] = None
+    # Leased from the work queue, which must hear how the audit ended
+    leased: bool = False
+    # Dropped because there is nothing to audit before the next push, not
+    # because a backend failed; only then is the drop marked as audited
+    nothing_to_audit: bool = False
+
+@dataclass
+class StageStats:
+    """Throughput and queueing figures for one pipeline stage"""
+    name: str
+    workers: int
+    processed: int = 0
+    dropped: int = 0
+    failed: int = 0
+    busy_time: float = 0.0
+    queue_wait: float = 0.0
+
+    def summary(self, elapsed: float) -> str:
+        handled = self.processed + self.dropped + self.failed
+        throughput = self.processed / elapsed if elapsed else 0.0
+        avg_busy = self.busy_time / handled if handled else 0.0
+        avg_wait = self.queue_wait / handled if handled else 0.0
+        return (
+            f"{self.name}: {self.processed} passed, {self.dropped} dropped, {self.failed} failed, "
+            f"{throughput:.2f} items/s, avg {avg_busy:.2f}s busy, avg {avg_wait:.2f}s queued "
+            f"({self.workers} workers)"
+        )
 
 class ScannerService:
     def __init__(self, config: Config):
         self.config = config
+        configure_logging(config)
         self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
+        metrics.configure(config)
         self.github_service = GitHubService(config)
         self.auto_builder = AutoBuilder(config)
+        self.work_queue = WorkQueue(config)
+        self.worker_id = worker_id()
+        self._leased: Set[str] = set()
+        self._capacity: Optional[asyncio.Semaphore] = None
+
+    async def scan_and_audit(self, keyword: str) -> Dict[str, StageStats]:
+        """
+        Search for repositories and audit them through a staged pipeline.
+
+        Search results flow through metadata/README fetching, download and LLM
+        analysis. Bounded queues sit between the stages and each stage has its
+        own worker pool, so downloads and analyses overlap while a slow stage
+        applies backpressure to the ones before it. Cancelling the scan stops
+        every worker and still reports the figures gathered so far.
+
+        Args:
+            keyword: Search query
+
+        Returns:
+            Dict[str, StageStats]: Per-stage figures keyed by stage name
+        """
+        self.logger.info("Starting scan for: %s", keyword)
+        return await self._run_pipeline(
+            f"Scan for {keyword}", "search", lambda stats, outbox: self._search(keyword, stats, outbox)
+        )
+
+    async def enqueue(self, keyword: str) -> int:
+        """
+        Add search results to the persistent work queue.
+
+        Repositories already queued, or audited at the pushed_at timestamp the
+        search reports, are left alone.
+
+        Args:
+            keyword: Search query
+
+        Returns:
+            int: Number of repositories queued
+        """
+        found = queued = 0
+        try:
+            async for repo in self.github_service.iter_search_repositories(
+                keyword, max_results=self.config.SCANNER_SEARCH_LIMIT or None
+            ):
+                found += 1
+                if await asyncio.to_thread(self.work_queue.enqueue, repo.full_name, pushed_at(repo), keyword):
+                    queued += 1
+        finally:
+            await self.github_service.aclose()
+        self.logger.info(
+            "Queued %s of %s repositories found for %s; the others are queued already or audited at their latest push",
+            queued, found, keyword,
+        )
+        self.logger.info(self.work_queue.summary())
+        return queued
+
+    async def drain_queue(self) -> Dict[str, StageStats]:
+        """
+        Audit repositories from the persistent work queue until none are left.
+
+        Repositories are leased one at a time, only while fewer than
+        SCANNER_METADATA_CONCURRENCY are in the pipeline, so workers share the
+        queue instead of the first one taking it all, and are fed through the
+        same staged pipeline as a scan. A background task renews the leases of every
+        repository in the pipeline, so other workers only take over the
+        repositories of a worker that stopped. The worker keeps polling while
+        other workers hold leases, since a lease that expires or fails comes
+        back to the queue. Leases still held when the worker is stopped are
+        returned to the queue.
 
-    async def scan_and_audit(self, keyword: str):
-        self.logger.info(f"Starting scan for: {keyword}")
-        repos = self.github_service.search_repositories(keyword)
-        
-        for repo_full_name in repos:
-            self.logger.info(f"Processing: {repo_full_name}")
+        Returns:
+            Dict[str, StageStats]: Per-stage figures keyed by stage name
+        """
+        self.logger.info("Worker %s draining the work queue", self.worker_id)
+        self._capacity = asyncio.Semaphore(self.config.SCANNER_METADATA_CONCURRENCY)
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            return await self._run_pipeline(f"Worker {self.worker_id}", "queue", self._lease)
+        finally:
+            heartbeat.cancel()
+            released = await asyncio.to_thread(self.work_queue.release, self.worker_id)
+            if released:
+                self.logger.info("Returned %s unfinished repositories to the work queue", released)
+            self._leased.clear()
+            self.logger.info(self.work_queue.summary())
+
+    async def _run_pipeline(self, label: str, source_name: str,
+                            source: Callable[[StageStats, asyncio.Queue], Awaitable[None]]) -> Dict[str, StageStats]:
+        """Run the metadata, download and analysis stages over the items source puts into its outbox"""
+        stages = {
+            source_name: StageStats(source_name, 1),
+            "metadata": StageStats("metadata", self.config.SCANNER_METADATA_CONCURRENCY),
+            "download": StageStats("download", self.config.SCANNER_DOWNLOAD_CONCURRENCY),
+            "analysis": StageStats("analysis", self.config.SCANNER_ANALYSIS_CONCURRENCY),
+        }
+        queues = [asyncio.Queue(maxsize=self.config.SCANNER_QUEUE_SIZE) for _ in range(3)]
+        pipeline = [
+            (stages["metadata"], queues[0], queues[1], self._fetch_metadata),
+            (stages["download"], queues[1], queues[2], self._download),
+            (stages["analysis"], queues[2], None, self._analyze),
+        ]
+
+        started = time.perf_counter()
+        workers: List[List[asyncio.Task]] = [
+            [
+                asyncio.create_task(self._run_stage(stats, inbox, outbox, handler))
+                for _ in range(stats.workers)
+            ]
+            for stats, inbox, outbox, handler in pipeline
+        ]
+        try:
+            await source(stages[source_name], queues[0])
+            # Drain the stages in order, stopping each pool once its queue is empty
+            for queue, stage_workers in zip(queues, workers):
+                await queue.join()
+                for task in stage_workers:
+                    task.cancel()
+        finally:
+            all_workers = [task for stage_workers in workers for task in stage_workers]
+            for task in all_workers:
+                task.cancel()
+            await asyncio.gather(*all_workers, return_exceptions=True)
+            await self.github_service.aclose()
+            await self.auto_builder.aclose()
+
+            elapsed = time.perf_counter() - started
+            self.logger.info("%s finished in %.2fs", label, elapsed)
+            for stats in stages.values():
+                self.logger.info(stats.summary(elapsed))
+            self.logger.info(self.github_service.summary())
+            for line in self.auto_builder.analysis_summary():
+                self.logger.info(line)
+            for line in metrics.summary():
+                self.logger.info(line)
+            metrics.export()
+
+        return stages
+
+    async def _search(self, keyword: str, stats: StageStats, outbox: asyncio.Queue):
+        """Feed search results into the pipeline as result pages arrive"""
+        start = time.perf_counter()
+        async for repo in self.github_service.iter_search_repositories(
+            keyword, max_results=self.config.SCANNER_SEARCH_LIMIT or None
+        ):
+            stats.busy_time += time.perf_counter() - start
+            stats.processed += 1
+            await outbox.put((time.perf_counter(), ScanItem(repo.full_name, repo)))
+            start = time.perf_counter()
+
+    async def _lease(self, stats: StageStats, outbox: asyncio.Queue):
+        """Feed repositories leased from the work queue into the pipeline until the queue is drained"""
+        start = time.perf_counter()
+        while True:
+            # Released by _finish once a repository leaves the pipeline
+            await self._capacity.acquire()
             try:
-                repo_url = f"https://github.com/{repo_full_name}"
-                repo_path, repo = self.github_service.download_repository(repo_url)
-                if not repo:
-                    continue
-                
-                readme_content = self.github_service.get_readme_content(repo)
-                if not readme_content:
+                job = await asyncio.to_thread(self.work_queue.lease, self.worker_id)
+            except BaseException:
+                self._capacity.release()
+                raise
+            if job is None:
+                self._capacity.release()
+                if not self._leased and not await asyncio.to_thread(self.work_queue.outstanding, self.worker_id):
+                    return
+                # Wait for this worker's failures to be retried and other workers' leases to end
+                await asyncio.sleep(QUEUE_POLL_INTERVAL)
+                continue
+            self._leased.add(job.full_name)
+            if job.attempts > 1:
+                self.logger.info("Retrying %s (attempt %s)", job.full_name, job.attempts)
+            stats.busy_time += time.perf_counter() - start
+            stats.processed += 1
+            await outbox.put((time.perf_counter(), ScanItem(job.full_name, pushed_at=job.pushed_at, leased=True)))
+            start = time.perf_counter()
+
+    async def _heartbeat(self):
+        """Renew the leases of the repositories in the pipeline well before they expire"""
+        while True:
+            await asyncio.sleep(self.config.SCANNER_LEASE_SECONDS / 3)
+            leased = list(self._leased)
+            try:
+                held = await asyncio.to_thread(self.work_queue.heartbeat, self.worker_id, leased)
+            except sqlite3.Error as e:
+                self.logger.warning("Could not renew work queue leases: %s", e)
+                continue
+            if held < len(leased):
+                self.logger.warning("%s leases expired before they were renewed", len(leased) - held)
+
+    async def _finish(self, item: ScanItem, error: Optional[str] = None):
+        """Report the outcome of a leased repository to the work queue"""
+        if not item.leased:
+            return
+        self._leased.discard(item.full_name)
+        self._capacity.release()
+        try:
+            if error is None:
+                await asyncio.to_thread(self.work_queue.complete, self.worker_id, item.full_name, item.pushed_at)
+            else:
+                await asyncio.to_thread(self.work_queue.fail, self.worker_id, item.full_name, error)
+        except sqlite3.Error as e:
+            self.logger.error("Could not update the work queue for %s: %s", item.full_name, e)
+
+    async def _run_stage(self, stats: StageStats, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue],
+                         handler: Callable[[ScanItem], Awaitable[Optional[ScanItem]]]):
+        """Worker loop: take items from inbox, process them and pass them on"""
+        while True:
+            enqueued, item = await inbox.get()
+            start = time.perf_counter()
+            stats.queue_wait += start - enqueued
+            try:
+                result = await handler(item)
+                elapsed = time.perf_counter() - start
+                stats.busy_time += elapsed
+                metrics.observe("scanner_stage", elapsed, stage=stats.name)
+                if result is None:
+                    stats.dropped += 1
+                    error = None if item.nothing_to_audit else f"no result from the {stats.name} stage"
+                    await self._finish(item, error)
                     continue
-                    
-                build_instructions = await self.auto_builder.analyze_build_steps(readme_content)
-                if build_instructions:
-                    self.logger.info(f"Successfully audited {repo_full_name}")
-                    # In future, automatically fix or suggest fixes
-                
+                stats.processed += 1
+                if outbox is not None:
+                    # Blocks while the next stage is saturated
+                    await outbox.put((time.perf_counter(), result))
+                else:
+                    await self._finish(result)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                self.logger.error(f"Error processing {repo_full_name}: {e}")
+                elapsed = time.perf_counter() - start
+                stats.busy_time += elapsed
+                metrics.observe("scanner_stage", elapsed, True, stage=stats.name)
+                stats.failed += 1
+                self.logger.error("Error processing %s in %s stage: %s", item.full_name, stats.name, e)
+                await self._finish(item, str(e) or type(e).__name__)
+            finally:
+                inbox.task_done()
+
+    async def _fetch_metadata(self, item: ScanItem) -> Optional[ScanItem]:
+        self.logger.info("Processing: %s", item.full_name)
+        if item.repo is None:
+            item.repo = await asyncio.to_thread(self.github_service.get_repository, item.full_name)
+            item.pushed_at = pushed_at(item.repo) or item.pushed_at
+        item.readme_content = await asyncio.to_thread(self.github_service.get_readme_content, item.repo)
+        if not item.readme_content:
+            # Build manifests may still describe the build
+            self.logger.info("No README found in %s, relying on build manifests", item.full_name)
+        return item
+
+    async def _download(self, item: ScanItem) -> Optional[ScanItem]:
+        repo_url = f"https://github.com/{item.full_name}"
+        # The scanner only reads the working copy, so it may be hardlinked to the blob store
+        item.repo_path, _ = await self.github_service.download_repository_async(repo_url, item.repo, read_only=True)
+        return item
+
+    async def _analyze(self, item: ScanItem) -> Optional[ScanItem]:
+        build_instructions = await self.auto_builder.analyze_repository(item.repo_path, item.readme_content, item.full_name)
+        if not build_instructions:
+            self.logger.warning("No build instructions found for %s in manifests or README", item.full_name)
+            # Without a README no backend was asked, so a retry would find nothing either
+            item.nothing_to_audit = not item.readme_content
+            return None
+        self.logger.info("Successfully audited %s", item.full_name)
+        last_build = await asyncio.to_thread(self.auto_builder.last_build_status, item.full_name)
+        if last_build:
+            self.logger.info("Last known build: %s", last_build.summary())
+        else:
+            self.logger.info("%s has not been built yet", item.full_name)
+        # In future, automatically fix or suggest fixes
+        return item
@@ -7,15 +7,31 @@ setup(
         'main',
         'scanner_main',
         'auto_builder',
+        'build_graph',
+        'process_runner',
+        'build_store',
+        'venv_pool',
         'config',
         'constants',
         'decorators',
+        'metrics',
+        'result_cache',
+        'readme_preprocessor',
+        'manifest_analyzer',
         'dspy_analyzer',
         'exceptions',
         'github_service',
+        'github_api',
+        'rate_limiter',
+        'http_cache',
+        'download_engine',
+        'repo_sync',
+        'blob_store',
+        'repo_compare',
         'logger',
         'ollama_service',
-        'scanner_service'
+        'scanner_service',
+        'work_queue'
     ],
     install_requires=[
         "PyGithub>=2.1.1",
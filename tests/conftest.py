@@ -0,0 +1,37 @@
+import pytest
+from benchmarks.fake_github import FakeGitHub
+from config import Config
+from github_service import GitHubService
+
+@pytest.fixture
+def fake_github(tmp_path, monkeypatch):
+    """
+    Factory serving synthetic repositories from a local fake GitHub.
+
+    Returns the server and a GitHubService configured against it, with every
+    directory below tmp_path. Keyword arguments override Config fields.
+    """
+    servers = []
+    # Caches with relative default locations, such as the build cache, end up below the test directory
+    monkeypatch.chdir(tmp_path)
+
+    def start(repos, **settings):
+        server = FakeGitHub(repos)
+        server.start()
+        servers.append(server)
+        config = Config(**{
+            "GITHUB_TOKEN": "test-token",
+            "OPENAI_API_KEY": "test-key",
+            "BASE_DIRECTORY": tmp_path / "repos",
+            "LOG_DIRECTORY": tmp_path / "logs",
+            "HTTP_CACHE_DIRECTORY": tmp_path / "cache" / "http",
+            "TOKEN_CACHE_DIRECTORY": tmp_path / "cache" / "tokens",
+            "GITHUB_API_URL": server.base_url,
+            "GITHUB_RAW_URL": server.raw_url,
+            **settings,
+        })
+        return server, GitHubService(config)
+
+    yield start
+    for server in servers:
+        server.stop()
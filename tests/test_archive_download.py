@@ -0,0 +1,62 @@
+import io
+import os
+import tarfile
+import pytest
+from benchmarks.fake_github import SyntheticRepo, synthetic_repo
+
+def add_member(archive: tarfile.TarFile, name: str, content: bytes = b"", **attributes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    for attribute, value in attributes.items():
+        setattr(info, attribute, value)
+    archive.addfile(info, io.BytesIO(content) if content else None)
+
+def hostile_tarball(prefix: str) -> bytes:
+    """A tarball with regular files next to members that must not be extracted"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        add_member(archive, f"{prefix}/README.md", b"# hostile\n")
+        add_member(archive, f"{prefix}/src", type=tarfile.DIRTYPE)
+        add_member(archive, f"{prefix}/src/main.py", b"print('hello')\n")
+        add_member(archive, f"{prefix}/../escaped.txt", b"outside\n")
+        add_member(archive, "/absolute.txt", b"absolute\n")
+        add_member(archive, f"{prefix}/link", type=tarfile.SYMTYPE, linkname="/etc/passwd")
+        add_member(archive, f"{prefix}/hardlink", type=tarfile.LNKTYPE, linkname=f"{prefix}/README.md")
+    return buffer.getvalue()
+
+@pytest.fixture
+def github(fake_github):
+    files = synthetic_repo("owner/plain", files=12, depth=3, file_size=256).files
+    plain = SyntheticRepo(
+        "owner/plain", {**files, "configure": b"#!/bin/sh\necho configured\n"}, executables={"configure"}
+    )
+    hostile = SyntheticRepo("owner/hostile", {}, archive=hostile_tarball("owner-hostile-abc1234"))
+    server, service = fake_github([plain, hostile], DOWNLOAD_MODE="archive")
+    return server, service, service.config
+
+def test_archive_download_unpacks_repository(github):
+    server, service, config = github
+    repo_path, repo = service.download_repository("https://github.com/owner/plain")
+
+    assert repo_path == config.BASE_DIRECTORY / "owner" / "plain"
+    assert repo.full_name == "owner/plain"
+    expected = server.repos["owner/plain"].files
+    unpacked = {
+        path.relative_to(repo_path).as_posix(): path.read_bytes() for path in repo_path.rglob("*") if path.is_file()
+    }
+    assert unpacked == expected
+    assert os.access(repo_path / "configure", os.X_OK)
+    assert not os.access(repo_path / "README.md", os.X_OK)
+    assert server.snapshot().get("tarball") == 1
+
+def test_archive_download_skips_traversal_and_link_members(github, tmp_path):
+    server, service, config = github
+    repo_path, _ = service.download_repository("https://github.com/owner/hostile")
+
+    assert (repo_path / "README.md").read_bytes() == b"# hostile\n"
+    assert (repo_path / "src" / "main.py").read_bytes() == b"print('hello')\n"
+    assert not (repo_path / "link").exists() and not (repo_path / "link").is_symlink()
+    assert not (repo_path / "hardlink").exists()
+    assert not (config.BASE_DIRECTORY / "escaped.txt").exists()
+    assert not list(tmp_path.rglob("escaped.txt"))
+    assert not list(tmp_path.rglob("absolute.txt"))
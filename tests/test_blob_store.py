@@ -0,0 +1,69 @@
+import os
+import pytest
+from benchmarks.fake_github import SyntheticRepo, blob_sha
+from blob_store import BlobStore
+
+FILES = {
+    "README.md": b"# app\n",
+    "configure": b"#!/bin/sh\necho configured\n",
+    "src/app.py": b"print('app')\n",
+}
+
+def repository(full_name: str) -> SyntheticRepo:
+    # Forks share every blob with the original
+    return SyntheticRepo(full_name, dict(FILES), executables={"configure"})
+
+@pytest.fixture(params=["concurrent", "incremental"])
+def github(request, fake_github):
+    server, service = fake_github([repository("owner/app"), repository("fork/app")], DOWNLOAD_MODE=request.param)
+    return server, service
+
+def download(service, full_name: str, read_only: bool = False):
+    repo_path, _ = service.download_repository(f"https://github.com/{full_name}", read_only=read_only)
+    return repo_path
+
+def test_built_working_copies_are_private_and_keep_modes(github):
+    _, service = github
+    original = download(service, "owner/app")
+    fork = download(service, "fork/app")
+
+    for repo_path in (original, fork):
+        assert {
+            path.relative_to(repo_path).as_posix(): path.read_bytes() for path in repo_path.rglob("*") if path.is_file()
+        } == FILES
+        assert os.stat(repo_path / "README.md").st_nlink == 1
+        assert os.stat(repo_path / "README.md").st_mode & 0o200
+        assert os.access(repo_path / "configure", os.X_OK)
+        assert not os.access(repo_path / "src" / "app.py", os.X_OK)
+
+    # A build editing a tracked file changes neither the fork nor the store
+    (original / "README.md").write_bytes(b"patched\n")
+    assert (fork / "README.md").read_bytes() == FILES["README.md"]
+    assert download(service, "fork/app", read_only=True) == fork
+    assert (fork / "README.md").read_bytes() == FILES["README.md"]
+
+def test_read_only_working_copies_are_hardlinked(github):
+    _, service = github
+    download(service, "owner/app")
+    repo_path = download(service, "fork/app", read_only=True)
+    assert os.stat(repo_path / "README.md").st_nlink > 1
+
+    # Syncing the same directory for a build replaces the hardlinks
+    repo_path = download(service, "fork/app")
+    assert os.stat(repo_path / "README.md").st_nlink == 1
+    assert os.access(repo_path / "configure", os.X_OK)
+
+def test_storing_a_blob_twice_counts_it_once(github):
+    _, service = github
+    store = BlobStore(service.config)
+    content = b"shared\n"
+    sha = blob_sha(content)
+    assert store.size() == 0
+    for _ in range(2):
+        # As when two downloads fetch the same blob at once
+        tmp_path = store.temp_path()
+        tmp_path.write_bytes(content)
+        store.add(sha, tmp_path)
+        assert not tmp_path.exists()
+    assert store.size() == len(content)
+    assert store.path_for(sha).read_bytes() == content
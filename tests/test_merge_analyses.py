@@ -0,0 +1,32 @@
+from build_graph import plan_build_steps
+from readme_preprocessor import merge_analyses
+
+def test_clashing_step_ids_of_chunks_are_renamed():
+    first = {
+        "setup_steps": [{"id": "deps", "command": "pip install -e ."}],
+        "build_steps": [{"id": "build", "command": "make", "depends_on": ["deps"]}],
+    }
+    second = {
+        "setup_steps": [{"id": "deps", "command": "npm ci"}],
+        "build_steps": [{"id": "build", "command": "npm run build", "depends_on": ["deps"]}],
+        "test_steps": [{"id": "test", "command": "npm test", "depends_on": ["build"]}],
+    }
+    merged = merge_analyses([first, second])
+
+    steps = {step.command: step for step in plan_build_steps(merged)}
+    assert steps["make"].depends_on == [steps["pip install -e ."].id]
+    assert steps["npm run build"].depends_on == [steps["npm ci"].id]
+    assert steps["npm test"].depends_on == [steps["npm run build"].id]
+    assert len({step.id for step in steps.values()}) == len(steps)
+
+def test_references_to_a_dropped_repeat_point_at_the_kept_step():
+    first = {"setup_steps": ["pip install -e ."]}
+    second = {
+        "setup_steps": [{"id": "install", "command": "pip install -e ."}],
+        "test_steps": [{"id": "test", "command": "pytest", "depends_on": "install"}],
+    }
+    merged = merge_analyses([first, second])
+
+    assert [step["command"] for step in merged["setup_steps"]] == ["pip install -e ."]
+    steps = {step.command: step for step in plan_build_steps(merged)}
+    assert steps["pytest"].depends_on == [steps["pip install -e ."].id]
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+import requests
+from github_service import GitHubService
+from benchmarks.fake_github import synthetic_repo
+
+def exhaust_quota(server, path: str) -> None:
+    """Spend the rest of the token's quota behind the scheduler's back"""
+    while requests.get(f"{server.base_url}{path}", headers={"Authorization": "token test-token"}).status_code != 403:
+        pass
+
+def test_rate_limited_calls_are_retried_once_the_quota_resets(fake_github):
+    server, service = fake_github([synthetic_repo("owner/app", 2, 1, 64)])
+    server.rate_limit, server.rate_window = 5, 1.0
+
+    exhaust_quota(server, "/user")
+    assert service.get_repository("owner/app").full_name == "owner/app"
+
+    exhaust_quota(server, "/search/repositories?q=app")
+    assert service.search_repositories("app") == ["owner/app"]
+
+    snapshot = server.snapshot()
+    assert snapshot["rate_limited"] >= 2
+    assert service.scheduler.rate_limited >= 2
+
+def test_a_burst_stays_within_the_quota(fake_github):
+    server, service = fake_github([synthetic_repo("owner/app", 2, 1, 64)], GITHUB_MAX_REQUESTS_PER_SECOND=1000.0)
+    server.rate_limit, server.rate_window = 25, 1.0
+    # A fresh scheduler that has not seen the unlimited quota of the token check
+    service = GitHubService(service.config)
+
+    async def burst():
+        api = service._get_api_client()
+        try:
+            await asyncio.gather(
+                *(api.get_json("/repos/owner/app") for _ in range(30)),
+                *(asyncio.to_thread(service.get_repository, "owner/app") for _ in range(30)),
+            )
+        finally:
+            await service.aclose()
+
+    asyncio.run(burst())
+    snapshot = server.snapshot()
+    # Conditional requests answered with 304 count against the quota too
+    assert snapshot["repository"] + snapshot.get("not_modified", 0) == 60
+    assert snapshot.get("rate_limited", 0) == 0
+    assert service.scheduler.rate_limited == 0
+    assert all(state.in_flight == 0 for state in service.scheduler._states.values())
+
+def test_cancelled_requests_return_their_slot(fake_github):
+    server, service = fake_github([synthetic_repo("owner/app", 2, 1, 64)])
+    server.latency = 1.0
+
+    async def cancel():
+        api = service._get_api_client()
+        try:
+            request = asyncio.create_task(api.get_json("/repos/owner/app"))
+            await asyncio.sleep(0.2)
+            request.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await request
+        finally:
+            await service.aclose()
+
+    asyncio.run(cancel())
+    assert service.scheduler._states[("test-token", "core")].in_flight == 0
+
+def test_pygithub_requests_outside_reported_calls_are_released(fake_github):
+    _, service = fake_github([synthetic_repo("owner/app", 2, 1, 64)])
+    # Lazy completion sends a request nobody reports the response of
+    assert service.github.get_user().login == "benchmark"
+    assert service.scheduler._states[("test-token", "core")].in_flight == 0
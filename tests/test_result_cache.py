@@ -0,0 +1,32 @@
+from pathlib import Path
+import pytest
+from constants import DownloadMode
+from result_cache import ACCESS_BATCH, ResultCache
+
+def test_keys_are_stable_and_reject_arguments_without_one():
+    key = ResultCache.make_key("f", (Path("repo"), DownloadMode.ARCHIVE), {"n": 1})
+    assert key == ResultCache.make_key("f", ("repo", "archive"), {"n": 1})
+    with pytest.raises(TypeError):
+        # Its repr holds a memory address that changes every run
+        ResultCache.make_key("f", (object(),), {})
+
+def test_hits_write_access_times_in_batches(tmp_path):
+    cache = ResultCache(tmp_path, ttl=None)
+    for index in range(ACCESS_BATCH):
+        cache.set(str(index), index)
+    conn = cache._connect()
+    changes = conn.total_changes
+    for index in range(ACCESS_BATCH - 1):
+        assert cache.get(str(index)) == (True, index)
+    assert conn.total_changes == changes
+    cache.get(str(ACCESS_BATCH - 1))
+    assert conn.total_changes == changes + ACCESS_BATCH
+
+def test_eviction_sees_pending_access_times(tmp_path):
+    cache = ResultCache(tmp_path, ttl=None, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.set("c", 3)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("b") == (False, None)
@@ -0,0 +1,41 @@
+import asyncio
+import os
+import pytest
+from benchmarks.fake_github import SyntheticRepo
+from scanner_service import ScannerService
+
+def repository(full_name: str) -> SyntheticRepo:
+    return SyntheticRepo(full_name, {"README.md": f"# {full_name}\n".encode(), f"src/{full_name.split('/')[0]}.py": b"pass\n"})
+
+@pytest.mark.parametrize("mode", ["concurrent", "incremental", "archive"])
+def test_same_named_repositories_get_their_own_working_copies(fake_github, mode):
+    repos = [repository("owner/app"), repository("fork/app")]
+    server, service = fake_github(
+        repos, DOWNLOAD_MODE=mode, SCANNER_DOWNLOAD_CONCURRENCY=2, SCANNER_ANALYSIS_CONCURRENCY=2,
+    )
+    scanner = ScannerService(service.config)
+    analyzed = {}
+    link_counts = {}
+    waiting = []
+    both_downloaded = asyncio.Event()
+
+    async def analyze_repository(repo_path, readme_content, full_name):
+        # Read the trees only once both downloads finished, when a shared directory would hold just one of them
+        waiting.append(full_name)
+        if len(waiting) == len(repos):
+            both_downloaded.set()
+        await both_downloaded.wait()
+        analyzed[full_name] = {
+            path.relative_to(repo_path).as_posix(): path.read_bytes() for path in repo_path.rglob("*") if path.is_file()
+        }
+        link_counts[full_name] = os.stat(repo_path / "README.md").st_nlink
+        return {"steps": []}
+
+    scanner.auto_builder.analyze_repository = analyze_repository
+    stages = asyncio.run(scanner.scan_and_audit("app"))
+
+    assert stages["analysis"].processed == len(repos)
+    assert analyzed == {repo.full_name: repo.files for repo in repos}
+    if mode != "archive":
+        # The scanner never builds, so its working copies share the blob store's files
+        assert all(count > 1 for count in link_counts.values())
@@ -0,0 +1,31 @@
+from datetime import date
+import pytest
+from github_service import SEARCH_EPOCH, created_range
+
+TODAY = date.today()
+
+@pytest.mark.parametrize("query, expected", [
+    ("cli tool", ("cli tool", SEARCH_EPOCH, TODAY)),
+    ("cli created:2020-01-01..2020-12-31 language:go", ("cli language:go", date(2020, 1, 1), date(2020, 12, 31))),
+    ("created:>=2021-06-01 cli", ("cli", date(2021, 6, 1), TODAY)),
+    ("cli created:>2021-06-01", ("cli", date(2021, 6, 2), TODAY)),
+    ("cli created:<=2015-03-01", ("cli", SEARCH_EPOCH, date(2015, 3, 1))),
+    ("cli created:<2015-03-01", ("cli", SEARCH_EPOCH, date(2015, 2, 28))),
+    ("cli created:2019-05-05", ("cli", date(2019, 5, 5), date(2019, 5, 5))),
+    ("cli created:*..2010-01-01", ("cli", SEARCH_EPOCH, date(2010, 1, 1))),
+    ("cli created:2001-01-01..*", ("cli", SEARCH_EPOCH, TODAY)),
+])
+def test_created_qualifier_narrows_the_search_range(query, expected):
+    assert created_range(query) == expected
+
+@pytest.mark.parametrize("query", [
+    "cli -created:2020-01-01..2020-12-31",
+    "cli created:>2020-01-01 created:<2021-01-01",
+    "cli created:2020-01-01T10:00:00Z..2020-02-01",
+    "cli created:yesterday",
+])
+def test_created_qualifier_that_is_no_date_range_disables_splitting(query):
+    assert created_range(query) is None
+
+def test_unrelated_qualifiers_are_kept():
+    assert created_range("cli pushed:>2020-01-01 user:created") == ("cli pushed:>2020-01-01 user:created", SEARCH_EPOCH, TODAY)
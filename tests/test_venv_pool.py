@@ -0,0 +1,33 @@
+import os
+import pytest
+from config import Config
+import venv_pool
+from venv_pool import VenvPool
+
+pytestmark = pytest.mark.skipif(venv_pool.fcntl is None, reason="slots are locked with fcntl")
+
+@pytest.fixture
+def config(tmp_path):
+    return Config(
+        GITHUB_TOKEN="test-token", OPENAI_API_KEY="test-key", BASE_DIRECTORY=tmp_path / "repos",
+        LOG_DIRECTORY=tmp_path / "logs", VENV_POOL_DIRECTORY=tmp_path / "venvs", VENV_POOL_SIZE=2,
+    )
+
+def release(pool: VenvPool) -> None:
+    for fd in pool._slot_locks:
+        os.close(fd)
+
+def test_pools_sharing_a_directory_claim_separate_slots(config):
+    # flock locks of separate open files conflict within a process just as between processes
+    first, second = VenvPool(config), VenvPool(config)
+    first_slots = first._claim_slots()
+    second_slots = second._claim_slots()
+    assert [slot.name for slot in first_slots] == ["slot-0", "slot-1"]
+    assert [slot.name for slot in second_slots] == ["slot-2", "slot-3"]
+
+    # Slots of a process that exited are taken over
+    release(first)
+    third = VenvPool(config)
+    assert third._claim_slots() == first_slots
+    release(second)
+    release(third)
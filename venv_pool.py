@@ -0,0 +1,224 @@
+import asyncio
+import os
+import shutil
+import sys
+import venv
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set
+from config import Config
+from logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+TEMPLATE_NAME = "template"
+# Written into the template so it is rebuilt when the interpreter changes
+VERSION_MARKER = ".interpreter"
+# Resets of a returned slot before it is taken out of the pool
+RESET_ATTEMPTS = 2
+LOCK_SUFFIX = ".lock"
+
+@dataclass
+class Venv:
+    """An isolated virtual environment checked out of the pool"""
+    path: Path
+    wheelhouse: Path
+
+    @property
+    def bin_dir(self) -> Path:
+        return self.path / ("Scripts" if os.name == "nt" else "bin")
+
+    @property
+    def python(self) -> str:
+        return str(self.bin_dir / ("python.exe" if os.name == "nt" else "python"))
+
+    def environ(self) -> Dict[str, str]:
+        """Environment for commands that should run inside the virtualenv"""
+        env = dict(os.environ)
+        env.pop("PYTHONHOME", None)
+        env["VIRTUAL_ENV"] = str(self.path)
+        env["PATH"] = f"{self.bin_dir}{os.pathsep}{env.get('PATH', '')}"
+        # Builds that call pip themselves still pick up wheels from the wheelhouse
+        env["PIP_FIND_LINKS"] = str(self.wheelhouse)
+        env["PIP_DISABLE_PIP_VERSION_CHECK"] = "1"
+        return env
+
+class VenvPool:
+    """
+    Pool of pre-created virtual environments for builds.
+
+    A template virtualenv with pip is created once per interpreter and the
+    VENV_POOL_SIZE slots are copies of it, so handing one out takes no time.
+    A slot that comes back is wiped and copied from the template again in the
+    background before it is handed out to the next build, so builds never
+    see each other's packages and never touch the analyzer's own environment.
+    Copies get the template's path in their scripts replaced with their own,
+    so console scripts such as pip run the slot's interpreter. A slot that
+    cannot be reset is taken out of the pool.
+    Processes sharing VENV_POOL_DIRECTORY never touch each other's slots: each
+    holds a file lock on the slots it uses until it exits, and the template is
+    only rebuilt under an exclusive lock that waits for copies in progress.
+    Dependencies are installed from a shared wheelhouse: wheels are built or
+    downloaded into it once and later installs run offline from disk.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.logger = setup_logger(__name__, log_dir=config.LOG_DIRECTORY)
+        # Absolute, since build steps run from the repository directory
+        self.root = Path(config.VENV_POOL_DIRECTORY).resolve()
+        self.wheelhouse = Path(config.WHEELHOUSE_DIRECTORY).resolve()
+        self.size = config.VENV_POOL_SIZE
+        self._slots = 0
+        self._ready: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._started = False
+        self._resets: Set[asyncio.Task] = set()
+        self._claimed: List[Path] = []
+        # Open lock files of the claimed slots; the locks are released when the process exits
+        self._slot_locks: List[int] = []
+
+    async def start(self) -> None:
+        """Create the template and fill the pool; called on first checkout if not done before"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._ready = asyncio.Queue()
+            self._start_lock = asyncio.Lock()
+            self._started = False
+            self._loop = loop
+        async with self._start_lock:
+            if self._started:
+                return
+            await asyncio.to_thread(self._ensure_template)
+            if not self._claimed:
+                self._claimed = await asyncio.to_thread(self._claim_slots)
+            slots = self._claimed
+            await asyncio.gather(*(asyncio.to_thread(self._reset, slot) for slot in slots))
+            for slot in slots:
+                self._ready.put_nowait(slot)
+            self._slots = len(slots)
+            self._started = True
+            self.logger.info("Virtualenv pool ready with %s environments in %s", self.size, self.root)
+
+    @asynccontextmanager
+    async def checkout(self) -> AsyncIterator[Venv]:
+        """Borrow a clean virtualenv for the duration of a build"""
+        await self.start()
+        slot = await self._ready.get()
+        if slot is None:
+            # Every slot failed to reset; wake the next waiter too
+            self._ready.put_nowait(None)
+            raise RuntimeError(f"No usable virtualenvs left in {self.root}")
+        try:
+            yield Venv(slot, self.wheelhouse)
+        finally:
+            task = asyncio.get_running_loop().create_task(self._recycle(slot))
+            self._resets.add(task)
+            task.add_done_callback(self._resets.discard)
+
+    async def close(self) -> None:
+        """Wait for slots that are still being reset"""
+        if self._resets:
+            await asyncio.gather(*self._resets, return_exceptions=True)
+
+    async def _recycle(self, slot: Path) -> None:
+        for attempt in range(1, RESET_ATTEMPTS + 1):
+            try:
+                await asyncio.to_thread(self._reset, slot)
+            except Exception as e:
+                self.logger.warning("Failed to reset virtualenv %s (attempt %s): %s", slot, attempt, e)
+            else:
+                self._ready.put_nowait(slot)
+                return
+        # A slot in an unknown state must not be handed to another build
+        self._slots -= 1
+        self.logger.error("Removed virtualenv %s from the pool, %s left", slot, self._slots)
+        if not self._slots:
+            self._ready.put_nowait(None)
+
+    def _open_lock(self, path: Path, mode: int) -> Optional[int]:
+        """Open path and flock it with mode, returning None if LOCK_NB was given and another process holds it"""
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, mode)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    @contextmanager
+    def _template_lock(self, exclusive: bool) -> Iterator[None]:
+        """Hold the template lock, shared while copying it and exclusive while rebuilding it"""
+        if fcntl is None:
+            yield
+            return
+        fd = self._open_lock(self.root / f"{TEMPLATE_NAME}{LOCK_SUFFIX}", fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            os.close(fd)
+
+    def _claim_slots(self) -> List[Path]:
+        """Lock VENV_POOL_SIZE slots that no other process is using"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            # Without file locks every process keeps to its own slots
+            return [self.root / f"slot-{os.getpid()}-{index}" for index in range(self.size)]
+        slots = []
+        index = 0
+        while len(slots) < self.size:
+            slot = self.root / f"slot-{index}"
+            index += 1
+            fd = self._open_lock(slot.with_name(slot.name + LOCK_SUFFIX), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            if fd is not None:
+                self._slot_locks.append(fd)
+                slots.append(slot)
+        return slots
+
+    def _ensure_template(self) -> None:
+        template = self.root / TEMPLATE_NAME
+        marker = template / VERSION_MARKER
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._template_lock(exclusive=True):
+            if marker.exists() and marker.read_text() == sys.version:
+                return
+            self.logger.info("Creating virtualenv template in %s", template)
+            self.wheelhouse.mkdir(parents=True, exist_ok=True)
+            venv.EnvBuilder(with_pip=True, clear=True, symlinks=os.name != "nt").create(template)
+            marker.write_text(sys.version)
+
+    def _reset(self, slot: Path) -> None:
+        """Replace a slot with a fresh copy of the template"""
+        template = self.root / TEMPLATE_NAME
+        shutil.rmtree(slot, ignore_errors=True)
+        with self._template_lock(exclusive=False):
+            shutil.copytree(template, slot, symlinks=True)
+        # Console script shebangs and activate scripts name the template
+        old, new = os.fsencode(template), os.fsencode(slot)
+        for script in Venv(slot, self.wheelhouse).bin_dir.iterdir():
+            if script.is_symlink() or not script.is_file() or script.suffix == ".exe":
+                continue
+            content = script.read_bytes()
+            if old in content:
+                script.write_bytes(content.replace(old, new))
+
+    def install_commands(self, env: Venv, dependencies: List[str]) -> List[List[str]]:
+        """
+        Commands that install dependencies into a virtualenv through the wheelhouse.
+
+        The first command installs offline from the wheelhouse. If some wheel is
+        missing, the second fills the wheelhouse from the package index and the
+        third repeats the offline install.
+        """
+        find_links = ["--no-index", "--find-links", str(self.wheelhouse)]
+        return [
+            [env.python, "-m", "pip", "install", *find_links, *dependencies],
+            [env.python, "-m", "pip", "wheel", "--wheel-dir", str(self.wheelhouse),
+             "--find-links", str(self.wheelhouse), *dependencies],
+            [env.python, "-m", "pip", "install", *find_links, *dependencies],
+        ]
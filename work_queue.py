@@ -0,0 +1,193 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from config import Config
+
+QUEUE_FILENAME = "queue.sqlite3"
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+@dataclass
+class Job:
+    """A repository leased from the work queue"""
+    full_name: str
+    pushed_at: Optional[str]
+    attempts: int
+
+def worker_id() -> str:
+    """Name identifying this process as a lease owner, unique across machines"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+class WorkQueue:
+    """
+    Persistent queue of repositories to audit, backed by SQLite.
+
+    Any number of scanner processes can drain the queue. A worker leases one
+    repository at a time for SCANNER_LEASE_SECONDS and renews the lease with
+    heartbeats while it works on it. A lease that is not renewed, because its
+    worker crashed or was killed, expires and the repository is handed to the
+    next worker, up to MAX_RETRIES attempts. Repositories are keyed by name and
+    remember the pushed_at timestamp they were last audited at, so queueing
+    them again only schedules work if they were pushed to since or failed. The queue
+    lives in SCANNER_QUEUE_DIRECTORY; processes on several machines can share
+    it on a file system with working file locks.
+    """
+
+    def __init__(self, config: Config):
+        self.queue_path = Path(config.SCANNER_QUEUE_DIRECTORY)
+        self.lease_seconds = config.SCANNER_LEASE_SECONDS
+        self.max_attempts = config.MAX_RETRIES
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not be shared with forked children
+        if self._conn is None or self._pid != os.getpid():
+            self.queue_path.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.queue_path / QUEUE_FILENAME, timeout=30, check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "full_name TEXT PRIMARY KEY, pushed_at TEXT, keyword TEXT, status TEXT NOT NULL, "
+                "owner TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "enqueued REAL NOT NULL, finished REAL, error TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, enqueued)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def enqueue(self, full_name: str, pushed_at: Optional[str], keyword: str = "") -> bool:
+        """
+        Queue a repository unless it was already audited at this pushed_at.
+
+        Repositories that failed are queued again with fresh attempts.
+
+        Returns:
+            bool: True if the repository was queued or re-queued
+        """
+        with self._lock:
+            cursor = self._connect().execute(
+                "INSERT INTO jobs (full_name, pushed_at, keyword, status, enqueued) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (full_name) DO UPDATE SET "
+                "pushed_at = excluded.pushed_at, keyword = excluded.keyword, status = ?, "
+                "attempts = 0, enqueued = excluded.enqueued, finished = NULL, error = NULL "
+                "WHERE status = ? OR (status = ? AND pushed_at IS NOT excluded.pushed_at)",
+                (full_name, pushed_at, keyword, PENDING, time.time(), PENDING, FAILED, DONE),
+            )
+        return cursor.rowcount > 0
+
+    def lease(self, owner: str) -> Optional[Job]:
+        """
+        Lease the oldest pending repository, reclaiming expired leases first.
+
+        Returns:
+            Optional[Job]: The leased repository, or None if nothing is ready
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Workers that died with a lease get it taken away; their
+                # repositories are retried unless they used up their attempts
+                conn.execute(
+                    "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, owner = NULL, "
+                    "error = CASE WHEN attempts >= ? THEN 'lease expired' ELSE error END "
+                    "WHERE status = ? AND lease_expires < ?",
+                    (self.max_attempts, FAILED, PENDING, self.max_attempts, LEASED, now),
+                )
+                row = conn.execute(
+                    "SELECT full_name, pushed_at, attempts FROM jobs WHERE status = ? ORDER BY enqueued LIMIT 1",
+                    (PENDING,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                        "WHERE full_name = ?",
+                        (LEASED, owner, now + self.lease_seconds, row[0]),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return Job(row[0], row[1], row[2] + 1)
+
+    def heartbeat(self, owner: str, full_names: Iterable[str]) -> int:
+        """Extend the leases an owner holds on the given repositories; returns how many it still holds"""
+        names = list(full_names)
+        if not names:
+            return 0
+        with self._lock:
+            cursor = self._connect().execute(
+                f"UPDATE jobs SET lease_expires = ? WHERE status = ? AND owner = ? "
+                f"AND full_name IN ({', '.join('?' * len(names))})",
+                (time.time() + self.lease_seconds, LEASED, owner, *names),
+            )
+        return cursor.rowcount
+
+    def complete(self, owner: str, full_name: str, pushed_at: Optional[str]) -> None:
+        """Mark a leased repository as audited at pushed_at"""
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = ?, pushed_at = COALESCE(?, pushed_at), owner = NULL, "
+                "finished = ?, error = NULL WHERE full_name = ? AND status = ? AND owner = ?",
+                (DONE, pushed_at, time.time(), full_name, LEASED, owner),
+            )
+
+    def fail(self, owner: str, full_name: str, error: str) -> None:
+        """Give a leased repository back for another attempt, or fail it once it used up its attempts"""
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, owner = NULL, "
+                "finished = ?, error = ? WHERE full_name = ? AND status = ? AND owner = ?",
+                (self.max_attempts, FAILED, PENDING, time.time(), error, full_name, LEASED, owner),
+            )
+
+    def release(self, owner: str) -> int:
+        """Return every lease an owner still holds to the queue without counting the attempt"""
+        with self._lock:
+            cursor = self._connect().execute(
+                "UPDATE jobs SET status = ?, owner = NULL, attempts = MAX(attempts - 1, 0) "
+                "WHERE status = ? AND owner = ?",
+                (PENDING, LEASED, owner),
+            )
+        return cursor.rowcount
+
+    def outstanding(self, owner: str) -> int:
+        """Repositories still pending or leased by other workers, which may come back to the queue"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? OR (status = ? AND owner IS NOT ?)",
+                (PENDING, LEASED, owner),
+            ).fetchone()
+        return row[0]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of repositories in each state"""
+        with self._lock:
+            rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in (PENDING, LEASED, DONE, FAILED)}
+        counts.update(dict(rows))
+        return counts
+
+    def summary(self) -> str:
+        counts = self.counts()
+        return (
+            f"Work queue: {counts[PENDING]} pending, {counts[LEASED]} leased, "
+            f"{counts[DONE]} audited, {counts[FAILED]} failed"
+        )